@@ -0,0 +1,128 @@
+"""add_catalog_store_tables
+
+Revision ID: 3c9d2a7f41b8
+Revises: 681e95f11857
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9d2a7f41b8'
+down_revision: Union[str, Sequence[str], None] = '681e95f11857'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Local copy of the Clover catalog, synced by services/catalog_sync_service.py
+    op.create_table('catalog_categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('clover_merchant_id', sa.String(length=64), nullable=False),
+    sa.Column('clover_category_id', sa.String(length=64), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=True),
+    sa.Column('sort_order', sa.Integer(), nullable=True),
+    sa.Column('modified_time', sa.BigInteger(), nullable=True),
+    sa.Column('raw_json', sa.Text(), nullable=True),
+    sa.Column('synced_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('clover_merchant_id', 'clover_category_id', name='uq_catalog_categories_merchant_category')
+    )
+    op.create_index(op.f('ix_catalog_categories_id'), 'catalog_categories', ['id'], unique=False)
+    op.create_index('ix_catalog_categories_merchant_sort', 'catalog_categories', ['clover_merchant_id', 'sort_order'], unique=False)
+
+    op.create_table('catalog_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('clover_merchant_id', sa.String(length=64), nullable=False),
+    sa.Column('clover_item_id', sa.String(length=64), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=True),
+    sa.Column('price', sa.Integer(), nullable=True),
+    sa.Column('price_type', sa.String(length=32), nullable=True),
+    sa.Column('is_hidden', sa.Boolean(), nullable=True),
+    sa.Column('available', sa.Boolean(), nullable=True),
+    sa.Column('modified_time', sa.BigInteger(), nullable=True),
+    sa.Column('raw_json', sa.Text(), nullable=True),
+    sa.Column('synced_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('clover_merchant_id', 'clover_item_id', name='uq_catalog_items_merchant_item')
+    )
+    op.create_index(op.f('ix_catalog_items_id'), 'catalog_items', ['id'], unique=False)
+    op.create_index('ix_catalog_items_merchant_modified', 'catalog_items', ['clover_merchant_id', 'modified_time'], unique=False)
+
+    op.create_table('catalog_item_categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('clover_merchant_id', sa.String(length=64), nullable=False),
+    sa.Column('clover_item_id', sa.String(length=64), nullable=False),
+    sa.Column('clover_category_id', sa.String(length=64), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('clover_merchant_id', 'clover_item_id', 'clover_category_id', name='uq_catalog_item_categories')
+    )
+    op.create_index(op.f('ix_catalog_item_categories_id'), 'catalog_item_categories', ['id'], unique=False)
+    op.create_index('ix_catalog_item_categories_category', 'catalog_item_categories', ['clover_merchant_id', 'clover_category_id'], unique=False)
+
+    op.create_table('catalog_variants',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('clover_merchant_id', sa.String(length=64), nullable=False),
+    sa.Column('clover_variant_id', sa.String(length=64), nullable=False),
+    sa.Column('clover_item_id', sa.String(length=64), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=True),
+    sa.Column('price', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('clover_merchant_id', 'clover_variant_id', name='uq_catalog_variants_merchant_variant')
+    )
+    op.create_index(op.f('ix_catalog_variants_id'), 'catalog_variants', ['id'], unique=False)
+    op.create_index('ix_catalog_variants_merchant_item', 'catalog_variants', ['clover_merchant_id', 'clover_item_id'], unique=False)
+
+    op.create_table('catalog_modifier_groups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('clover_merchant_id', sa.String(length=64), nullable=False),
+    sa.Column('clover_modifier_group_id', sa.String(length=64), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=True),
+    sa.Column('min_required', sa.Integer(), nullable=True),
+    sa.Column('max_allowed', sa.Integer(), nullable=True),
+    sa.Column('modified_time', sa.BigInteger(), nullable=True),
+    sa.Column('raw_json', sa.Text(), nullable=True),
+    sa.Column('synced_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('clover_merchant_id', 'clover_modifier_group_id', name='uq_catalog_modifier_groups_merchant_group')
+    )
+    op.create_index(op.f('ix_catalog_modifier_groups_id'), 'catalog_modifier_groups', ['id'], unique=False)
+    op.create_index('ix_catalog_modifier_groups_merchant_modified', 'catalog_modifier_groups', ['clover_merchant_id', 'modified_time'], unique=False)
+
+    op.create_table('catalog_sync_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('clover_merchant_id', sa.String(length=64), nullable=False),
+    sa.Column('resource', sa.String(length=32), nullable=False),
+    sa.Column('last_modified_time', sa.BigInteger(), nullable=True),
+    sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+    sa.Column('last_full_sync_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('clover_merchant_id', 'resource', name='uq_catalog_sync_state_merchant_resource')
+    )
+    op.create_index(op.f('ix_catalog_sync_state_id'), 'catalog_sync_state', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_catalog_sync_state_id'), table_name='catalog_sync_state')
+    op.drop_table('catalog_sync_state')
+    op.drop_index('ix_catalog_modifier_groups_merchant_modified', table_name='catalog_modifier_groups')
+    op.drop_index(op.f('ix_catalog_modifier_groups_id'), table_name='catalog_modifier_groups')
+    op.drop_table('catalog_modifier_groups')
+    op.drop_index('ix_catalog_variants_merchant_item', table_name='catalog_variants')
+    op.drop_index(op.f('ix_catalog_variants_id'), table_name='catalog_variants')
+    op.drop_table('catalog_variants')
+    op.drop_index('ix_catalog_item_categories_category', table_name='catalog_item_categories')
+    op.drop_index(op.f('ix_catalog_item_categories_id'), table_name='catalog_item_categories')
+    op.drop_table('catalog_item_categories')
+    op.drop_index('ix_catalog_items_merchant_modified', table_name='catalog_items')
+    op.drop_index(op.f('ix_catalog_items_id'), table_name='catalog_items')
+    op.drop_table('catalog_items')
+    op.drop_index('ix_catalog_categories_merchant_sort', table_name='catalog_categories')
+    op.drop_index(op.f('ix_catalog_categories_id'), table_name='catalog_categories')
+    op.drop_table('catalog_categories')
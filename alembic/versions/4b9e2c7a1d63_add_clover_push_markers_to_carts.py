@@ -0,0 +1,31 @@
+"""add_clover_push_markers_to_carts
+
+Revision ID: 4b9e2c7a1d63
+Revises: e2b8f4a61d07
+Create Date: 2026-10-18 16:20:37.514902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b9e2c7a1d63'
+down_revision: Union[str, Sequence[str], None] = 'e2b8f4a61d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Set while a line item / modifier push is unconfirmed, so only then does a retry read the order back
+    op.add_column('carts', sa.Column('clover_items_push_started_at', sa.DateTime(), nullable=True))
+    op.add_column('carts', sa.Column('clover_modifiers_push_started_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('carts', 'clover_modifiers_push_started_at')
+    op.drop_column('carts', 'clover_items_push_started_at')
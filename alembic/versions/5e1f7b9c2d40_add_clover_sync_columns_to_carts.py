@@ -0,0 +1,41 @@
+"""add_clover_sync_columns_to_carts
+
+Revision ID: 5e1f7b9c2d40
+Revises: 3c9d2a7f41b8
+Create Date: 2026-10-18 11:02:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1f7b9c2d40'
+down_revision: Union[str, Sequence[str], None] = '3c9d2a7f41b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Clover order sync state, so a retried checkout resumes instead of duplicating lines
+    op.add_column('carts', sa.Column('clover_order_id', sa.String(length=64), nullable=True))
+    op.add_column('carts', sa.Column('clover_idempotency_key', sa.String(length=64), nullable=True))
+    op.add_column('carts', sa.Column('synced_at', sa.DateTime(), nullable=True))
+    op.create_unique_constraint('uq_carts_clover_idempotency_key', 'carts', ['clover_idempotency_key'])
+
+    op.add_column('cart_items', sa.Column('clover_line_item_id', sa.String(length=64), nullable=True))
+    op.add_column('cart_item_modifiers', sa.Column('clover_modification_id', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('cart_item_modifiers', 'clover_modification_id')
+    op.drop_column('cart_items', 'clover_line_item_id')
+
+    op.drop_constraint('uq_carts_clover_idempotency_key', 'carts', type_='unique')
+    op.drop_column('carts', 'synced_at')
+    op.drop_column('carts', 'clover_idempotency_key')
+    op.drop_column('carts', 'clover_order_id')
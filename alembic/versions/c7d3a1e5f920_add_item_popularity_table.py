@@ -0,0 +1,48 @@
+"""add_item_popularity_table
+
+Revision ID: c7d3a1e5f920
+Revises: 9a4c6e2f8b13
+Create Date: 2026-10-18 15:41:18.204377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d3a1e5f920'
+down_revision: Union[str, Sequence[str], None] = '9a4c6e2f8b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Item popularity counters used by services/food_suggestion_service.py
+    op.create_table('item_popularity',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('clover_merchant_id', sa.String(length=64), nullable=False),
+    sa.Column('clover_item_id', sa.String(length=64), nullable=False),
+    sa.Column('dietary_type', sa.String(length=32), nullable=False),
+    sa.Column('item_name', sa.String(length=255), nullable=True),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.Column('category', sa.String(length=255), nullable=True),
+    sa.Column('price', sa.Float(), nullable=True),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('cart_count', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('clover_merchant_id', 'clover_item_id', name='uq_item_popularity_merchant_item')
+    )
+    op.create_index(op.f('ix_item_popularity_id'), 'item_popularity', ['id'], unique=False)
+    op.create_index('ix_item_popularity_diet_score', 'item_popularity', ['dietary_type', 'score'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_item_popularity_diet_score', table_name='item_popularity')
+    op.drop_index(op.f('ix_item_popularity_id'), table_name='item_popularity')
+    op.drop_table('item_popularity')
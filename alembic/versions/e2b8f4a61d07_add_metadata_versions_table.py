@@ -0,0 +1,34 @@
+"""add_metadata_versions_table
+
+Revision ID: e2b8f4a61d07
+Revises: c7d3a1e5f920
+Create Date: 2026-10-18 17:02:44.918310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b8f4a61d07'
+down_revision: Union[str, Sequence[str], None] = 'c7d3a1e5f920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Version stamps of in-process metadata caches (services/question_flow.py)
+    op.create_table('metadata_versions',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('metadata_versions')
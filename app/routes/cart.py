@@ -1,7 +1,7 @@
 # app/routes/cart.py
 from fastapi import APIRouter, HTTPException, Query, Depends, Body
-from sqlalchemy.orm import Session
-from database.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.database import get_async_db, run_sync_helper
 from helpers.cart_helper import CartHelper
 from helpers.merchant_helper import MerchantHelper
 from pydantic import BaseModel
@@ -51,7 +51,7 @@ def _build_headers(access_token: str):
 @router.post("/create")
 async def create_cart(
     request: CreateCartRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new empty cart for guest or logged-in user"""
     try:
@@ -67,7 +67,7 @@ async def create_cart(
 
         # If customer_id is provided, validate it
         if request.customer_id:
-            if not CartHelper.validate_user(db, request.customer_id):
+            if not await run_sync_helper(db, CartHelper.validate_user, request.customer_id):
                 raise HTTPException(
                     status_code=404,
                     detail=f"User with ID {request.customer_id} not found or not verified"
@@ -83,10 +83,10 @@ async def create_cart(
                 )
 
             # Try to get user_id from session
-            session_user_id = CartHelper.get_user_id_from_session(db, request.session_id)
+            session_user_id = await run_sync_helper(db, CartHelper.get_user_id_from_session, request.session_id)
             if session_user_id:
                 # Validate the user from session
-                if not CartHelper.validate_user(db, session_user_id):
+                if not await run_sync_helper(db, CartHelper.validate_user, session_user_id):
                     raise HTTPException(
                         status_code=404,
                         detail=f"User from session {request.session_id} not found or not verified"
@@ -95,8 +95,9 @@ async def create_cart(
                 final_customer_id = session_user_id
 
         # Create cart
-        cart = CartHelper.create_cart(
-            db=db,
+        cart = await run_sync_helper(
+            db,
+            CartHelper.create_cart,
             merchant_id=request.merchant_id,
             customer_id=final_customer_id,
             session_id=request.session_id
@@ -121,10 +122,10 @@ async def create_cart(
 @router.get("/{cart_id}")
 async def get_cart(
     cart_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get cart details with all items and modifiers"""
-    cart_summary = CartHelper.get_cart_summary(db, cart_id)
+    cart_summary = await run_sync_helper(db, CartHelper.get_cart_summary, cart_id)
     if not cart_summary:
         raise HTTPException(status_code=404, detail="Cart not found")
 
@@ -138,20 +139,21 @@ async def get_cart(
 async def add_item_to_cart(
     cart_id: int,
     request: AddItemRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add an item to the cart"""
     try:
         # Check if cart exists
-        cart = CartHelper.get_cart_by_id(db, cart_id)
+        cart = await run_sync_helper(db, CartHelper.get_cart_by_id, cart_id)
         if not cart:
             raise HTTPException(status_code=404, detail="Cart not found")
 
         if cart.status != "active":
             raise HTTPException(status_code=400, detail="Cannot modify inactive cart")
 
-        cart_item = CartHelper.add_item_to_cart(
-            db=db,
+        cart_item = await run_sync_helper(
+            db,
+            CartHelper.add_item_to_cart,
             cart_id=cart_id,
             clover_item_id=request.clover_item_id,
             name=request.name,
@@ -176,12 +178,13 @@ async def update_item_quantity(
     cart_id: int,
     cart_item_id: int,
     request: UpdateQuantityRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update quantity of a cart item"""
     try:
-        cart_item = CartHelper.update_item_quantity(
-            db=db,
+        cart_item = await run_sync_helper(
+            db,
+            CartHelper.update_item_quantity,
             cart_item_id=cart_item_id,
             quantity=request.quantity
         )
@@ -210,10 +213,10 @@ async def update_item_quantity(
 async def remove_item_from_cart(
     cart_id: int,
     cart_item_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove an item from the cart"""
-    success = CartHelper.remove_item_from_cart(db, cart_item_id)
+    success = await run_sync_helper(db, CartHelper.remove_item_from_cart, cart_item_id)
     if not success:
         raise HTTPException(status_code=404, detail="Cart item not found")
 
@@ -229,12 +232,13 @@ async def add_modifier_to_item(
     cart_id: int,
     cart_item_id: int,
     request: AddModifierRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a modifier to a cart item"""
     try:
-        modifier = CartHelper.add_modifier_to_item(
-            db=db,
+        modifier = await run_sync_helper(
+            db,
+            CartHelper.add_modifier_to_item,
             cart_item_id=cart_item_id,
             clover_modifier_id=request.clover_modifier_id,
             clover_modifier_group_id=request.clover_modifier_group_id,
@@ -256,10 +260,10 @@ async def add_modifier_to_item(
 @router.delete("/{cart_id}/clear")
 async def clear_cart(
     cart_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Clear all items from the cart"""
-    success = CartHelper.clear_cart(db, cart_id)
+    success = await run_sync_helper(db, CartHelper.clear_cart, cart_id)
     if not success:
         raise HTTPException(status_code=404, detail="Cart not found")
 
@@ -273,14 +277,14 @@ async def clear_cart(
 @router.get("/session/{session_id}")
 async def get_cart_by_session(
     session_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get active cart by session ID (for guest users)"""
-    cart = CartHelper.get_active_cart_by_session(db, session_id)
+    cart = await run_sync_helper(db, CartHelper.get_active_cart_by_session, session_id)
     if not cart:
         raise HTTPException(status_code=404, detail="No active cart found for this session")
 
-    cart_summary = CartHelper.get_cart_summary(db, cart.id)
+    cart_summary = await run_sync_helper(db, CartHelper.get_cart_summary, cart.id)
     return {
         "success": True,
         "cart": cart_summary
@@ -291,19 +295,19 @@ async def get_cart_by_session(
 async def assign_customer_to_cart(
     cart_id: int,
     customer_id: int = Query(..., description="Customer ID to assign to cart"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Assign a logged-in customer to a guest cart (when user logs in during checkout)"""
     try:
         # Validate customer exists and is verified
-        if not CartHelper.validate_user(db, customer_id):
+        if not await run_sync_helper(db, CartHelper.validate_user, customer_id):
             raise HTTPException(
                 status_code=404,
                 detail=f"User with ID {customer_id} not found or not verified"
             )
 
         # Check if cart exists and is active
-        cart = CartHelper.get_cart_by_id(db, cart_id)
+        cart = await run_sync_helper(db, CartHelper.get_cart_by_id, cart_id)
         if not cart:
             raise HTTPException(status_code=404, detail="Cart not found")
 
@@ -316,7 +320,7 @@ async def assign_customer_to_cart(
         # Update cart with customer ID
         cart.customer_id = customer_id
         cart.updated_at = datetime.now()
-        db.commit()
+        await db.commit()
 
         return {
             "success": True,
@@ -329,29 +333,39 @@ async def assign_customer_to_cart(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to assign customer: {str(e)}")
 
 
 @router.get("/customer/{customer_id}")
 async def get_customer_carts(
     customer_id: int,
-    db: Session = Depends(get_db)
+    status: Optional[str] = Query(None, description="Filter by cart status, e.g. active, synced, completed"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all carts for a specific customer (logged-in user)"""
+    """Get carts for a specific customer (logged-in user), newest first and paginated"""
     try:
         # Validate customer exists
-        if not CartHelper.validate_user(db, customer_id):
+        if not await run_sync_helper(db, CartHelper.validate_user, customer_id):
             raise HTTPException(
                 status_code=404,
                 detail=f"User with ID {customer_id} not found or not verified"
             )
 
-        carts = CartHelper.get_carts_by_customer(db, customer_id)
+        carts = await run_sync_helper(db, CartHelper.get_carts_by_customer, customer_id, status=status, limit=limit, offset=offset)
+        total = await run_sync_helper(db, CartHelper.count_carts_by_customer, customer_id, status=status)
         return {
             "success": True,
             "customer_id": customer_id,
-            "carts": carts
+            "carts": carts,
+            "pagination": {
+                "total": total,
+                "limit": limit,
+                "offset": offset,
+                "has_more": offset + len(carts) < total
+            }
         }
     except HTTPException:
         raise
@@ -4,16 +4,34 @@ from sqlalchemy.orm import Session
 from database.database import get_db
 from helpers.cart_helper import CartHelper
 from helpers.merchant_helper import MerchantHelper
-from models.cart import Cart
+from services.clover_client import get_clover_client
+from services.fanout_executor import FanOutExecutor, raise_for_retryable
+from services.item_popularity_service import item_popularity_service
+from models.cart import Cart, CartItem
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
-import httpx
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+import asyncio
+import hashlib
 import os
-from datetime import datetime
+import uuid
+import weakref
+from collections import defaultdict
+from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/clover-cart", tags=["Clover Cart Integration"])
 
 CLOVER_BASE_URL = os.getenv("CLOVER_BASE_URL", "https://apisandbox.dev.clover.com")
+CLOVER_CART_PUSH_CONCURRENCY = int(os.getenv("CLOVER_CART_PUSH_CONCURRENCY", "8"))
+
+# Status codes meaning the bulk line item endpoint is not available for this merchant/app
+BULK_UNSUPPORTED_STATUS_CODES = {404, 405}
+
+# Bounded concurrent pushes when one call per line item/modifier is needed. POSTs run
+# with idempotent=False: retried on 429/connect errors only, never after a timeout or 5xx
+cart_push_executor = FanOutExecutor(max_concurrency=CLOVER_CART_PUSH_CONCURRENCY)
+
+# One checkout at a time per cart within this process
+_checkout_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
 
 
 class SyncCartRequest(BaseModel):
@@ -25,11 +43,212 @@ class CreateCloverOrderRequest(BaseModel):
     order_type: Optional[str] = "first_party_delivery"  # or "pickup", "delivery", etc.
 
 
-def _build_headers(access_token: str):
-    return {
+def _build_headers(access_token: str, idempotency_key: Optional[str] = None):
+    headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
     }
+    if idempotency_key:
+        headers["Idempotency-Key"] = idempotency_key
+    return headers
+
+
+def _ensure_idempotency_key(cart: Cart) -> str:
+    """Per-cart key reused by every retry of the checkout; derived keys are sent with each Clover POST"""
+    if not cart.clover_idempotency_key:
+        cart.clover_idempotency_key = uuid.uuid4().hex
+    return cart.clover_idempotency_key
+
+
+async def _post_to_clover(url: str, access_token: str, payload: Any, idempotency_key: str) -> Any:
+    client = get_clover_client()
+    response = await client.post(url, headers=_build_headers(access_token, idempotency_key), json=payload)
+    raise_for_retryable(response)
+    if response.status_code >= 400:
+        raise HTTPException(status_code=response.status_code, detail=f"Clover API error: {response.text}")
+    return response.json()
+
+
+def _line_item_payload(cart_item: CartItem) -> Dict[str, Any]:
+    return {
+        "item": {
+            "id": cart_item.clover_item_id
+        },
+        "unitQty": cart_item.quantity,
+        "note": cart_item.notes or ""
+    }
+
+
+def _order_note(cart: Cart) -> str:
+    return f"Order created from cart {cart.id}"
+
+
+async def _get_from_clover(cart: Cart, url: str, access_token: str, params: Dict[str, Any]) -> Any:
+    """GET through the cart executor (reads are safe to retry)"""
+    async def get():
+        client = get_clover_client()
+        response = await client.get(url, headers=_build_headers(access_token), params=params)
+        raise_for_retryable(response)
+        if response.status_code >= 400:
+            raise HTTPException(status_code=response.status_code, detail=f"Clover API error: {response.text}")
+        return response.json()
+
+    result = await cart_push_executor.call(cart.id, get)
+    if not result.success:
+        raise HTTPException(status_code=502, detail=f"Could not read Clover order state: {result.error}")
+    return result.value
+
+
+async def _find_cart_order(cart: Cart, access_token: str) -> Optional[Dict[str, Any]]:
+    """The Clover order an earlier, unconfirmed create for this cart may have made (matched by its note)"""
+    since = (cart.created_at or datetime.now()) - timedelta(days=1)
+    orders = await _get_from_clover(
+        cart,
+        f"{CLOVER_BASE_URL}/v3/merchants/{cart.clover_merchant_id}/orders",
+        access_token,
+        {"filter": f"createdTime>={int(since.timestamp() * 1000)}", "limit": 1000}
+    )
+    note = _order_note(cart)
+    return next((order for order in orders.get("elements", []) if order.get("note") == note), None)
+
+
+async def _fetch_order_line_items(cart: Cart, access_token: str) -> List[Dict[str, Any]]:
+    """Line items (with their modifications) currently on the cart's Clover order"""
+    line_items = await _get_from_clover(
+        cart,
+        f"{CLOVER_BASE_URL}/v3/merchants/{cart.clover_merchant_id}/orders/{cart.clover_order_id}/line_items",
+        access_token,
+        {"expand": "modifications", "limit": 1000}
+    )
+    return line_items.get("elements", [])
+
+
+def _match_line_items(cart: Cart, cart_items: List[CartItem], line_items: List[Dict[str, Any]],
+                      claimed: Iterable[str] = ()) -> Dict[int, str]:
+    """
+    Pair cart items with order lines not yet recorded against any cart item, by
+    Clover item id and note. Returns {cart_item_id: clover_line_item_id}.
+    """
+    taken = set(claimed) | {cart_item.clover_line_item_id for cart_item in cart.items if cart_item.clover_line_item_id}
+    available: Dict[Tuple[Any, str], List[str]] = defaultdict(list)
+    for line_item in line_items:
+        if line_item.get("id") and line_item["id"] not in taken:
+            available[((line_item.get("item") or {}).get("id"), line_item.get("note") or "")].append(line_item["id"])
+    matched = {}
+    for cart_item in cart_items:
+        candidates = available.get((cart_item.clover_item_id, cart_item.notes or ""))
+        if candidates:
+            matched[cart_item.id] = candidates.pop(0)
+    return matched
+
+
+def _match_modifications(cart: Cart, pending: List[Tuple[CartItem, Any]], line_items: List[Dict[str, Any]],
+                         claimed: Iterable[str] = ()) -> Dict[int, str]:
+    """Pair pending (cart_item, modifier) with unrecorded modifications on the same line. Returns {modifier_id: id}"""
+    taken = set(claimed) | {
+        modifier.clover_modification_id
+        for cart_item in cart.items for modifier in cart_item.modifiers if modifier.clover_modification_id
+    }
+    available: Dict[Tuple[Any, Any], List[str]] = defaultdict(list)
+    for line_item in line_items:
+        for modification in (line_item.get("modifications") or {}).get("elements", []):
+            if modification.get("id") and modification["id"] not in taken:
+                modifier_id = (modification.get("modifier") or {}).get("id")
+                available[(line_item.get("id"), modifier_id)].append(modification["id"])
+    matched = {}
+    for cart_item, modifier in pending:
+        candidates = available.get((cart_item.clover_line_item_id, modifier.clover_modifier_id))
+        if candidates:
+            matched[modifier.id] = candidates.pop(0)
+    return matched
+
+
+async def _reconcile_line_items(cart: Cart, access_token: str, cart_items: List[CartItem], error: str,
+                                claimed: Iterable[str] = ()) -> Tuple[Dict[int, str], List[str]]:
+    """
+    After a push whose outcome is unknown: keep the lines the order actually
+    has and report the rest, which the next sync pushes again.
+    """
+    try:
+        line_items = await _fetch_order_line_items(cart, access_token)
+    except HTTPException as e:
+        return {}, [f"{error}; {e.detail}"]
+    found = _match_line_items(cart, cart_items, line_items, claimed)
+    missing = [cart_item.id for cart_item in cart_items if cart_item.id not in found]
+    if missing:
+        return found, [f"{error}; no Clover line item found for cart items {missing}"]
+    return found, []
+
+
+async def _push_line_items(cart: Cart, access_token: str, cart_items: List[CartItem]) -> Tuple[Dict[int, str], List[str]]:
+    """
+    Create Clover line items for `cart_items`.
+    Uses the bulk_line_items endpoint (one round trip for the whole cart) and
+    falls back to bounded concurrent single POSTs when it is unavailable.
+    Returns ({cart_item_id: clover_line_item_id}, [errors]) so callers can keep
+    the lines that were created even if some failed.
+
+    POSTs are not retried after a timeout or 5xx, since Clover may already have
+    created the lines; the order's line items are read back and matched instead.
+    """
+    idempotency_key = _ensure_idempotency_key(cart)
+    order_url = f"{CLOVER_BASE_URL}/v3/merchants/{cart.clover_merchant_id}/orders/{cart.clover_order_id}"
+    batch_ids = ",".join(str(cart_item.id) for cart_item in cart_items)
+    bulk_key = f"{idempotency_key}:line_items:{hashlib.sha1(batch_ids.encode()).hexdigest()[:16]}"
+
+    async def post_bulk():
+        client = get_clover_client()
+        response = await client.post(
+            f"{order_url}/bulk_line_items",
+            headers=_build_headers(access_token, bulk_key),
+            json={"items": [_line_item_payload(cart_item) for cart_item in cart_items]}
+        )
+        if response.status_code in BULK_UNSUPPORTED_STATUS_CODES:
+            return None
+        raise_for_retryable(response)
+        if response.status_code >= 400:
+            raise HTTPException(status_code=response.status_code, detail=f"Clover API error: {response.text}")
+        return response.json()
+
+    bulk = await cart_push_executor.call(cart.id, post_bulk, idempotent=False)
+    if not bulk.success:
+        if bulk.ambiguous:
+            return await _reconcile_line_items(cart, access_token, cart_items, f"Failed to add line items: {bulk.error}")
+        return {}, [f"Failed to add line items: {bulk.error}"]
+
+    if bulk.value is not None:
+        line_items = bulk.value.get("elements", []) if isinstance(bulk.value, dict) else bulk.value
+        if len(line_items) != len(cart_items):
+            # The lines may exist even though the reply does not line up; the order is authoritative
+            return await _reconcile_line_items(
+                cart, access_token, cart_items, "Clover bulk line item response did not match the cart items"
+            )
+        return {cart_item.id: line_item.get("id") for cart_item, line_item in zip(cart_items, line_items)}, []
+
+    results = await cart_push_executor.run(
+        cart_items,
+        lambda cart_item: _post_to_clover(
+            f"{order_url}/line_items",
+            access_token,
+            _line_item_payload(cart_item),
+            f"{idempotency_key}:line_item:{cart_item.id}"
+        ),
+        key=lambda cart_item: cart_item.id,
+        idempotent=False
+    )
+    created = {result.key: result.value.get("id") for result in results if result.success}
+    errors = [
+        f"Failed to add line item for cart item {result.key}: {result.error}"
+        for result in results if not result.success and not result.ambiguous
+    ]
+    unconfirmed = [cart_item for cart_item, result in zip(cart_items, results) if result.ambiguous]
+    if unconfirmed:
+        found, unconfirmed_errors = await _reconcile_line_items(
+            cart, access_token, unconfirmed, "Line item push timed out or failed", claimed=created.values()
+        )
+        created.update(found)
+        errors.extend(unconfirmed_errors)
+    return created, errors
 
 
 @router.post("/sync-to-clover")
@@ -40,6 +259,7 @@ async def sync_cart_to_clover_order(
     """
     Step 1: Create empty Clover order from cart
     POST /v3/merchants/{mId}/orders
+    Returns the existing order if the cart was already synced.
     """
     try:
         # Get cart details
@@ -47,6 +267,14 @@ async def sync_cart_to_clover_order(
         if not cart:
             raise HTTPException(status_code=404, detail="Cart not found")
 
+        if cart.clover_order_id:
+            return {
+                "success": True,
+                "message": "Cart already synced to Clover order",
+                "cart_id": cart.id,
+                "clover_order_id": cart.clover_order_id
+            }
+
         if cart.status != "active":
             raise HTTPException(status_code=400, detail="Can only sync active carts")
 
@@ -55,38 +283,52 @@ async def sync_cart_to_clover_order(
         if not access_token:
             raise HTTPException(status_code=404, detail="Merchant token not found")
 
-        # Create empty order in Clover
-        clover_order_data = {
-            "orderType": {
-                "id": "FIRST_PARTY_DELIVERY"  # or other order types
-            },
-            "state": "OPEN",
-            "note": f"Order created from cart {cart.id}"
-        }
+        # A key already set means an earlier create ran and may have reached Clover
+        previous_attempt = cart.clover_idempotency_key is not None
+        # Persist the key before calling Clover so a retry sends the same one
+        idempotency_key = _ensure_idempotency_key(cart)
+        db.commit()
 
-        url = f"{CLOVER_BASE_URL}/v3/merchants/{cart.clover_merchant_id}/orders"
+        clover_order = await _find_cart_order(cart, access_token) if previous_attempt else None
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                headers=_build_headers(access_token),
-                json=clover_order_data
-            )
+        if clover_order is None:
+            # Create empty order in Clover
+            clover_order_data = {
+                "orderType": {
+                    "id": "FIRST_PARTY_DELIVERY"  # or other order types
+                },
+                "state": "OPEN",
+                "note": _order_note(cart)
+            }
 
-            if response.status_code >= 400:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Clover API error: {response.text}"
-                )
+            url = f"{CLOVER_BASE_URL}/v3/merchants/{cart.clover_merchant_id}/orders"
 
-            clover_order = response.json()
-            clover_order_id = clover_order.get("id")
+            # Not retried after a timeout/5xx: a second POST could open a duplicate order
+            result = await cart_push_executor.call(
+                cart.id,
+                lambda: _post_to_clover(url, access_token, clover_order_data, f"{idempotency_key}:order"),
+                idempotent=False
+            )
+            if result.success:
+                clover_order = result.value
+            elif result.ambiguous:
+                clover_order = await _find_cart_order(cart, access_token)
+            if clover_order is None:
+                detail = result.error
+                if result.ambiguous:
+                    detail = f"{detail}; order creation not confirmed, a retry checks Clover before creating another"
+                raise HTTPException(status_code=502, detail=detail)
+
+        clover_order_id = clover_order.get("id")
 
         # Update cart with Clover order ID
         cart.clover_order_id = clover_order_id
         cart.status = "synced"
         cart.synced_at = datetime.now()
+        # The cart is now an order: its items count towards suggestion popularity
+        popularity = item_popularity_service.record_order(db, cart)
         db.commit()
+        item_popularity_service.apply(popularity)
 
         return {
             "success": True,
@@ -96,6 +338,9 @@ async def sync_cart_to_clover_order(
             "clover_order": clover_order
         }
 
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to sync cart: {str(e)}")
@@ -108,7 +353,9 @@ async def sync_cart_items_to_clover(
 ):
     """
     Step 2: Add line items to Clover order
-    POST /v3/merchants/{mId}/orders/{orderId}/line_items
+    POST /v3/merchants/{mId}/orders/{orderId}/bulk_line_items
+    (falls back to concurrent POSTs to .../line_items)
+    Items that already have a Clover line item are not pushed again.
     """
     try:
         # Get cart with items
@@ -124,47 +371,44 @@ async def sync_cart_items_to_clover(
         if not access_token:
             raise HTTPException(status_code=404, detail="Merchant token not found")
 
-        synced_items = []
-
-        # Add each cart item as line item in Clover
-        for cart_item in cart.items:
-            line_item_data = {
-                "item": {
-                    "id": cart_item.clover_item_id
-                },
-                "unitQty": cart_item.quantity,
-                "note": cart_item.notes or ""
-            }
-
-            url = f"{CLOVER_BASE_URL}/v3/merchants/{cart.clover_merchant_id}/orders/{cart.clover_order_id}/line_items"
-
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    headers=_build_headers(access_token),
-                    json=line_item_data
-                )
-
-                if response.status_code >= 400:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Failed to add line item: {response.text}"
-                    )
-
-                clover_line_item = response.json()
-                clover_line_item_id = clover_line_item.get("id")
-
-                # Update cart item with Clover line item ID
-                cart_item.clover_line_item_id = clover_line_item_id
+        pending_items = [cart_item for cart_item in cart.items if not cart_item.clover_line_item_id]
+        errors = []
+        if pending_items and cart.clover_items_push_started_at is not None:
+            # An earlier sync did not confirm every line: adopt what it created before pushing the rest
+            existing = _match_line_items(cart, pending_items, await _fetch_order_line_items(cart, access_token))
+            for cart_item in pending_items:
+                if existing.get(cart_item.id):
+                    cart_item.clover_line_item_id = existing[cart_item.id]
+            pending_items = [cart_item for cart_item in pending_items if not cart_item.clover_line_item_id]
+
+        if pending_items:
+            # Persist the attempt before calling Clover so a retry knows to read the order back
+            cart.clover_items_push_started_at = datetime.now()
+            db.commit()
+
+            created, errors = await _push_line_items(cart, access_token, pending_items)
+
+            # Keep whatever was created so a retry only pushes the rest
+            for cart_item in pending_items:
+                if created.get(cart_item.id):
+                    cart_item.clover_line_item_id = created[cart_item.id]
+
+        if not errors:
+            cart.clover_items_push_started_at = None
+        db.commit()
 
-                synced_items.append({
-                    "cart_item_id": cart_item.id,
-                    "clover_line_item_id": clover_line_item_id,
-                    "name": cart_item.name,
-                    "quantity": cart_item.quantity
-                })
+        if errors:
+            raise HTTPException(status_code=502, detail="; ".join(errors))
 
-        db.commit()
+        synced_items = [
+            {
+                "cart_item_id": cart_item.id,
+                "clover_line_item_id": cart_item.clover_line_item_id,
+                "name": cart_item.name,
+                "quantity": cart_item.quantity
+            }
+            for cart_item in cart.items
+        ]
 
         return {
             "success": True,
@@ -174,6 +418,9 @@ async def sync_cart_items_to_clover(
             "synced_items": synced_items
         }
 
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to sync items: {str(e)}")
@@ -187,6 +434,8 @@ async def sync_cart_modifiers_to_clover(
     """
     Step 3: Add modifiers to line items in Clover order
     POST /v3/merchants/{mId}/orders/{orderId}/line_items/{lineItemId}/modifications
+    Clover has no bulk modification endpoint, so these run concurrently (bounded).
+    Modifiers that already have a Clover modification are not pushed again.
     """
     try:
         # Get cart with items and modifiers
@@ -202,48 +451,84 @@ async def sync_cart_modifiers_to_clover(
         if not access_token:
             raise HTTPException(status_code=404, detail="Merchant token not found")
 
-        synced_modifiers = []
-
-        # Add modifiers for each cart item
-        for cart_item in cart.items:
-            if not cart_item.clover_line_item_id:
-                continue  # Skip items not synced yet
-
-            for modifier in cart_item.modifiers:
-                modification_data = {
-                    "modifier": {
-                        "id": modifier.clover_modifier_id
-                    },
-                    "amount": int(modifier.price * 100)  # Convert to cents
-                }
-
-                url = (
-                    f"{CLOVER_BASE_URL}/v3/merchants/{cart.clover_merchant_id}/orders/"
-                    f"{cart.clover_order_id}/line_items/{cart_item.clover_line_item_id}/modifications"
-                )
-
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        url,
-                        headers=_build_headers(access_token),
-                        json=modification_data
-                    )
-
-                    if response.status_code >= 400:
-                        raise HTTPException(
-                            status_code=response.status_code,
-                            detail=f"Failed to add modifier: {response.text}"
-                        )
-
-                    clover_modification = response.json()
-
-                    synced_modifiers.append({
-                        "cart_item_id": cart_item.id,
-                        "modifier_id": modifier.id,
-                        "clover_modification_id": clover_modification.get("id"),
-                        "name": modifier.name,
-                        "price": modifier.price
-                    })
+        idempotency_key = _ensure_idempotency_key(cart)
+
+        # (cart_item, modifier) pairs still to push; items not synced yet are skipped
+        pending = [
+            (cart_item, modifier)
+            for cart_item in cart.items if cart_item.clover_line_item_id
+            for modifier in cart_item.modifiers if not modifier.clover_modification_id
+        ]
+
+        if pending and cart.clover_modifiers_push_started_at is not None:
+            # An earlier sync did not confirm every modification: adopt what it created
+            existing = _match_modifications(cart, pending, await _fetch_order_line_items(cart, access_token))
+            for cart_item, modifier in pending:
+                if existing.get(modifier.id):
+                    modifier.clover_modification_id = existing[modifier.id]
+            pending = [(cart_item, modifier) for cart_item, modifier in pending if not modifier.clover_modification_id]
+
+        if pending:
+            # Persist the attempt before calling Clover so a retry knows to read the order back
+            cart.clover_modifiers_push_started_at = datetime.now()
+        db.commit()
+
+        def push_modifier(pair):
+            cart_item, modifier = pair
+            url = (
+                f"{CLOVER_BASE_URL}/v3/merchants/{cart.clover_merchant_id}/orders/"
+                f"{cart.clover_order_id}/line_items/{cart_item.clover_line_item_id}/modifications"
+            )
+            modification_data = {
+                "modifier": {
+                    "id": modifier.clover_modifier_id
+                },
+                "amount": int(round(modifier.price * 100))  # Convert to cents
+            }
+            return _post_to_clover(url, access_token, modification_data, f"{idempotency_key}:modifier:{modifier.id}")
+
+        results = await cart_push_executor.run(pending, push_modifier, key=lambda pair: pair[1].id, idempotent=False)
+
+        errors = []
+        unconfirmed = []
+        for (cart_item, modifier), result in zip(pending, results):
+            if result.success:
+                modifier.clover_modification_id = result.value.get("id")
+            elif result.ambiguous:
+                unconfirmed.append((cart_item, modifier))
+            else:
+                errors.append(f"Failed to add modifier {modifier.id}: {result.error}")
+
+        if unconfirmed:
+            # Outcome unknown: read the order back rather than POST again
+            try:
+                found = _match_modifications(cart, unconfirmed, await _fetch_order_line_items(cart, access_token))
+            except HTTPException as e:
+                found = {}
+                errors.append(f"Could not confirm modifiers: {e.detail}")
+            for cart_item, modifier in unconfirmed:
+                if found.get(modifier.id):
+                    modifier.clover_modification_id = found[modifier.id]
+                else:
+                    errors.append(f"Failed to add modifier {modifier.id}: outcome unknown, no Clover modification found")
+        if not errors:
+            cart.clover_modifiers_push_started_at = None
+        db.commit()
+
+        if errors:
+            raise HTTPException(status_code=502, detail="; ".join(errors))
+
+        synced_modifiers = [
+            {
+                "cart_item_id": cart_item.id,
+                "modifier_id": modifier.id,
+                "clover_modification_id": modifier.clover_modification_id,
+                "name": modifier.name,
+                "price": modifier.price
+            }
+            for cart_item in cart.items if cart_item.clover_line_item_id
+            for modifier in cart_item.modifiers
+        ]
 
         return {
             "success": True,
@@ -253,7 +538,11 @@ async def sync_cart_modifiers_to_clover(
             "synced_modifiers": synced_modifiers
         }
 
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to sync modifiers: {str(e)}")
 
 
@@ -282,16 +571,16 @@ async def get_clover_order_status(
 
         url = f"{CLOVER_BASE_URL}/v3/merchants/{cart.clover_merchant_id}/orders/{cart.clover_order_id}"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=_build_headers(access_token))
+        client = get_clover_client()
+        response = await client.get(url, headers=_build_headers(access_token))
 
-            if response.status_code >= 400:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Clover API error: {response.text}"
-                )
+        if response.status_code >= 400:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Clover API error: {response.text}"
+            )
 
-            clover_order = response.json()
+        clover_order = response.json()
 
         return {
             "success": True,
@@ -311,31 +600,50 @@ async def complete_order_flow(
 ):
     """
     Complete workflow: Create order + Add items + Add modifiers
-    """
-    try:
-        # Step 1: Sync cart to Clover order
-        await sync_cart_to_clover_order(request, db)
-
-        # Step 2: Sync items
-        await sync_cart_items_to_clover(request, db)
-
-        # Step 3: Sync modifiers
-        await sync_cart_modifiers_to_clover(request, db)
-
-        # Get final cart status
-        cart = CartHelper.get_cart_by_id(db, request.cart_id)
-        cart.status = "completed"
-        db.commit()
-
-        return {
-            "success": True,
-            "message": "Order completed successfully",
-            "cart_id": cart.id,
-            "clover_order_id": cart.clover_order_id,
-            "status": "completed"
-        }
 
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to complete order: {str(e)}")
+    Safe to retry: each step skips what was already pushed to Clover, and
+    every Clover POST carries a key derived from the cart's idempotency key.
+    POSTs that time out or get a 5xx are not re-sent; the order and its line
+    items are read back from Clover and matched to the cart instead.
+    """
+    lock = _checkout_locks.get(request.cart_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _checkout_locks[request.cart_id] = lock
+
+    async with lock:
+        try:
+            cart = CartHelper.get_cart_by_id(db, request.cart_id)
+            if not cart:
+                raise HTTPException(status_code=404, detail="Cart not found")
+
+            if cart.status != "completed":
+                # Step 1: Sync cart to Clover order
+                await sync_cart_to_clover_order(request, db)
+
+                # Step 2: Sync items
+                await sync_cart_items_to_clover(request, db)
+
+                # Step 3: Sync modifiers
+                await sync_cart_modifiers_to_clover(request, db)
+
+                # Get final cart status
+                cart = CartHelper.get_cart_by_id(db, request.cart_id)
+                cart.status = "completed"
+                db.commit()
+
+            return {
+                "success": True,
+                "message": "Order completed successfully",
+                "cart_id": cart.id,
+                "clover_order_id": cart.clover_order_id,
+                "idempotency_key": cart.clover_idempotency_key,
+                "status": "completed"
+            }
 
+        except HTTPException:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"Failed to complete order: {str(e)}")
@@ -1,18 +1,43 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Body, Header
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
+import hmac
+import json
+import logging
 import httpx
-from database.database import get_db
+from database.database import get_db, get_async_db, run_sync_helper
 from helpers.merchant_helper import MerchantHelper
+from services.clover_client import get_clover_client
+from services.catalog_cache import catalog_cache
+from services.clover_api import CloverAPI
+from services.catalog_sync_service import catalog_sync_service
+from helpers.catalog_helper import CatalogHelper
 from typing import Optional,Dict, Any
 from models.merchant_detail import MerchantDetail
 from services.geocoding_service import geocoding_service
+from services.merchant_geo_index import merchant_geo_index
+from services.geocoding_queue import geocoding_queue, merchant_address_key
 from utils.response_formatter import success_response, error_response, not_found_response
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/clover/catalog", tags=["Clover Catalog"])
 
 CLOVER_BASE_URL = os.getenv("CLOVER_BASE_URL", "https://apisandbox.dev.clover.com")
 
+# "clover" reads through the catalog cache; "local" serves synced merchants from the catalog tables
+CATALOG_READ_SOURCE = os.getenv("CATALOG_READ_SOURCE", "clover")
+
+# Auth code shown in the Clover developer dashboard once the webhook URL is verified;
+# Clover sends it in the X-Clover-Auth header of every event
+CLOVER_WEBHOOK_AUTH_CODE = os.getenv("CLOVER_WEBHOOK_AUTH_CODE")
+
+# Expansions the local store can serve (see CatalogHelper.get_items_page)
+LOCAL_ITEM_EXPANDS = {"variants", "categories", "tags"}
+
 
 def _build_headers(access_token: str):
     return {
@@ -21,28 +46,80 @@ def _build_headers(access_token: str):
     }
 
 
+async def _fetch_catalog_page(merchant_id: str, access_token: str, resource: str, params: Dict[str, Any]):
+    """Fetch one page of a Clover catalog resource"""
+    url = f"{CLOVER_BASE_URL}/v3/merchants/{merchant_id}/{resource}"
+
+    client = get_clover_client()
+    r = await client.get(url, headers=_build_headers(access_token), params=params)
+    if r.status_code >= 400:
+        raise HTTPException(status_code=r.status_code, detail=r.text)
+    return r.json()
+
+
+def _use_local_store(db: Session, source: str, merchant_id: str, resource: str, expand: str = "") -> bool:
+    """Serve from the local catalog store only if it has been synced and holds the requested expansions"""
+    if source != "local":
+        return False
+    requested = {part.strip() for part in expand.split(",") if part.strip()}
+    if not requested.issubset(LOCAL_ITEM_EXPANDS):
+        return False
+    return CatalogHelper.has_synced(db, merchant_id, resource)
+
+
 @router.get("/items")
 async def list_items(
     merchant_id: str = Query(..., description="Clover merchant ID"),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
     expand: str = Query("", description="Optional expand params, e.g. categories,modifierGroups"),
-    db: Session = Depends(get_db),
+    source: str = Query(CATALOG_READ_SOURCE, pattern="^(clover|local)$", description="clover or local (synced catalog store)"),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    access_token = MerchantHelper.get_merchant_token(db, merchant_id)
+    access_token = await run_sync_helper(db, MerchantHelper.get_merchant_token, merchant_id)
     if not access_token:
         raise HTTPException(status_code=404, detail="Merchant token not found. Add the merchant first.")
 
-    url = f"{CLOVER_BASE_URL}/v3/merchants/{merchant_id}/items"
+    if await run_sync_helper(db, _use_local_store, source, merchant_id, "items", expand):
+        return await run_sync_helper(db, CatalogHelper.get_items_page, merchant_id, limit, offset, expand)
+
     params = {"limit": limit, "offset": offset}
     if expand:
         params["expand"] = expand
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, headers=_build_headers(access_token), params=params)
-        if r.status_code >= 400:
-            raise HTTPException(status_code=r.status_code, detail=r.text)
-        return r.json()
+    return await catalog_cache.get_or_fetch(
+        catalog_cache.make_key(merchant_id, "items", expand, limit, offset),
+        lambda: _fetch_catalog_page(merchant_id, access_token, "items", params),
+    )
+
+
+@router.get("/items/stream")
+async def stream_items(
+    merchant_id: str = Query(..., description="Clover merchant ID"),
+    expand: str = Query("", description="Optional expand params, e.g. categories,modifierGroups"),
+    page_size: int = Query(1000, ge=1, le=1000, description="Clover page size used while walking the catalog"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Stream the merchant's full item catalog as NDJSON (one item per line).
+    Pages are fetched from Clover as the client reads, so large menus are
+    never held in memory as a whole.
+    """
+    access_token = await run_sync_helper(db, MerchantHelper.get_merchant_token, merchant_id)
+    if not access_token:
+        raise HTTPException(status_code=404, detail="Merchant token not found. Add the merchant first.")
+
+    clover = CloverAPI(merchant_id, access_token)
+
+    async def ndjson_lines():
+        try:
+            async for item in clover.iter_items(expand=expand or None, page_size=page_size):
+                yield json.dumps(item) + "\n"
+        except HTTPException as e:
+            # Headers are already sent; report the failure in-band as the last line
+            yield json.dumps({"error": e.detail, "status_code": e.status_code}) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 
 @router.get("/categories")
@@ -50,20 +127,22 @@ async def list_categories(
     merchant_id: str = Query(..., description="Clover merchant ID"),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    source: str = Query(CATALOG_READ_SOURCE, pattern="^(clover|local)$", description="clover or local (synced catalog store)"),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    access_token = MerchantHelper.get_merchant_token(db, merchant_id)
+    access_token = await run_sync_helper(db, MerchantHelper.get_merchant_token, merchant_id)
     if not access_token:
         raise HTTPException(status_code=404, detail="Merchant token not found. Add the merchant first.")
 
-    url = f"{CLOVER_BASE_URL}/v3/merchants/{merchant_id}/categories"
+    if await run_sync_helper(db, _use_local_store, source, merchant_id, "categories"):
+        return await run_sync_helper(db, CatalogHelper.get_categories_page, merchant_id, limit, offset)
+
     params = {"limit": limit, "offset": offset}
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, headers=_build_headers(access_token), params=params)
-        if r.status_code >= 400:
-            raise HTTPException(status_code=r.status_code, detail=r.text)
-        return r.json()
+    return await catalog_cache.get_or_fetch(
+        catalog_cache.make_key(merchant_id, "categories", None, limit, offset),
+        lambda: _fetch_catalog_page(merchant_id, access_token, "categories", params),
+    )
 
 
 @router.get("/modifier-groups")
@@ -71,20 +150,22 @@ async def list_modifier_groups(
     merchant_id: str = Query(..., description="Clover merchant ID"),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    source: str = Query(CATALOG_READ_SOURCE, pattern="^(clover|local)$", description="clover or local (synced catalog store)"),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    access_token = MerchantHelper.get_merchant_token(db, merchant_id)
+    access_token = await run_sync_helper(db, MerchantHelper.get_merchant_token, merchant_id)
     if not access_token:
         raise HTTPException(status_code=404, detail="Merchant token not found. Add the merchant first.")
 
-    url = f"{CLOVER_BASE_URL}/v3/merchants/{merchant_id}/modifier_groups"
+    if await run_sync_helper(db, _use_local_store, source, merchant_id, "modifier_groups"):
+        return await run_sync_helper(db, CatalogHelper.get_modifier_groups_page, merchant_id, limit, offset)
+
     params = {"limit": limit, "offset": offset}
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, headers=_build_headers(access_token), params=params)
-        if r.status_code >= 400:
-            raise HTTPException(status_code=r.status_code, detail=r.text)
-        return r.json()
+    return await catalog_cache.get_or_fetch(
+        catalog_cache.make_key(merchant_id, "modifier_groups", None, limit, offset),
+        lambda: _fetch_catalog_page(merchant_id, access_token, "modifier_groups", params),
+    )
 
 
 
@@ -102,11 +183,11 @@ async def get_modifier_group(
 
     url = f"{CLOVER_BASE_URL}/v3/merchants/{merchant_id}/modifier_groups/{modifier_group_id}/modifiers"
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, headers=_build_headers(access_token))
-        if r.status_code >= 400:
-            raise HTTPException(status_code=r.status_code, detail=r.text)
-        return r.json()
+    client = get_clover_client()
+    r = await client.get(url, headers=_build_headers(access_token))
+    if r.status_code >= 400:
+        raise HTTPException(status_code=r.status_code, detail=r.text)
+    return r.json()
 
 
 # Merchant-focused endpoints
@@ -130,11 +211,11 @@ async def get_modifier(
         f"{modifier_group_id}/modifiers/{modifier_id}"
     )
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, headers=_build_headers(access_token))
-        if r.status_code >= 400:
-            raise HTTPException(status_code=r.status_code, detail=r.text)
-        return r.json()
+    client = get_clover_client()
+    r = await client.get(url, headers=_build_headers(access_token))
+    if r.status_code >= 400:
+        raise HTTPException(status_code=r.status_code, detail=r.text)
+    return r.json()
 
 
 @merchant_router.get("/details")
@@ -152,21 +233,21 @@ async def get_and_store_merchant_details(
         merchant_url = f"{CLOVER_BASE_URL}/v3/merchants/{merchant_id}"
         address_url = f"{CLOVER_BASE_URL}/v3/merchants/{merchant_id}/address"
 
-        async with httpx.AsyncClient() as client:
-            # Get main merchant data
-            merchant_response = await client.get(merchant_url, headers=_build_headers(access_token))
-            if merchant_response.status_code >= 400:
-                raise HTTPException(status_code=merchant_response.status_code, detail=merchant_response.text)
-            merchant_data = merchant_response.json()
+        client = get_clover_client()
+        # Get main merchant data
+        merchant_response = await client.get(merchant_url, headers=_build_headers(access_token))
+        if merchant_response.status_code >= 400:
+            raise HTTPException(status_code=merchant_response.status_code, detail=merchant_response.text)
+        merchant_data = merchant_response.json()
 
-            # Get address data
-            address_response = await client.get(address_url, headers=_build_headers(access_token))
-            if address_response.status_code >= 400:
-                raise HTTPException(status_code=address_response.status_code, detail=address_response.text)
-            address_data = address_response.json()
+        # Get address data
+        address_response = await client.get(address_url, headers=_build_headers(access_token))
+        if address_response.status_code >= 400:
+            raise HTTPException(status_code=address_response.status_code, detail=address_response.text)
+        address_data = address_response.json()
 
-            # Merge merchant and address data
-            merchant_data.update(address_data)
+        # Merge merchant and address data
+        merchant_data.update(address_data)
 
 
         # Check if merchant detail already exists
@@ -178,6 +259,8 @@ async def get_and_store_merchant_details(
         print("Address data:", address_data)  # Debug print
 
         if existing_merchant:
+            previous_address_key = merchant_address_key(existing_merchant)
+
             # Update existing record - extract individual fields safely
             existing_merchant.name = str(merchant_data.get("name", "")) if merchant_data.get("name") else None
             existing_merchant.email = str(merchant_data.get("email", "")) if merchant_data.get("email") else None
@@ -191,27 +274,16 @@ async def get_and_store_merchant_details(
             existing_merchant.country = str(address_data.get("country", "")) if address_data.get("country") else None
             existing_merchant.postal_code = str(address_data.get("zip", "")) if address_data.get("zip") else None
 
-            # Try to geocode the address to get coordinates
-            try:
-                coordinates = await geocoding_service.geocode_address(
-                    address=existing_merchant.address,
-                    city=existing_merchant.city,
-                    state=existing_merchant.state,
-                    country=existing_merchant.country,
-                    postal_code=existing_merchant.postal_code
-                )
-                if coordinates:
-                    lat, lon = coordinates
-                    existing_merchant.latitude = lat
-                    existing_merchant.longitude = lon
-                    print(f"✅ Coordinates geocoded for existing merchant: ({lat}, {lon})")
-                else:
-                    print("⚠️ Could not geocode address for existing merchant - coordinates not available")
-            except Exception as e:
-                print(f"⚠️ Geocoding failed for existing merchant: {str(e)} - continuing without coordinates")
+            # Cached coordinates are applied now; a cache miss is geocoded in the background
+            needs_geocoding = await run_in_threadpool(
+                geocoding_queue.prepare_merchant, db, existing_merchant, previous_address_key
+            )
 
             db.commit()
             db.refresh(existing_merchant)
+            merchant_geo_index.upsert(existing_merchant)
+            if needs_geocoding:
+                geocoding_queue.enqueue(existing_merchant.id)
 
             return success_response(
                 message="Merchant details updated successfully",
@@ -227,7 +299,8 @@ async def get_and_store_merchant_details(
                     "currency": existing_merchant.currency,
                     "timezone": existing_merchant.timezone,
                     "latitude": existing_merchant.latitude,
-                    "longitude": existing_merchant.longitude
+                    "longitude": existing_merchant.longitude,
+                    "geocoding_pending": needs_geocoding
                 }
             )
         else:
@@ -246,28 +319,15 @@ async def get_and_store_merchant_details(
                 postal_code=str(address_data.get("zip", "")) if address_data.get("zip") else None
             )
 
-            # Try to geocode the address to get coordinates
-            try:
-                coordinates = await geocoding_service.geocode_address(
-                    address=new_merchant.address,
-                    city=new_merchant.city,
-                    state=new_merchant.state,
-                    country=new_merchant.country,
-                    postal_code=new_merchant.postal_code
-                )
-                if coordinates:
-                    lat, lon = coordinates
-                    new_merchant.latitude = lat
-                    new_merchant.longitude = lon
-                    print(f"✅ Coordinates geocoded for new merchant: ({lat}, {lon})")
-                else:
-                    print("⚠️ Could not geocode address for new merchant - coordinates not available")
-            except Exception as e:
-                print(f"⚠️ Geocoding failed for new merchant: {str(e)} - continuing without coordinates")
+            # Cached coordinates are applied now; a cache miss is geocoded in the background
+            needs_geocoding = await run_in_threadpool(geocoding_queue.prepare_merchant, db, new_merchant)
 
             db.add(new_merchant)
             db.commit()
             db.refresh(new_merchant)
+            merchant_geo_index.upsert(new_merchant)
+            if needs_geocoding:
+                geocoding_queue.enqueue(new_merchant.id)
 
             return success_response(
                 message="Merchant details added successfully",
@@ -283,7 +343,8 @@ async def get_and_store_merchant_details(
                     "currency": new_merchant.currency,
                     "timezone": new_merchant.timezone,
                     "latitude": new_merchant.latitude,
-                    "longitude": new_merchant.longitude
+                    "longitude": new_merchant.longitude,
+                    "geocoding_pending": needs_geocoding
                 }
             )
 
@@ -352,11 +413,11 @@ async def get_merchant_address(
 
     url = f"{CLOVER_BASE_URL}/v3/merchants/{merchant_id}/address"
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, headers=_build_headers(access_token))
-        if r.status_code >= 400:
-            raise HTTPException(status_code=r.status_code, detail=r.text)
-        merchant_data = r.json()
+    client = get_clover_client()
+    r = await client.get(url, headers=_build_headers(access_token))
+    if r.status_code >= 400:
+        raise HTTPException(status_code=r.status_code, detail=r.text)
+    merchant_data = r.json()
     print(merchant_data)
     # Extract only address-related fields
     address_data = {
@@ -483,11 +544,11 @@ async def get_merchant_properties(
         raise HTTPException(status_code=404, detail="Merchant token not found. Add the merchant first.")
 
     url = f"{CLOVER_BASE_URL}/v3/merchants/{merchant_id}/properties"
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, headers=_build_headers(access_token))
-        if r.status_code >= 400:
-            raise HTTPException(status_code=r.status_code, detail=r.text)
-        return r.json()
+    client = get_clover_client()
+    r = await client.get(url, headers=_build_headers(access_token))
+    if r.status_code >= 400:
+        raise HTTPException(status_code=r.status_code, detail=r.text)
+    return r.json()
 
 
 @router.get("/item-stocks")
@@ -507,8 +568,110 @@ async def get_item_stocks(
     if item_id:
         params["itemId"] = item_id
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, headers=_build_headers(access_token), params=params)
-        if r.status_code >= 400:
-            raise HTTPException(status_code=r.status_code, detail=r.text)
-        return r.json()
+    client = get_clover_client()
+    r = await client.get(url, headers=_build_headers(access_token), params=params)
+    if r.status_code >= 400:
+        raise HTTPException(status_code=r.status_code, detail=r.text)
+    return r.json()
+
+
+# Clover webhook object ID prefixes mapped to the cached catalog resource they touch
+_WEBHOOK_RESOURCE_PREFIXES = {
+    "I": "items",
+    "IC": "categories",
+    "IG": "modifier_groups",
+    "IM": "modifier_groups",
+    "M": "merchant",
+}
+
+
+@router.get("/cache/stats")
+async def get_catalog_cache_stats():
+    """Hit/miss counters and memory usage of the catalog cache"""
+    return success_response(
+        message="Catalog cache stats retrieved successfully",
+        data=catalog_cache.stats()
+    )
+
+
+@router.post("/cache/invalidate")
+async def invalidate_catalog_cache(
+    merchant_id: Optional[str] = Query(None, description="Clover merchant ID; omit to clear every merchant"),
+    resource: Optional[str] = Query(None, description="items, categories, modifier_groups or merchant; omit for all"),
+):
+    """Explicitly drop cached catalog data, e.g. after editing the menu in Clover"""
+    removed = catalog_cache.invalidate(merchant_id, resource)
+    return success_response(
+        message="Catalog cache invalidated",
+        data={"merchant_id": merchant_id, "resource": resource, "removed_entries": removed}
+    )
+
+
+@router.post("/sync")
+async def sync_catalog(
+    merchant_id: Optional[str] = Query(None, description="Clover merchant ID; omit to sync every merchant"),
+    full: bool = Query(False, description="Walk the whole catalog and prune deleted rows instead of an incremental sync"),
+    db: Session = Depends(get_db),
+):
+    """
+    Pull the Clover catalog into the local catalog tables. Database work runs
+    in the threadpool, so other requests are served while a sync is running.
+    """
+    if merchant_id is None:
+        results = await catalog_sync_service.sync_all_merchants(db, full=full)
+        return success_response(message="Catalog sync completed", data={"merchants": results})
+
+    access_token = await run_in_threadpool(MerchantHelper.get_merchant_token, db, merchant_id)
+    if not access_token:
+        raise HTTPException(status_code=404, detail="Merchant token not found. Add the merchant first.")
+
+    results = await catalog_sync_service.sync_merchant(db, merchant_id, access_token, full=full)
+    return success_response(
+        message="Catalog sync completed",
+        data={"merchant_id": merchant_id, "full": full, "resources": results}
+    )
+
+
+@router.post("/cache/webhook")
+async def clover_catalog_webhook(
+    payload: Dict[str, Any] = Body(...),
+    x_clover_auth: Optional[str] = Header(None)
+):
+    """
+    Clover webhook receiver: invalidates cached catalog data for every
+    merchant/object type in the event payload. Events must carry the
+    CLOVER_WEBHOOK_AUTH_CODE in X-Clover-Auth.
+    """
+    # Clover sends a one-off, unauthenticated verification request when the webhook
+    # URL is registered; it changes nothing, the code is only logged for the dashboard
+    if "verificationCode" in payload:
+        logger.info(f"Clover webhook verification code: {payload['verificationCode']}")
+        return success_response(
+            message="Webhook verification received",
+            data={"verificationCode": payload["verificationCode"]}
+        )
+
+    if not CLOVER_WEBHOOK_AUTH_CODE:
+        logger.warning("Rejected Clover webhook event: CLOVER_WEBHOOK_AUTH_CODE is not configured")
+        raise HTTPException(status_code=401, detail="Webhook authentication is not configured")
+    if not x_clover_auth or not hmac.compare_digest(x_clover_auth.encode(), CLOVER_WEBHOOK_AUTH_CODE.encode()):
+        raise HTTPException(status_code=401, detail="Invalid webhook auth code")
+
+    removed = 0
+    for merchant_id, events in (payload.get("merchants") or {}).items():
+        resources = set()
+        for event in events or []:
+            object_prefix = str(event.get("objectId", "")).split(":", 1)[0]
+            resource = _WEBHOOK_RESOURCE_PREFIXES.get(object_prefix)
+            if resource:
+                resources.add(resource)
+        for resource in resources:
+            removed += catalog_cache.invalidate(merchant_id, resource)
+        if "categories" in resources:
+            # Items fetched with expand=categories embed the category names
+            removed += catalog_cache.invalidate(merchant_id, "items", expanded="categories")
+
+    return success_response(
+        message="Webhook processed",
+        data={"removed_entries": removed}
+    )
@@ -8,7 +8,7 @@ from models.language import (
     LanguageResponse,
     Language
 )
-from services.language_service import LanguageService
+from services.language_service import LanguageService, language_detector
 
 router = APIRouter()
 
@@ -40,7 +40,7 @@ async def select_language(
 
         elif request.input_type == "voice":
             # Voice input - use AI to detect languages
-            detected_languages = language_service.detect_languages_from_text(request.language_text)
+            detected_languages = await language_service.detect_languages_from_text(request.language_text)
             selected_language = language_service.get_primary_language(detected_languages)
 
         else:
@@ -120,6 +120,16 @@ async def get_session_language(
             detail=f"An error occurred: {str(e)}"
         )
 
+@router.get("/detection/stats")
+async def get_language_detection_stats():
+    """
+    How many language detections were answered by keyword, by the cache, or by Gemini
+    """
+    return {
+        "success": True,
+        "stats": language_detector.stats()
+    }
+
 @router.get("/available", response_model=List[LanguageResponse])
 async def get_available_languages(
     db: Session = Depends(get_db)
@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List, Dict, Any, Optional
 from database.database import get_db
 from helpers.merchant_helper import MerchantHelper
+from services.clover_client import get_clover_client
+from services.fanout_executor import clover_fanout, raise_for_retryable, FanOutResult
 from utils.response_formatter import success_response, error_response
 import httpx
 import os
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,56 +28,67 @@ def _build_headers(access_token: str):
     }
 
 
-async def _fetch_merchant_categories(merchant_id: str, access_token: str, limit: int = 100) -> Dict[str, Any]:
-    """Fetch categories for a single merchant from Clover API"""
-    try:
-        url = f"{CLOVER_BASE_URL}/v3/merchants/{merchant_id}/categories"
-        params = {"limit": limit}
-
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url,
-                headers=_build_headers(access_token),
-                params=params,
-                timeout=30.0
-            )
-
-            if response.status_code >= 400:
-                logger.warning(f"Failed to fetch categories for merchant {merchant_id}: {response.status_code} - {response.text}")
-                return {
-                    "merchant_id": merchant_id,
-                    "success": False,
-                    "error": f"API Error: {response.status_code}",
-                    "categories": []
-                }
-
-            data = response.json()
-            categories = data.get("elements", [])
+async def _request_merchant_categories(merchant_id: str, access_token: str, limit: int = 100) -> Dict[str, Any]:
+    """
+    Fetch categories for a single merchant from Clover API.
+    429/5xx responses raise RetryableError so the fan-out executor can back off and retry.
+    """
+    url = f"{CLOVER_BASE_URL}/v3/merchants/{merchant_id}/categories"
+    params = {"limit": limit}
 
-            return {
-                "merchant_id": merchant_id,
-                "success": True,
-                "categories": categories,
-                "total_categories": len(categories)
-            }
+    client = get_clover_client()
+    response = await client.get(url, headers=_build_headers(access_token), params=params)
+    raise_for_retryable(response)
 
-    except httpx.TimeoutException:
-        logger.error(f"Timeout fetching categories for merchant {merchant_id}")
+    if response.status_code >= 400:
+        logger.warning(f"Failed to fetch categories for merchant {merchant_id}: {response.status_code} - {response.text}")
         return {
             "merchant_id": merchant_id,
             "success": False,
-            "error": "Request timeout",
-            "categories": []
-        }
-    except Exception as e:
-        logger.error(f"Error fetching categories for merchant {merchant_id}: {str(e)}")
-        return {
-            "merchant_id": merchant_id,
-            "success": False,
-            "error": str(e),
+            "error": f"API Error: {response.status_code}",
             "categories": []
         }
 
+    data = response.json()
+    categories = data.get("elements", [])
+
+    return {
+        "merchant_id": merchant_id,
+        "success": True,
+        "categories": categories,
+        "total_categories": len(categories)
+    }
+
+
+def _unwrap_result(merchant_id: str, result: FanOutResult) -> Dict[str, Any]:
+    """Flatten a fan-out result into the per-merchant dict returned by _request_merchant_categories"""
+    if result.success:
+        return result.value
+    logger.error(f"Error fetching categories for merchant {merchant_id}: {result.error}")
+    return {
+        "merchant_id": merchant_id,
+        "success": False,
+        "error": result.error,
+        "categories": []
+    }
+
+
+async def _fetch_merchant_categories(merchant_id: str, access_token: str, limit: int = 100) -> Dict[str, Any]:
+    """Fetch categories for a single merchant with rate limiting and retries"""
+    result = await clover_fanout.call(
+        merchant_id, lambda: _request_merchant_categories(merchant_id, access_token, limit)
+    )
+    return _unwrap_result(merchant_id, result)
+
+
+def _get_merchants_with_tokens(db: Session):
+    return db.execute(text("""
+        SELECT m.clover_merchant_id, m.name, mt.token
+        FROM merchants m
+        JOIN merchant_tokens mt ON m.id = mt.merchant_id
+        WHERE mt.token IS NOT NULL
+    """)).fetchall()
+
 
 @router.get("/categories/all")
 async def get_all_merchant_categories(
@@ -94,14 +109,7 @@ async def get_all_merchant_categories(
     """
     try:
         # Get all merchants with their tokens
-        merchants_query = db.execute(text("""
-            SELECT m.clover_merchant_id, m.name, mt.token
-            FROM merchants m
-            JOIN merchant_tokens mt ON m.id = mt.merchant_id
-            WHERE mt.token IS NOT NULL
-        """))
-
-        merchants = merchants_query.fetchall()
+        merchants = _get_merchants_with_tokens(db)
 
         if not merchants:
             return success_response(
@@ -114,17 +122,16 @@ async def get_all_merchant_categories(
                 }
             )
 
-        # Fetch categories from all merchants concurrently
-        import asyncio
-
-        tasks = []
-        for merchant in merchants:
-            clover_merchant_id, name, token = merchant
-            task = _fetch_merchant_categories(clover_merchant_id, token, limit)
-            tasks.append(task)
-
-        # Execute all requests concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Fetch categories with a concurrency cap, per-app rate limit and retries
+        fanout_results = await clover_fanout.run(
+            merchants,
+            lambda merchant: _request_merchant_categories(merchant[0], merchant[2], limit),
+            key=lambda merchant: merchant[0]
+        )
+        results = [
+            _unwrap_result(merchant[0], fanout_result)
+            for merchant, fanout_result in zip(merchants, fanout_results)
+        ]
 
         # Process results
         all_categories = []
@@ -136,36 +143,24 @@ async def get_all_merchant_categories(
             merchant = merchants[i]
             clover_merchant_id, name, token = merchant
 
-            if isinstance(result, Exception):
-                # Handle exceptions from asyncio.gather
-                merchant_result = {
-                    "merchant_id": clover_merchant_id,
-                    "merchant_name": name,
-                    "success": False,
-                    "error": str(result),
-                    "categories": []
-                }
-                failed_merchants += 1
-            else:
-                # Process successful result
-                merchant_result = {
-                    "merchant_id": clover_merchant_id,
-                    "merchant_name": name,
-                    "success": result["success"],
-                    "categories": result["categories"],
-                    "total_categories": result["total_categories"]
-                }
+            merchant_result = {
+                "merchant_id": clover_merchant_id,
+                "merchant_name": name,
+                "success": result["success"],
+                "categories": result["categories"],
+                "total_categories": result.get("total_categories", 0)
+            }
 
-                if result["success"]:
-                    successful_merchants += 1
-                    # Add merchant info to each category
-                    for category in result["categories"]:
-                        category["merchant_id"] = clover_merchant_id
-                        category["merchant_name"] = name
-                        all_categories.append(category)
-                else:
-                    failed_merchants += 1
-                    merchant_result["error"] = result.get("error", "Unknown error")
+            if result["success"]:
+                successful_merchants += 1
+                # Add merchant info to each category
+                for category in result["categories"]:
+                    category["merchant_id"] = clover_merchant_id
+                    category["merchant_name"] = name
+                    all_categories.append(category)
+            else:
+                failed_merchants += 1
+                merchant_result["error"] = result.get("error", "Unknown error")
 
             # Include failed merchants if requested
             if include_failed or merchant_result["success"]:
@@ -202,6 +197,49 @@ async def get_all_merchant_categories(
         )
 
 
+@router.get("/categories/stream")
+async def stream_all_merchant_categories(
+    db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=1000, description="Limit categories per merchant"),
+    include_failed: bool = Query(False, description="Include merchants that failed to fetch categories")
+):
+    """
+    Stream categories from all merchants as NDJSON, one line per merchant as
+    soon as its fetch completes, followed by a summary line. Slow or throttled
+    merchants no longer hold back the rest of the results.
+    """
+    merchants = _get_merchants_with_tokens(db)
+    names = {clover_merchant_id: name for clover_merchant_id, name, _ in merchants}
+
+    async def ndjson_lines():
+        successful_merchants = 0
+        failed_merchants = 0
+        async for fanout_result in clover_fanout.stream(
+            merchants,
+            lambda merchant: _request_merchant_categories(merchant[0], merchant[2], limit),
+            key=lambda merchant: merchant[0]
+        ):
+            result = _unwrap_result(fanout_result.key, fanout_result)
+            result["merchant_name"] = names.get(fanout_result.key)
+            if result["success"]:
+                successful_merchants += 1
+            else:
+                failed_merchants += 1
+                if not include_failed:
+                    continue
+            yield json.dumps(result) + "\n"
+
+        yield json.dumps({
+            "summary": {
+                "total_merchants": len(merchants),
+                "successful_merchants": successful_merchants,
+                "failed_merchants": failed_merchants
+            }
+        }) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
 @router.get("/{merchant_id}/categories")
 async def get_merchant_categories(
     merchant_id: str,
@@ -4,6 +4,7 @@ from typing import List, Optional
 from database.database import get_db
 from models.merchant_detail import MerchantDetail
 from utils.response_formatter import success_response, error_response, not_found_response
+from services.merchant_geo_index import merchant_geo_index
 import logging
 
 logger = logging.getLogger(__name__)
@@ -89,6 +90,57 @@ async def get_all_merchants(
         )
 
 
+@router.get("/nearby")
+def get_nearby_merchants(
+    latitude: float = Query(..., ge=-90, le=90, description="Latitude of the search point"),
+    longitude: float = Query(..., ge=-180, le=180, description="Longitude of the search point"),
+    radius_km: Optional[float] = Query(None, gt=0, description="Only merchants within this distance (km)"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of merchants (k nearest)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Retrieve the merchants closest to a point, nearest first
+
+    Served from the in-memory merchant spatial index; merchants without
+    coordinates are not included. A plain def, so FastAPI runs it in the
+    threadpool: the periodic index reload (a full merchant_detail scan and
+    tree build) never blocks the event loop.
+
+    Args:
+        latitude: Latitude of the search point
+        longitude: Longitude of the search point
+        radius_km: Optional search radius in kilometres
+        limit: Maximum number of merchants to return
+        db: Database session (used only to load the index)
+
+    Returns:
+        Merchants with their distance_km, sorted by distance
+    """
+    try:
+        merchant_geo_index.ensure_loaded(db)
+        merchants = merchant_geo_index.nearest(latitude, longitude, limit=limit, radius_km=radius_km)
+
+        return success_response(
+            message="Nearby merchants retrieved successfully",
+            data={
+                "merchants": merchants,
+                "returned_count": len(merchants),
+                "latitude": latitude,
+                "longitude": longitude,
+                "radius_km": radius_km,
+                "limit": limit
+            }
+        )
+
+    except Exception as e:
+        logger.error(f"Error retrieving nearby merchants: {str(e)}")
+        return error_response(
+            message="Failed to retrieve nearby merchants",
+            data={"error": str(e)},
+            status_code=500
+        )
+
+
 @router.get("/{merchant_id}")
 async def get_merchant_by_id(
     merchant_id: int,
@@ -1,15 +1,20 @@
 # app/routes/merchants.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from utils.json_response import FastJSONResponse
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 import os
+import asyncio
 import httpx
 from dotenv import load_dotenv
 
 from services.clover_api import get_clover_items, get_clover_categories
+from services.clover_client import get_clover_client
+from database.database import get_db
+from helpers.catalog_helper import CatalogHelper, _elements
 # from schemas.category import Category, Variation as SchemaVariation, CloverItem # Assuming schemas/category.py exists
-from app.schemas.category import Category, Variation as SchemaVariation, CloverItem
+from app.schemas.category import Category
 
 load_dotenv()
 
@@ -18,6 +23,7 @@ router = APIRouter()
 CLOVER_BASE_URL = os.getenv("CLOVER_BASE_URL", "https://apisandbox.dev.clover.com")
 CLOVER_ACCESS_TOKEN = os.getenv("CLOVER_ACCESS_TOKEN")
 CLOVER_MERCHANT_ID = os.getenv("CLOVER_MERCHANT_ID")
+CATALOG_READ_SOURCE = os.getenv("CATALOG_READ_SOURCE", "clover")
 
 
 # --- Schemas for Item Fetching ---
@@ -111,106 +117,118 @@ async def list_all_merchants():
         "Content-Type": "application/json"
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            merchant_data = response.json()
+    client = get_clover_client()
+    try:
+        response = await client.get(url, headers=headers)
+        response.raise_for_status()
+        merchant_data = response.json()
 
-            merchant_info = MerchantInfo(
-                clover_merchant_id=merchant_data.get("id"),
-                name=merchant_data.get("name")
-            )
+        merchant_info = MerchantInfo(
+            clover_merchant_id=merchant_data.get("id"),
+            name=merchant_data.get("name")
+        )
 
-            return [merchant_info]
+        return [merchant_info]
+
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 401:
+            raise HTTPException(status_code=401, detail="Unauthorized: Please check your CLOVER_ACCESS_TOKEN.")
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Clover API error: {e.response.text}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+def build_category_payload(clover_categories_data: dict, clover_items_data: dict) -> List[dict]:
+    """
+    Group Clover items into categories in a single pass over the items.
+
+    Each item's variations are built once and appended to every category it
+    belongs to via an id -> list index. Items with no categories go to an
+    "Uncategorized" bucket; items whose categories are all unknown are skipped.
+    Prices are converted from cents to dollars.
+    """
+    categories = []
+    variations_by_category = {}
+    for cat in clover_categories_data.get('elements', []):
+        variations = []
+        variations_by_category[cat['id']] = variations
+        categories.append({"id": cat['id'], "name": cat['name'], "variations": variations})
+
+    uncategorized = []
+
+    for item in clover_items_data.get('elements', []):
+        item_name = item.get('name')
+        variants = _elements(item.get('variants'))
+        if variants:
+            item_variations = [
+                {
+                    "id": variant['id'],
+                    "name": f"{item_name} ({variant.get('name')})",
+                    "price": (variant.get('price') or 0) / 100.0,
+                }
+                for variant in variants
+            ]
+        else:
+            item_variations = [{"id": item['id'], "name": item_name, "price": (item.get('price') or 0) / 100.0}]
+
+        category_refs = _elements(item.get('categories'))
+        if not category_refs:
+            uncategorized.extend(item_variations)
+            continue
+
+        for category_ref in category_refs:
+            target = variations_by_category.get(category_ref.get('id'))
+            if target is not None:
+                target.extend(item_variations)
+
+    if uncategorized:
+        categories.append({"id": "uncategorized", "name": "Uncategorized", "variations": uncategorized})
+
+    return categories
 
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                raise HTTPException(status_code=401, detail="Unauthorized: Please check your CLOVER_ACCESS_TOKEN.")
-            raise HTTPException(
-                status_code=e.response.status_code,
-                detail=f"Clover API error: {e.response.text}"
-            )
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"An unexpected error occurred: {str(e)}"
-            )
 
 # Endpoint to get categories and variations from Clover
 @router.get("/merchants/{merchant_id}/categories", response_model=List[Category])
 async def get_merchant_categories_from_clover(
-    merchant_id: str # The Clover Merchant ID from the URL
+    merchant_id: str, # The Clover Merchant ID from the URL
+    source: str = Query(CATALOG_READ_SOURCE, pattern="^(clover|local)$", description="clover or local (synced catalog store)"),
+    db: Session = Depends(get_db)
 ):
     """
-    Retrieves all categories and their variations for a specific merchant
-    by fetching data directly from the Clover API.
+    Retrieves all categories and their variations for a specific merchant,
+    either directly from the Clover API or from the synced local catalog store.
     """
-    if not CLOVER_ACCESS_TOKEN:
+    use_local = (
+        source == "local"
+        and CatalogHelper.has_synced(db, merchant_id, "categories")
+        and CatalogHelper.has_synced(db, merchant_id, "items")
+    )
+    if not use_local and not CLOVER_ACCESS_TOKEN:
         raise HTTPException(status_code=500, detail="Clover access token not configured.")
 
     try:
-        # Call the Clover API with the correct Clover Merchant ID.
-        clover_categories_data = await get_clover_categories(merchant_id, CLOVER_ACCESS_TOKEN)
-        clover_items_data = await get_clover_items(merchant_id, CLOVER_ACCESS_TOKEN)
+        if use_local:
+            # Same Clover-shaped payloads, read from the catalog tables
+            clover_categories_data = CatalogHelper.get_categories_page(db, merchant_id)
+            clover_items_data = CatalogHelper.get_items_page(db, merchant_id, expand="variants,categories")
+        else:
+            # Call the Clover API with the correct Clover Merchant ID; both fetches run concurrently.
+            clover_categories_data, clover_items_data = await asyncio.gather(
+                get_clover_categories(merchant_id, CLOVER_ACCESS_TOKEN),
+                get_clover_items(merchant_id, CLOVER_ACCESS_TOKEN),
+            )
 
-        # Process the data
-        categories_map = {
-            cat['id']: Category(id=cat['id'], name=cat['name'], variations=[])
-            for cat in clover_categories_data.get('elements', [])
-        }
-        
-        # Create a default category for uncategorized items
-        uncategorized = Category(id="uncategorized", name="Uncategorized", variations=[])
-        
-        for item_data in clover_items_data.get('elements', []):
-            item = CloverItem(**item_data)
-            
-            # Check if the item has categories
-            if item.categories and item.categories.get('elements'):
-                for category_ref in item.categories['elements']:
-                    category_id = category_ref['id']
-                    if category_id in categories_map:
-                        if item.variants:
-                            for variant_data in item.variants:
-                                variation = SchemaVariation(
-                                    id=variant_data.id,
-                                    name=f"{item.name} ({variant_data.name})",
-                                    price=variant_data.price / 100.0
-                                )
-                                categories_map[category_id].variations.append(variation)
-                        else:
-                            variation = SchemaVariation(
-                                id=item.id,
-                                name=item.name,
-                                price=item.price / 100.0
-                            )
-                            categories_map[category_id].variations.append(variation)
-            else:
-                # If the item has no categories, add it to the "Uncategorized" list
-                if item.variants:
-                    for variant_data in item.variants:
-                        variation = SchemaVariation(
-                            id=variant_data.id,
-                            name=f"{item.name} ({variant_data.name})",
-                            price=variant_data.price / 100.0
-                        )
-                        uncategorized.variations.append(variation)
-                else:
-                    variation = SchemaVariation(
-                        id=item.id,
-                        name=item.name,
-                        price=item.price / 100.0
-                    )
-                    uncategorized.variations.append(variation)
-
-        # Combine the categorized and uncategorized items
-        final_categories = list(categories_map.values())
-        if uncategorized.variations:
-            final_categories.append(uncategorized)
-            
-        return final_categories
-        
+        # Plain dicts matching List[Category]; returned as a Response so FastAPI
+        # skips re-validating thousands of variations against response_model.
+        return FastJSONResponse(content=build_category_payload(clover_categories_data, clover_items_data))
+
+    except HTTPException:
+        raise
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 401:
             raise HTTPException(status_code=401, detail="Unauthorized: Please check your CLOVER_ACCESS_TOKEN.")
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
 from database.database import get_db
 from models.question_model import QuestionMaster, QuestionTranslation
+from services.question_flow import question_flow
 
 router = APIRouter(prefix="/api/v1/questions", tags=["question-master"])
 
@@ -87,6 +89,7 @@ async def create_question(
         db.add(question)
         db.commit()
         db.refresh(question)
+        question_flow.publish(db)
 
         return QuestionResponse(
             id=question.id,
@@ -175,6 +178,7 @@ async def update_question(
 
         db.commit()
         db.refresh(question)
+        question_flow.publish(db)
 
         return QuestionResponse(
             id=question.id,
@@ -204,6 +208,7 @@ async def delete_question(question_id: int, db: Session = Depends(get_db)):
         # Soft delete
         question.is_active = False
         db.commit()
+        question_flow.publish(db)
 
         return {"success": True, "message": f"Question '{question.question_key}' deactivated successfully"}
 
@@ -254,6 +259,7 @@ async def add_translation(
         db.add(translation)
         db.commit()
         db.refresh(translation)
+        question_flow.publish(db)
 
         return TranslationResponse(
             id=translation.id,
@@ -337,6 +343,7 @@ async def update_translation(
 
         db.commit()
         db.refresh(translation)
+        question_flow.publish(db)
 
         return TranslationResponse(
             id=translation.id,
@@ -364,6 +371,7 @@ async def delete_translation(translation_id: int, db: Session = Depends(get_db))
     try:
         db.delete(translation)
         db.commit()
+        question_flow.publish(db)
 
         return {"success": True, "message": "Translation deleted successfully"}
 
@@ -424,7 +432,14 @@ async def get_localized_questions(
     db: Session = Depends(get_db)
 ):
     """Get questions in specified language (English from master, others from translations)"""
-    query = db.query(QuestionMaster)
+    # One query: translations for `language` are outer-joined instead of fetched per question
+    query = db.query(QuestionMaster, QuestionTranslation).outerjoin(
+        QuestionTranslation,
+        and_(
+            QuestionTranslation.question_key == QuestionMaster.question_key,
+            QuestionTranslation.language == language
+        )
+    )
 
     if type:
         query = query.filter(QuestionMaster.type == type)
@@ -432,10 +447,10 @@ async def get_localized_questions(
     if active_only:
         query = query.filter(QuestionMaster.is_active == True)
 
-    questions = query.order_by(QuestionMaster.question_order).all()
+    rows = query.order_by(QuestionMaster.question_order).all()
 
     result = []
-    for question in questions:
+    for question, translation in rows:
         if language == "en":
             # Return English from master table
             result.append({
@@ -446,37 +461,55 @@ async def get_localized_questions(
                 "language": "en",
                 "variant": None
             })
+        elif translation:
+            result.append({
+                "question_key": question.question_key,
+                "question_text": translation.translated_text,
+                "question_order": question.question_order,
+                "type": question.type,
+                "language": language,
+                "variant": translation.variant
+            })
         else:
-            # Look for translation
-            translation = db.query(QuestionTranslation).filter(
-                QuestionTranslation.question_key == question.question_key,
-                QuestionTranslation.language == language
-            ).first()
-
-            if translation:
-                result.append({
-                    "question_key": question.question_key,
-                    "question_text": translation.translated_text,
-                    "question_order": question.question_order,
-                    "type": question.type,
-                    "language": language,
-                    "variant": translation.variant
-                })
-            else:
-                # Fallback to English if translation not found
-                result.append({
-                    "question_key": question.question_key,
-                    "question_text": question.question_text,
-                    "question_order": question.question_order,
-                    "type": question.type,
-                    "language": "en",
-                    "variant": None,
-                    "note": f"Translation not available for {language}, showing English"
-                })
+            # Fallback to English if translation not found
+            result.append({
+                "question_key": question.question_key,
+                "question_text": question.question_text,
+                "question_order": question.question_order,
+                "type": question.type,
+                "language": "en",
+                "variant": None,
+                "note": f"Translation not available for {language}, showing English"
+            })
 
     return result
 
 
+@router.get("/bundle/{language}")
+async def get_question_bundle(
+    language: str,
+    request: Request,
+    type: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Whole wizard for one language: active questions with their active answers,
+    translated where a translation exists. Served from the question flow
+    snapshot and pre-rendered once per version, with a content ETag; send it
+    back as If-None-Match to get 304 Not Modified while nothing has changed.
+    """
+    bundle = question_flow.bundle(db, language, type)
+    headers = {"ETag": bundle.etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or bundle.etag in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=bundle.body, media_type="application/json", headers=headers)
+
+
 @router.get("/languages/available")
 async def get_available_languages(db: Session = Depends(get_db)):
     """Get all available languages"""
@@ -542,6 +575,8 @@ async def create_default_questions(db: Session = Depends(get_db)):
                 created_questions.append(q_data["question_key"])
 
         db.commit()
+        if created_questions:
+            question_flow.publish(db)
         return {
             "success": True,
             "message": f"Created {len(created_questions)} default questions",
@@ -553,6 +588,30 @@ async def create_default_questions(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to create default questions: {str(e)}")
 
 
+@router.post("/answer-index/invalidate")
+async def invalidate_answer_index(db: Session = Depends(get_db)):
+    """
+    Publish a new question flow version so every worker rebuilds its snapshot
+    and answer indexes. Call after changing question_masters, answer_masters or
+    their translations directly in the DB.
+    """
+    snapshot = question_flow.publish(db)
+    return {
+        "success": True,
+        "message": "Question flow snapshot rebuilt",
+        "version": snapshot.version
+    }
+
+
+@router.get("/flow/stats")
+async def get_question_flow_stats():
+    """Version, size and rebuild counters of this worker's question flow snapshot"""
+    return {
+        "success": True,
+        "data": question_flow.stats()
+    }
+
+
 @router.post("/translations/bulk-add")
 async def bulk_add_translations(
     translations: List[TranslationCreate],
@@ -606,6 +665,8 @@ async def bulk_add_translations(
             })
 
         db.commit()
+        if added_translations:
+            question_flow.publish(db)
         return {
             "success": True,
             "message": f"Added {len(added_translations)} translations, skipped {len(skipped_translations)}",
@@ -1,13 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
-from database.database import get_db
+from database.database import get_db, get_async_db, run_sync_helper
 from app.schemas.conversation import (
     SelectAnswerRequest,
     ConversationEntryResponse,
     QuestionResponse
 )
 from services.conversation_service import ConversationService
+from services.classification_cache import classification_cache
+from services.answer_matcher import answer_matcher
+from utils.response_formatter import success_response
 from helpers.validators import get_question_with_answers
 
 router = APIRouter()
@@ -22,7 +27,9 @@ async def submit_select_answer(
     """
 
     try:
-        result = ConversationService.process_select_answer(
+        # Includes blocking Gemini calls, so it runs in the threadpool on the sync session
+        result = await run_in_threadpool(
+            ConversationService.process_select_answer,
             db=db,
             session_id=request.session_id,
             user_id=request.user_id,
@@ -32,7 +39,7 @@ async def submit_select_answer(
         )
 
         # Add language information to the response
-        user_language = ConversationService.get_user_language(db, request.session_id)
+        user_language = await run_in_threadpool(ConversationService.get_user_language, db, request.session_id)
 
         # Convert result to dict if it's a Pydantic model
         if hasattr(result, 'dict'):
@@ -76,13 +83,14 @@ async def get_question_details(
 async def get_next_question(
     session_id: str,
     current_question_key: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get the next question in the wizard flow
     """
-    next_question = ConversationService.get_next_question(
-        db=db,
+    next_question = await run_sync_helper(
+        db,
+        ConversationService.get_next_question_response,
         session_id=session_id,
         current_question_key=current_question_key
     )
@@ -93,4 +101,20 @@ async def get_next_question(
             "completed": True
         }
 
-    return QuestionResponse.from_orm(next_question)
+    return next_question
+
+@router.get("/classification-cache/stats")
+async def get_classification_cache_stats():
+    """Hit/miss counters of the Gemini/OpenAI answer-classification cache"""
+    return success_response(
+        message="Classification cache stats retrieved successfully",
+        data=classification_cache.stats()
+    )
+
+@router.get("/answer-matcher/stats")
+async def get_answer_matcher_stats():
+    """Per-tier hit rates of the local answer matcher (exact, alias, fuzzy) vs LLM fallbacks"""
+    return success_response(
+        message="Answer matcher stats retrieved successfully",
+        data=answer_matcher.stats()
+    )
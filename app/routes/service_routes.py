@@ -9,7 +9,7 @@ from models.service import (
     Service,
     UserService
 )
-from services.service_selection_service import ServiceSelectionService
+from services.service_selection_service import ServiceSelectionService, service_detector
 
 router = APIRouter()
 
@@ -44,7 +44,7 @@ async def select_service(
 
         elif request.input_type == "voice":
             # Voice input - use AI to detect services
-            detected_services = service_selection_service.detect_services_from_text(request.service_text)
+            detected_services = await service_selection_service.detect_services_from_text(request.service_text)
             selected_service = service_selection_service.get_primary_service(detected_services)
 
         else:
@@ -124,6 +124,16 @@ async def get_user_services(
             detail=f"An error occurred: {str(e)}"
         )
 
+@router.get("/detection/stats")
+async def get_service_detection_stats():
+    """
+    How many service detections were answered by keyword, by the cache, or by Gemini
+    """
+    return {
+        "success": True,
+        "stats": service_detector.stats()
+    }
+
 @router.get("/available", response_model=List[ServiceResponse])
 async def get_available_services(
     db: Session = Depends(get_db)
@@ -198,7 +208,7 @@ async def detect_services(
     """
     try:
         service_selection_service = ServiceSelectionService()
-        detected_services = service_selection_service.detect_services_from_text(text)
+        detected_services = await service_selection_service.detect_services_from_text(text)
         primary_service = service_selection_service.get_primary_service(detected_services)
 
         return {
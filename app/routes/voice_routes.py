@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from typing import Optional, Dict, Any
-from database.database import get_db
+from database.database import get_db, get_async_db, run_sync_helper
 from app.schemas.conversation import (
     VoiceAnswerRequest,
     QuestionResponse
@@ -21,7 +23,9 @@ async def submit_voice_answer(
     The voice_text should be the transcribed text from user's voice input
     """
     try:
-        result = ConversationService.process_voice_answer(
+        # Includes blocking Gemini calls, so it runs in the threadpool on the sync session
+        result = await run_in_threadpool(
+            ConversationService.process_voice_answer,
             db=db,
             session_id=request.session_id,
             user_id=request.user_id,
@@ -70,8 +74,12 @@ async def match_voice_to_answer(
     """
     Test endpoint to check voice matching without creating entry
     Useful for debugging and testing voice recognition
+
+    Served from the in-memory answer index; the database is only read the
+    first time a question is matched (or after the index is invalidated).
     """
     from helpers.voice_matcher import match_voice_to_answer
+    from services.answer_matcher import answer_matcher
 
     matched_answer_key = match_voice_to_answer(
         db=db,
@@ -80,16 +88,12 @@ async def match_voice_to_answer(
     )
 
     if matched_answer_key:
-        # Get the matched answer details
-        from models.conversation import AnswerMaster
-        answer = db.query(AnswerMaster).filter(
-            AnswerMaster.answer_key == matched_answer_key
-        ).first()
+        answer_texts = answer_matcher.get_index(db, question_key).answer_texts
 
         return {
             "matched": True,
             "answer_key": matched_answer_key,
-            "answer_text": answer.answer_text if answer else None,
+            "answer_text": answer_texts.get(matched_answer_key),
             "voice_text": voice_text
         }
 
@@ -104,13 +108,14 @@ async def match_voice_to_answer(
 async def get_next_question_voice(
     session_id: str,
     current_question_key: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get the next question in the wizard flow for voice mode
     """
-    next_question = ConversationService.get_next_question(
-        db=db,
+    next_question = await run_sync_helper(
+        db,
+        ConversationService.get_next_question_response,
         session_id=session_id,
         current_question_key=current_question_key
     )
@@ -121,4 +126,4 @@ async def get_next_question_voice(
             "completed": True
         }
 
-    return QuestionResponse.from_orm(next_question)
+    return next_question
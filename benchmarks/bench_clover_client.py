@@ -0,0 +1,113 @@
+"""
+Benchmark: per-call httpx.AsyncClient vs the shared pooled Clover client
+
+Starts a local stub Clover server and fires the same workload through both
+strategies, reporting requests/sec and p50/p99 latency.
+
+    python benchmarks/bench_clover_client.py --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from services.clover_client import CloverHTTPClient
+
+STUB_BODY = json.dumps({
+    "elements": [
+        {"id": f"ITEM{i}", "name": f"Item {i}", "price": 1000 + i}
+        for i in range(20)
+    ]
+}).encode()
+
+
+async def _handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Minimal HTTP/1.1 keep-alive handler that always answers with STUB_BODY"""
+    try:
+        while True:
+            request_head = await reader.readuntil(b"\r\n\r\n")
+            content_length = 0
+            for line in request_head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    content_length = int(line.split(b":", 1)[1])
+            if content_length:
+                await reader.readexactly(content_length)
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/json\r\n"
+                b"Content-Length: " + str(len(STUB_BODY)).encode() + b"\r\n"
+                b"Connection: keep-alive\r\n\r\n" + STUB_BODY
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _run_workload(send, total: int, concurrency: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await send()
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    return elapsed, latencies
+
+
+def _report(label: str, elapsed: float, latencies: list):
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    p99_index = max(0, int(len(latencies_ms) * 0.99) - 1)
+    print(
+        f"{label:<22} {len(latencies_ms) / elapsed:>10.1f} req/s   "
+        f"p50 {statistics.median(latencies_ms):>7.2f} ms   "
+        f"p99 {latencies_ms[p99_index]:>7.2f} ms"
+    )
+
+
+async def main(total: int, concurrency: int):
+    server = await asyncio.start_server(_handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/v3/merchants/MERCHANT/items"
+    headers = {"Authorization": "Bearer test-token"}
+
+    async def per_call_client():
+        async with httpx.AsyncClient() as client:
+            return await client.get(url, headers=headers, params={"limit": 100})
+
+    pooled = CloverHTTPClient(max_connections=concurrency, max_keepalive_connections=concurrency,
+                              max_connections_per_host=concurrency)
+    await pooled.startup()
+
+    async def shared_client():
+        return await pooled.client.get(url, headers=headers, params={"limit": 100})
+
+    async with server:
+        print(f"{total} requests, concurrency {concurrency}, stub server on port {port}\n")
+        _report("per-call AsyncClient", *await _run_workload(per_call_client, total, concurrency))
+        _report("shared pooled client", *await _run_workload(shared_client, total, concurrency))
+
+    await pooled.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
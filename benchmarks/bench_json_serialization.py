@@ -0,0 +1,129 @@
+"""
+Benchmark: response serialization with stdlib json vs orjson (FastJSONResponse)
+
+Renders synthetic payloads shaped like the largest responses -
+/merchants/all, /clover/catalog/items and /merchant-categories/categories/all -
+with starlette's JSONResponse and with utils.json_response.FastJSONResponse,
+and checks both produce the same bytes.
+
+    python benchmarks/bench_json_serialization.py --merchants 5000 --items 10000 --categories 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from utils import json_response
+from utils.json_response import FastJSONResponse
+
+
+def merchants_payload(count: int):
+    merchants = [
+        {
+            "id": i,
+            "clover_merchant_id": f"MID{i:08d}",
+            "name": f"Merchant {i}",
+            "currency": "USD",
+            "timezone": "America/Los_Angeles",
+            "email": f"owner{i}@example.com",
+            "address": f"{i} Market Street",
+            "city": "San Francisco",
+            "state": "CA",
+            "country": "US",
+            "postal_code": "94103",
+            "longitude": -122.4 + i * 1e-5,
+            "latitude": 37.7 + i * 1e-5,
+            "created_at": "2025-01-01T00:00:00",
+            "updated_at": "2025-01-01T00:00:00",
+        }
+        for i in range(count)
+    ]
+    return {
+        "success": True,
+        "message": "Merchants retrieved successfully",
+        "data": {"merchants": merchants, "total_count": count, "returned_count": count},
+    }
+
+
+def catalog_items_payload(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    items = [
+        {
+            "id": f"ITEM{i}",
+            "name": f"Item {i} – café spécial",
+            "price": rng.randint(100, 5000),
+            "priceType": "FIXED",
+            "available": rng.random() < 0.9,
+            "hidden": False,
+            "modifiedTime": 1735689600000 + i,
+            "categories": {"elements": [{"id": f"CAT{rng.randrange(40)}", "name": f"Category {i % 40}"}]},
+            "tags": {"elements": [{"id": f"TAG{t}", "name": f"Tag {t}"} for t in range(rng.randint(0, 3))]},
+        }
+        for i in range(count)
+    ]
+    return {"success": True, "message": "Items retrieved successfully", "data": {"elements": items}}
+
+
+def categories_payload(count: int):
+    categories = [
+        {
+            "id": f"CAT{i}",
+            "name": f"Category {i}",
+            "sortOrder": i,
+            "merchant_id": f"MID{i % 50:08d}",
+            "merchant_name": f"Merchant {i % 50}",
+        }
+        for i in range(count)
+    ]
+    return {
+        "success": True,
+        "message": "Categories retrieved successfully",
+        "data": {"categories": categories, "total_categories": count, "total_merchants": 50},
+    }
+
+
+def _time(label: str, fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"  {label:<34} median {statistics.median(timings):>8.2f} ms   min {min(timings):>8.2f} ms   "
+          f"body {len(body) / 1024:>7.1f} KiB")
+    return statistics.median(timings)
+
+
+def main(merchant_count: int, item_count: int, category_count: int, repeat: int):
+    if not json_response.USE_ORJSON:
+        print("orjson is not installed or JSON_RESPONSE_BACKEND=stdlib; FastJSONResponse uses the json module\n")
+
+    payloads = [
+        ("/merchants/all", merchants_payload(merchant_count)),
+        ("/clover/catalog/items", catalog_items_payload(item_count)),
+        ("/merchant-categories/categories/all", categories_payload(category_count)),
+    ]
+    for name, payload in payloads:
+        assert JSONResponse(content=payload).body == FastJSONResponse(content=payload).body, name
+        print(f"{name}")
+        stdlib_ms = _time("JSONResponse (stdlib json)", lambda: JSONResponse(content=payload).body, repeat)
+        fast_ms = _time("FastJSONResponse", lambda: FastJSONResponse(content=payload).body, repeat)
+        # A plain return value also goes through jsonable_encoder before render()
+        _time("jsonable_encoder + FastJSONResponse", lambda: FastJSONResponse(content=jsonable_encoder(payload)).body, repeat)
+        print(f"  speed-up {stdlib_ms / fast_ms:.1f}x\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--merchants", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--categories", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.merchants, args.items, args.categories, args.repeat)
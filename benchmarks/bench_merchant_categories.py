@@ -0,0 +1,117 @@
+"""
+Benchmark: category assembly for GET /merchants/{merchant_id}/categories
+
+Builds a synthetic Clover catalog and compares the previous per-variant
+Pydantic assembly + response_model serialization against the single-pass
+dict builder + direct JSONResponse rendering.
+
+    python benchmarks/bench_merchant_categories.py --items 10000 --categories 40
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.routes.merchants import build_category_payload
+from app.schemas.category import Category, Variation as SchemaVariation, CloverItem
+
+
+def make_catalog(item_count: int, category_count: int, seed: int = 7):
+    """Clover-shaped categories/items payloads; roughly half the items have 2-3 variants"""
+    rng = random.Random(seed)
+    categories = {"elements": [{"id": f"CAT{c}", "name": f"Category {c}"} for c in range(category_count)]}
+    items = []
+    for i in range(item_count):
+        item = {"id": f"ITEM{i}", "name": f"Item {i}", "price": rng.randint(100, 5000)}
+        if rng.random() < 0.5:
+            item["variants"] = [
+                {"id": f"VAR{i}_{v}", "name": f"Size {v}", "price": rng.randint(100, 5000)}
+                for v in range(rng.randint(2, 3))
+            ]
+        if rng.random() < 0.95:
+            item["categories"] = {"elements": [{"id": f"CAT{rng.randrange(category_count)}"}]}
+        else:
+            item["categories"] = None
+        items.append(item)
+    return categories, {"elements": items}
+
+
+def legacy_build(clover_categories_data, clover_items_data):
+    """The previous implementation: a Pydantic object per item, category and variation"""
+    categories_map = {
+        cat['id']: Category(id=cat['id'], name=cat['name'], variations=[])
+        for cat in clover_categories_data.get('elements', [])
+    }
+    uncategorized = Category(id="uncategorized", name="Uncategorized", variations=[])
+
+    for item_data in clover_items_data.get('elements', []):
+        item = CloverItem(**item_data)
+        if item.categories and item.categories.get('elements'):
+            targets = [categories_map[ref['id']] for ref in item.categories['elements'] if ref['id'] in categories_map]
+        else:
+            targets = [uncategorized]
+        for target in targets:
+            if item.variants:
+                for variant_data in item.variants:
+                    target.variations.append(SchemaVariation(
+                        id=variant_data.id,
+                        name=f"{item.name} ({variant_data.name})",
+                        price=variant_data.price / 100.0
+                    ))
+            else:
+                target.variations.append(SchemaVariation(id=item.id, name=item.name, price=item.price / 100.0))
+
+    final_categories = list(categories_map.values())
+    if uncategorized.variations:
+        final_categories.append(uncategorized)
+    return final_categories
+
+
+_response_adapter = TypeAdapter(List[Category])
+
+
+def legacy_render(categories_data, items_data) -> bytes:
+    # FastAPI validates the return value against response_model, then serializes it
+    result = legacy_build(categories_data, items_data)
+    validated = _response_adapter.validate_python([c.model_dump() for c in result])
+    return JSONResponse(content=_response_adapter.dump_python(validated, mode="json")).body
+
+
+def lean_render(categories_data, items_data) -> bytes:
+    return JSONResponse(content=build_category_payload(categories_data, items_data)).body
+
+
+def _time(label: str, fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<28} median {statistics.median(timings):>8.2f} ms   min {min(timings):>8.2f} ms   "
+          f"body {len(body) / 1024:>7.1f} KiB")
+
+
+def main(item_count: int, category_count: int, repeat: int):
+    categories_data, items_data = make_catalog(item_count, category_count)
+    variation_count = sum(len(c["variations"]) for c in build_category_payload(categories_data, items_data))
+    print(f"{item_count} items, {category_count} categories, {variation_count} variations, {repeat} runs\n")
+
+    _time("pydantic + response_model", lambda: legacy_render(categories_data, items_data), repeat)
+    _time("single-pass dict builder", lambda: lean_render(categories_data, items_data), repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    main(args.items, args.categories, args.repeat)
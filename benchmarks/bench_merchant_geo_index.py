@@ -0,0 +1,111 @@
+"""
+Benchmark: nearest-merchant lookups on services.merchant_geo_index
+
+Fills a MerchantGeoIndex with synthetic merchants clustered around a few
+cities (plus a uniform sprinkle worldwide), checks a sample of lookups
+against a brute-force haversine scan, and reports lookup latency for
+k-nearest and radius queries, with and without pending writes.
+
+    python benchmarks/bench_merchant_geo_index.py --merchants 50000 --queries 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.merchant_geo_index import MerchantGeoIndex, _KDTree, haversine_km, to_unit_vector
+
+CITIES = [(37.77, -122.42), (40.71, -74.01), (51.51, -0.13), (35.68, 139.69), (-33.87, 151.21), (19.08, 72.88)]
+
+
+def make_entries(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    entries = {}
+    for i in range(1, count + 1):
+        if rng.random() < 0.9:
+            lat, lon = rng.choice(CITIES)
+            lat, lon = lat + rng.gauss(0, 0.3), lon + rng.gauss(0, 0.3)
+        else:
+            lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        entries[i] = {
+            "id": i, "clover_merchant_id": f"MID{i:08d}", "name": f"Merchant {i}", "address": None,
+            "city": None, "state": None, "country": None, "postal_code": None,
+            "latitude": max(-90.0, min(90.0, lat)), "longitude": (lon + 180) % 360 - 180,
+        }
+    return entries
+
+
+def build_index(entries) -> MerchantGeoIndex:
+    index = MerchantGeoIndex(ttl=0)
+    vectors = {i: to_unit_vector(e["latitude"], e["longitude"]) for i, e in entries.items()}
+    with index._lock:
+        index._install(dict(entries), vectors, _KDTree(list(vectors.items())), 0)
+    return index
+
+
+def brute_force(entries, lat, lon, limit, radius_km):
+    scored = sorted((haversine_km(lat, lon, e["latitude"], e["longitude"]), i) for i, e in entries.items())
+    if radius_km is not None:
+        scored = [item for item in scored if item[0] <= radius_km]
+    return [i for _, i in scored[:limit]]
+
+
+def _time(label: str, fn, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(*query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(f"  {label:<30} p50 {statistics.median(timings):>7.3f} ms   "
+          f"p95 {timings[int(len(timings) * 0.95)]:>7.3f} ms   max {timings[-1]:>7.3f} ms")
+
+
+def main(merchant_count: int, query_count: int, writes: int):
+    rng = random.Random(3)
+    entries = make_entries(merchant_count)
+    started = time.perf_counter()
+    index = build_index(entries)
+    print(f"{merchant_count} merchants, tree built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    queries = []
+    for _ in range(query_count):
+        if rng.random() < 0.8:
+            lat, lon = rng.choice(CITIES)
+            queries.append((lat + rng.gauss(0, 0.2), lon + rng.gauss(0, 0.2)))
+        else:
+            queries.append((rng.uniform(-90, 90), rng.uniform(-180, 180)))
+
+    mismatches = 0
+    for lat, lon in queries[:50]:
+        for limit, radius in ((10, None), (50, 5.0)):
+            got = [m["id"] for m in index.nearest(lat, lon, limit, radius)]
+            if got != brute_force(entries, lat, lon, limit, radius):
+                mismatches += 1
+    print(f"brute-force check: {mismatches} mismatches\n")
+
+    _time("k=10", lambda lat, lon: index.nearest(lat, lon, 10), queries)
+    _time("k=100", lambda lat, lon: index.nearest(lat, lon, 100), queries)
+    _time("k=50 within 5 km", lambda lat, lon: index.nearest(lat, lon, 50, 5.0), queries)
+
+    # Move merchants without triggering a rebuild to measure the pending scan
+    moved = rng.sample(sorted(entries), min(writes, len(entries)))
+    for merchant_id in moved:
+        entry = dict(entries[merchant_id], latitude=rng.uniform(-60, 60), longitude=rng.uniform(-180, 180))
+        entries[merchant_id] = entry
+        index._write(merchant_id, entry)
+    print(f"\nafter {len(moved)} pending writes")
+    _time("k=10", lambda lat, lon: index.nearest(lat, lon, 10), queries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--merchants", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--writes", type=int, default=200)
+    args = parser.parse_args()
+    main(args.merchants, args.queries, args.writes)
@@ -0,0 +1,156 @@
+"""
+Benchmark: response-format middleware overhead on a large GET /merchants/all
+
+Serves a synthetic /merchants/all payload (same fields and envelope as
+app/routes/merchant_routes.py) through three stacks and compares throughput:
+
+- legacy:  the previous BaseHTTPMiddleware ResponseFormatMiddleware
+- asgi:    the pure ASGI ResponseFormatMiddleware
+- none:    no response middleware (lower bound)
+
+    python benchmarks/bench_response_envelope.py --merchants 5000 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from middleware.response_middleware import ResponseFormatMiddleware
+from utils.response_formatter import success_response
+
+
+class LegacyResponseFormatMiddleware(BaseHTTPMiddleware):
+    """The former implementation, reduced to its request path"""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        if (isinstance(response, JSONResponse) and
+                response.status_code < 500 and
+                not self._is_already_formatted(response)):
+            data = json.loads(response.body.decode("utf-8"))
+            return JSONResponse(
+                content={
+                    "success": 200 <= response.status_code < 400,
+                    "message": "Operation completed successfully",
+                    "data": data if not self._is_already_formatted(response) else data.get("data", data)
+                },
+                status_code=response.status_code,
+                headers=dict(response.headers)
+            )
+        return response
+
+    def _is_already_formatted(self, response) -> bool:
+        try:
+            data = json.loads(response.body.decode("utf-8"))
+            return isinstance(data, dict) and "success" in data and "message" in data and "data" in data
+        except Exception:
+            return False
+
+
+def make_merchants(count: int):
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "id": i,
+            "clover_merchant_id": f"MID{i:08d}",
+            "name": f"Merchant {i}",
+            "currency": "USD",
+            "timezone": "America/Los_Angeles",
+            "email": f"owner{i}@example.com",
+            "address": f"{i} Market Street",
+            "city": "San Francisco",
+            "state": "CA",
+            "country": "US",
+            "postal_code": "94103",
+            "longitude": -122.4 + i * 1e-5,
+            "latitude": 37.7 + i * 1e-5,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def build_app(middleware, merchants) -> FastAPI:
+    app = FastAPI()
+    if middleware is not None:
+        app.add_middleware(middleware)
+    router = APIRouter(prefix="/merchants")
+
+    @router.get("/all")
+    async def get_all_merchants():
+        return success_response(
+            message="Merchants retrieved successfully",
+            data={
+                "merchants": merchants,
+                "total_count": len(merchants),
+                "returned_count": len(merchants),
+                "pagination": {"limit": None, "offset": 0, "has_more": False},
+            }
+        )
+
+    @router.get("/all-raw")
+    async def get_all_merchants_raw():
+        # Plain return value, no envelope: the serialization floor for the same payload
+        return {"merchants": merchants, "total_count": len(merchants)}
+
+    app.include_router(router)
+    return app
+
+
+async def run(app: FastAPI, path: str, requests: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        await one()  # warm-up
+        latencies.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+    return requests / elapsed, statistics.mean(latencies), statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--merchants", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    merchants = make_merchants(args.merchants)
+    stacks = [
+        ("legacy", LegacyResponseFormatMiddleware),
+        ("asgi", ResponseFormatMiddleware),
+        ("none", None),
+    ]
+    print(f"{args.merchants} merchants, {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'stack':<8} {'path':<20} {'req/s':>8} {'mean ms':>9} {'p50 ms':>8}")
+    for name, middleware in stacks:
+        app = build_app(middleware, merchants)
+        for path in ("/merchants/all", "/merchants/all-raw"):
+            rps, mean_ms, p50_ms = asyncio.run(run(app, path, args.requests, args.concurrency))
+            print(f"{name:<8} {path:<20} {rps:>8.1f} {mean_ms:>9.2f} {p50_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
-from typing import Generator
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Callable, Dict, Generator, TypeVar
 from dotenv import load_dotenv
+from database.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 load_dotenv()
 
@@ -15,7 +19,47 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 
 DATABASE_URL = f"{DB_CONNECTION}+mysqlconnector://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_DATABASE}"
 
-engine = create_engine(DATABASE_URL)
+# Async driver for AsyncSession (pip install aiomysql greenlet)
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "aiomysql")
+ASYNC_DATABASE_URL = f"{DB_CONNECTION}+{DB_ASYNC_DRIVER}://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_DATABASE}"
+
+# Pool sizing. Each worker process holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW
+# connections per engine (sync, plus async once used), so
+# workers * engines * (size + overflow) must stay under MySQL max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle below MySQL wait_timeout (28800s default) and any proxy/LB idle timeout
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+
+def engine_options(**overrides: Any) -> Dict[str, Any]:
+    """Pool settings shared by the sync and async engines"""
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "echo": DB_ECHO,
+    }
+    options.update(overrides)
+    return options
+
+
+def create_db_engine(url: str = DATABASE_URL, name: str = "sync", **overrides: Any):
+    """
+    The one place engines are built: env-driven pool settings plus pool
+    metrics (see get_pool_stats). Keyword overrides go straight to create_engine.
+    """
+    db_engine = create_engine(url, **engine_options(poolclass=InstrumentedQueuePool, **overrides))
+    instrument_engine(db_engine, name)
+    return db_engine
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -29,3 +73,80 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+# ---------------------------------------------------------------------------
+# Async engine / session
+#
+# Created lazily so the sync app still imports without the async driver installed.
+# expire_on_commit=False: attributes stay readable after commit without an
+# implicit (and, under asyncio, illegal) lazy reload.
+# ---------------------------------------------------------------------------
+_async_engine = None
+_async_session_factory = None
+
+T = TypeVar("T")
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL, **engine_options(poolclass=InstrumentedAsyncQueuePool)
+        )
+        # Pool events and the pool itself live on the wrapped sync engine
+        instrument_engine(_async_engine.sync_engine, "async")
+    return _async_engine
+
+
+def get_async_sessionmaker():
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _async_session_factory = async_sessionmaker(
+            bind=get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
+
+
+async def get_async_db() -> AsyncGenerator["AsyncSession", None]:
+    """
+    Async counterpart of get_db: use with Depends(get_async_db) in async routes
+    so DB I/O no longer blocks the event loop.
+    """
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def run_sync_helper(db: "AsyncSession", fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Call an existing sync helper (CartHelper, MerchantHelper, CatalogHelper, the
+    DB-only ConversationService methods, ...) on an AsyncSession.
+
+    The helper receives a regular Session as its first argument and runs via
+    AsyncSession.run_sync, so its queries, lazy loads and commits go through the
+    async driver without blocking the loop. This is the migration path: routes
+    switch to get_async_db first, helpers can be rewritten natively later.
+    Do not pass helpers that make blocking non-DB calls (e.g. LLM requests);
+    run those with starlette.concurrency.run_in_threadpool on a sync session.
+    """
+    return await db.run_sync(lambda sync_db: fn(sync_db, *args, **kwargs))
+
+
+async def dispose_async_engine() -> None:
+    """Close pooled async connections (called from the FastAPI shutdown event)"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Checked-out connections, checkout waits and overflow events per engine"""
+    stats = {"sync": engine.pool.metrics.snapshot(engine.pool)}
+    if _async_engine is not None:
+        pool = _async_engine.sync_engine.pool
+        stats["async"] = pool.metrics.snapshot(pool)
+    return stats
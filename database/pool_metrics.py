@@ -0,0 +1,161 @@
+"""
+Connection pool instrumentation for the sync and async SQLAlchemy engines
+"""
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Checkouts that wait longer than this are counted as slow (pool too small for the load)
+DB_POOL_SLOW_CHECKOUT_MS = float(os.getenv("DB_POOL_SLOW_CHECKOUT_MS", "100"))
+# Number of recent checkout waits kept for percentiles
+DB_POOL_WAIT_SAMPLES = int(os.getenv("DB_POOL_WAIT_SAMPLES", "1000"))
+
+
+class PoolMetrics:
+    """Thread-safe counters for one engine's pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=DB_POOL_WAIT_SAMPLES)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.overflow_events = 0
+            self.timeouts = 0
+            self.invalidations = 0
+            self.slow_checkouts = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self._waits.clear()
+
+    def record_wait(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self._waits.append(wait_ms)
+            if wait_ms >= DB_POOL_SLOW_CHECKOUT_MS:
+                self.slow_checkouts += 1
+
+    def record_overflow(self) -> None:
+        with self._lock:
+            self.overflow_events += 1
+
+    def record_timeout(self, wait_ms: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        logger.warning(f"[{self.name}] DB pool checkout timed out after {wait_ms:.0f}ms")
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool=None) -> Dict[str, Any]:
+        """Counters plus the live pool state (when the pool is passed in)"""
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "invalidations": self.invalidations,
+                "slow_checkouts": self.slow_checkouts,
+                "wait_ms": {
+                    "avg": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                    "p50": round(statistics.median(waits), 3) if waits else 0.0,
+                    "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+                    "max": round(self.max_wait_ms, 3),
+                },
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return stats
+
+
+class _InstrumentedPoolMixin:
+    """
+    Times every checkout from the underlying queue. QueuePool has no
+    "before checkout" event, so the wait (including pool_timeout blocking)
+    can only be measured around _do_get.
+    """
+
+    metrics: PoolMetrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_timeout((time.perf_counter() - started) * 1000)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait((time.perf_counter() - started) * 1000)
+        return connection
+
+    def _inc_overflow(self) -> bool:
+        # _overflow starts at -pool_size; going positive means a connection beyond pool_size
+        allowed = super()._inc_overflow()
+        if allowed and self._overflow > 0 and self.metrics is not None:
+            self.metrics.record_overflow()
+        return allowed
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine, name: str) -> PoolMetrics:
+    """Attach a PoolMetrics to the engine's pool and listen for pool events"""
+    metrics = PoolMetrics(name)
+    engine.pool.metrics = metrics
+
+    event.listen(engine, "connect", lambda dbapi_connection, record: metrics.record_connect())
+    event.listen(engine, "checkin", lambda dbapi_connection, record: metrics.record_checkin())
+    event.listen(engine, "invalidate", lambda dbapi_connection, record, exception: metrics.record_invalidation())
+    return metrics
@@ -1,11 +1,12 @@
 # helpers/cart_helper.py
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import text, select, func, and_
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from models.cart import Cart, CartItem, CartItemModifier
 from models.user import User
 from models.conversation import Session
+from services.item_popularity_service import item_popularity_service
 import httpx
 import os
 
@@ -88,6 +89,34 @@ class CartHelper:
             Cart.status == "active"
         ).first()
 
+    @staticmethod
+    def _modifier_unit_total():
+        """Correlated subquery: sum of modifier prices for one unit of a cart item"""
+        return select(func.coalesce(func.sum(CartItemModifier.price), 0.0)).where(
+            CartItemModifier.cart_item_id == CartItem.id
+        ).scalar_subquery()
+
+    @staticmethod
+    def _lock_item_with_cart(db: Session, cart_item_id: int):
+        """
+        SELECT ... FOR UPDATE the cart item and its cart in one round trip.
+        populate_existing() makes rows already in the session take the locked values.
+        Returns (cart_item, cart, modifier_unit_total) or None.
+        """
+        return db.query(CartItem, Cart, CartHelper._modifier_unit_total()).join(
+            Cart, Cart.id == CartItem.cart_id
+        ).filter(
+            CartItem.id == cart_item_id
+        ).with_for_update().populate_existing().first()
+
+    @staticmethod
+    def _apply_total_delta(cart: Cart, delta: float):
+        """Adjust cart totals by the change in one line instead of rescanning the cart"""
+        cart.subtotal = round((cart.subtotal or 0.0) + delta, 2)
+        # For now, tax and discount are 0 (can be enhanced later)
+        cart.total_amount = cart.subtotal
+        cart.updated_at = datetime.now()
+
     @staticmethod
     def add_item_to_cart(
         db: Session,
@@ -98,38 +127,54 @@ class CartHelper:
         quantity: int = 1,
         notes: str = None
     ) -> CartItem:
-        """Add an item to cart"""
-        # Check if item already exists in cart
-        existing_item = db.query(CartItem).filter(
-            CartItem.cart_id == cart_id,
-            CartItem.clover_item_id == clover_item_id
-        ).first()
+        """Add an item to cart (single transaction; the cart row is locked while totals change)"""
+        # Lock the cart and find an existing line for this item in one query
+        row = db.query(Cart, CartItem, CartHelper._modifier_unit_total()).outerjoin(
+            CartItem,
+            and_(CartItem.cart_id == Cart.id, CartItem.clover_item_id == clover_item_id)
+        ).filter(
+            Cart.id == cart_id
+        ).with_for_update().populate_existing().first()
+        if not row:
+            return None
 
-        if existing_item:
-            # Update quantity and totals
-            existing_item.quantity += quantity
-            existing_item.line_total = existing_item.price * existing_item.quantity
-            existing_item.updated_at = datetime.now()
-            db.commit()
-            db.refresh(existing_item)
-            CartHelper._update_cart_totals(db, cart_id)
-            return existing_item
-        else:
-            # Create new item
-            cart_item = CartItem(
-                cart_id=cart_id,
-                clover_item_id=clover_item_id,
-                name=name,
-                price=price,
-                quantity=quantity,
-                line_total=price * quantity,
-                notes=notes
+        cart, existing_item, modifier_unit_total = row
+
+        try:
+            if existing_item:
+                # Update quantity and totals
+                existing_item.quantity += quantity
+                existing_item.line_total = existing_item.price * existing_item.quantity
+                existing_item.updated_at = datetime.now()
+                CartHelper._apply_total_delta(
+                    cart, (existing_item.price + (modifier_unit_total or 0.0)) * quantity
+                )
+                cart_item = existing_item
+            else:
+                # Create new item
+                cart_item = CartItem(
+                    cart_id=cart_id,
+                    clover_item_id=clover_item_id,
+                    name=name,
+                    price=price,
+                    quantity=quantity,
+                    line_total=price * quantity,
+                    notes=notes
+                )
+                db.add(cart_item)
+                CartHelper._apply_total_delta(cart, price * quantity)
+
+            # Suggestion popularity commits with the cart; failures are logged, not raised
+            popularity = item_popularity_service.record_cart_add(
+                db, cart.clover_merchant_id, clover_item_id, name, price, quantity
             )
-            db.add(cart_item)
             db.commit()
-            db.refresh(cart_item)
-            CartHelper._update_cart_totals(db, cart_id)
-            return cart_item
+        except Exception:
+            db.rollback()
+            raise
+
+        item_popularity_service.apply(popularity)
+        return cart_item
 
     @staticmethod
     def update_item_quantity(
@@ -138,38 +183,49 @@ class CartHelper:
         quantity: int
     ) -> Optional[CartItem]:
         """Update cart item quantity"""
-        cart_item = db.query(CartItem).filter(CartItem.id == cart_item_id).first()
-        if not cart_item:
+        row = CartHelper._lock_item_with_cart(db, cart_item_id)
+        if not row:
             return None
 
-        if quantity <= 0:
-            # Remove item if quantity is 0 or negative
-            cart_id = cart_item.cart_id
-            db.delete(cart_item)
-            db.commit()
-            CartHelper._update_cart_totals(db, cart_id)
-            return None
+        cart_item, cart, modifier_unit_total = row
+        unit_total = cart_item.price + (modifier_unit_total or 0.0)
 
-        cart_item.quantity = quantity
-        cart_item.line_total = cart_item.price * quantity
-        cart_item.updated_at = datetime.now()
-        db.commit()
-        db.refresh(cart_item)
-        CartHelper._update_cart_totals(db, cart_item.cart_id)
-        return cart_item
+        try:
+            if quantity <= 0:
+                # Remove item if quantity is 0 or negative
+                CartHelper._apply_total_delta(cart, -unit_total * cart_item.quantity)
+                CartHelper._delete_items(db, [cart_item.id])
+                db.commit()
+                return None
+
+            CartHelper._apply_total_delta(cart, unit_total * (quantity - cart_item.quantity))
+            cart_item.quantity = quantity
+            cart_item.line_total = cart_item.price * quantity
+            cart_item.updated_at = datetime.now()
+            db.commit()
+            return cart_item
+        except Exception:
+            db.rollback()
+            raise
 
     @staticmethod
     def remove_item_from_cart(db: Session, cart_item_id: int) -> bool:
         """Remove an item from cart"""
-        cart_item = db.query(CartItem).filter(CartItem.id == cart_item_id).first()
-        if not cart_item:
+        row = CartHelper._lock_item_with_cart(db, cart_item_id)
+        if not row:
             return False
 
-        cart_id = cart_item.cart_id
-        db.delete(cart_item)
-        db.commit()
-        CartHelper._update_cart_totals(db, cart_id)
-        return True
+        cart_item, cart, modifier_unit_total = row
+        try:
+            CartHelper._apply_total_delta(
+                cart, -(cart_item.price + (modifier_unit_total or 0.0)) * cart_item.quantity
+            )
+            CartHelper._delete_items(db, [cart_item.id])
+            db.commit()
+            return True
+        except Exception:
+            db.rollback()
+            raise
 
     @staticmethod
     def add_modifier_to_item(
@@ -181,72 +237,82 @@ class CartHelper:
         price: float = 0.0
     ) -> CartItemModifier:
         """Add a modifier to a cart item"""
-        modifier = CartItemModifier(
-            cart_item_id=cart_item_id,
-            clover_modifier_id=clover_modifier_id,
-            clover_modifier_group_id=clover_modifier_group_id,
-            name=name,
-            price=price
-        )
-        db.add(modifier)
-        db.commit()
-        db.refresh(modifier)
+        row = CartHelper._lock_item_with_cart(db, cart_item_id)
+        if not row:
+            return None
 
-        # Update cart totals
-        cart_item = db.query(CartItem).filter(CartItem.id == cart_item_id).first()
-        if cart_item:
-            CartHelper._update_cart_totals(db, cart_item.cart_id)
+        cart_item, cart, _ = row
+        try:
+            modifier = CartItemModifier(
+                cart_item_id=cart_item_id,
+                clover_modifier_id=clover_modifier_id,
+                clover_modifier_group_id=clover_modifier_group_id,
+                name=name,
+                price=price
+            )
+            db.add(modifier)
 
-        return modifier
+            # Modifier cost applies to every unit of the item
+            CartHelper._apply_total_delta(cart, (price or 0.0) * cart_item.quantity)
+            db.commit()
+            return modifier
+        except Exception:
+            db.rollback()
+            raise
 
     @staticmethod
     def clear_cart(db: Session, cart_id: int) -> bool:
         """Clear all items from cart"""
-        cart = db.query(Cart).filter(Cart.id == cart_id).first()
+        cart = db.query(Cart).filter(Cart.id == cart_id).with_for_update().populate_existing().first()
         if not cart:
             return False
 
-        # Delete all items (modifiers will be deleted via cascade)
-        db.query(CartItem).filter(CartItem.id == cart_id).delete()
-        db.commit()
-        CartHelper._update_cart_totals(db, cart_id)
-        return True
+        try:
+            item_ids = [row[0] for row in db.query(CartItem.id).filter(CartItem.cart_id == cart_id).all()]
+            CartHelper._delete_items(db, item_ids)
+            cart.subtotal = 0.0
+            cart.total_amount = 0.0
+            cart.updated_at = datetime.now()
+            db.commit()
+            return True
+        except Exception:
+            db.rollback()
+            raise
 
     @staticmethod
-    def _update_cart_totals(db: Session, cart_id: int):
-        """Update cart totals based on items and modifiers"""
-        cart = db.query(Cart).filter(Cart.id == cart_id).first()
+    def _delete_items(db: Session, cart_item_ids: List[int]):
+        """Bulk-delete cart items and their modifiers without loading them into the session"""
+        if not cart_item_ids:
+            return
+        db.query(CartItemModifier).filter(
+            CartItemModifier.cart_item_id.in_(cart_item_ids)
+        ).delete(synchronize_session="fetch")
+        db.query(CartItem).filter(
+            CartItem.id.in_(cart_item_ids)
+        ).delete(synchronize_session="fetch")
+
+    @staticmethod
+    def recalculate_cart_totals(db: Session, cart_id: int):
+        """
+        Recompute cart totals from scratch with a single aggregate query.
+        Not used on the write path (mutations apply deltas); useful to repair drift.
+        """
+        cart = db.query(Cart).filter(Cart.id == cart_id).with_for_update().populate_existing().first()
         if not cart:
             return
 
-        # Calculate subtotal from items
-        subtotal = 0.0
-        for item in cart.items:
-            item_total = item.line_total
-            # Add modifier costs
-            modifier_total = sum(mod.price for mod in item.modifiers)
-            item_total += (modifier_total * item.quantity)
-            subtotal += item_total
-
-        # For now, set tax and discount to 0 (can be enhanced later)
-        tax_amount = 0.0
-        discount_amount = 0.0
-        total_amount = subtotal + tax_amount - discount_amount
-
-        # Update cart
-        cart.subtotal = subtotal
-        cart.total_amount = total_amount
-        cart.updated_at = datetime.now()
+        subtotal = db.query(
+            func.coalesce(func.sum(CartItem.line_total + CartHelper._modifier_unit_total() * CartItem.quantity), 0.0)
+        ).filter(CartItem.cart_id == cart_id).scalar()
 
+        cart.subtotal = round(subtotal or 0.0, 2)
+        cart.total_amount = cart.subtotal
+        cart.updated_at = datetime.now()
         db.commit()
 
     @staticmethod
-    def get_cart_summary(db: Session, cart_id: int) -> Optional[Dict]:
-        """Get cart summary with all details"""
-        cart = db.query(Cart).filter(Cart.id == cart_id).first()
-        if not cart:
-            return None
-
+    def _serialize_cart(cart: Cart) -> Dict:
+        """Build the cart summary dict from a cart whose items/modifiers are already loaded"""
         items = []
         for item in cart.items:
             modifiers = [
@@ -285,16 +351,52 @@ class CartHelper:
         }
 
     @staticmethod
-    def get_carts_by_customer(db: Session, customer_id: int) -> List[Dict]:
-        """Get all carts for a specific customer"""
-        carts = db.query(Cart).filter(
-            Cart.customer_id == customer_id
-        ).order_by(Cart.created_at.desc()).all()
-
-        cart_summaries = []
-        for cart in carts:
-            summary = CartHelper.get_cart_summary(db, cart.id)
-            if summary:
-                cart_summaries.append(summary)
-
-        return cart_summaries
+    def _with_items_and_modifiers(query):
+        """Eager-load items and their modifiers: one extra SELECT ... IN per level, not per row"""
+        return query.options(selectinload(Cart.items).selectinload(CartItem.modifiers))
+
+    @staticmethod
+    def get_cart_summary(db: Session, cart_id: int) -> Optional[Dict]:
+        """Get cart summary with all details"""
+        cart = CartHelper._with_items_and_modifiers(
+            db.query(Cart).filter(Cart.id == cart_id)
+        ).first()
+        if not cart:
+            return None
+
+        return CartHelper._serialize_cart(cart)
+
+    @staticmethod
+    def _customer_carts_query(db: Session, customer_id: int, status: Optional[str] = None):
+        query = db.query(Cart).filter(Cart.customer_id == customer_id)
+        if status:
+            query = query.filter(Cart.status == status)
+        return query
+
+    @staticmethod
+    def get_carts_by_customer(
+        db: Session,
+        customer_id: int,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict]:
+        """
+        Get carts for a specific customer, newest first.
+        Always 3 queries (carts, items, modifiers) regardless of how many carts match.
+        """
+        query = CartHelper._customer_carts_query(db, customer_id, status).order_by(
+            Cart.created_at.desc(), Cart.id.desc()
+        )
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+
+        carts = CartHelper._with_items_and_modifiers(query).all()
+        return [CartHelper._serialize_cart(cart) for cart in carts]
+
+    @staticmethod
+    def count_carts_by_customer(db: Session, customer_id: int, status: Optional[str] = None) -> int:
+        """Total carts for a customer (for pagination)"""
+        return CartHelper._customer_carts_query(db, customer_id, status).with_entities(func.count(Cart.id)).scalar()
@@ -0,0 +1,302 @@
+# helpers/catalog_helper.py
+from sqlalchemy.orm import Session
+from sqlalchemy import UniqueConstraint, and_, delete, insert
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+from models.catalog import (
+    CatalogCategory,
+    CatalogItem,
+    CatalogItemCategory,
+    CatalogVariant,
+    CatalogModifierGroup,
+    CatalogSyncState,
+)
+from helpers.upsert_helper import UpsertHelper
+import json
+
+UPSERT_CHUNK_SIZE = 500
+
+_RESOURCE_MODELS = {
+    "items": (CatalogItem, CatalogItem.clover_item_id),
+    "categories": (CatalogCategory, CatalogCategory.clover_category_id),
+    "modifier_groups": (CatalogModifierGroup, CatalogModifierGroup.clover_modifier_group_id),
+}
+
+
+def _elements(value: Any) -> List[Dict[str, Any]]:
+    """Clover expansions come back either as {"elements": [...]} or a bare list"""
+    if isinstance(value, dict):
+        return value.get("elements", []) or []
+    if isinstance(value, list):
+        return value
+    return []
+
+
+class CatalogHelper:
+    """Helper class for the local Clover catalog store"""
+
+    @staticmethod
+    def _upsert(db: Session, model, rows: List[Dict[str, Any]], update_columns: Iterable[str]) -> None:
+        """Bulk upsert on the model's (merchant, Clover id) unique key, in chunks"""
+        key_columns = [
+            col.name for constraint in model.__table__.constraints
+            if isinstance(constraint, UniqueConstraint)
+            for col in constraint.columns
+        ]
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            UpsertHelper.upsert(db, model, rows[start:start + UPSERT_CHUNK_SIZE], key_columns, update_columns)
+
+    @staticmethod
+    def upsert_categories(db: Session, merchant_id: str, categories: List[Dict[str, Any]]) -> None:
+        """Upsert a batch of Clover category elements (caller commits)"""
+        rows = [
+            {
+                "clover_merchant_id": merchant_id,
+                "clover_category_id": category["id"],
+                "name": category.get("name"),
+                "sort_order": category.get("sortOrder"),
+                "modified_time": category.get("modifiedTime"),
+                "raw_json": json.dumps(category),
+            }
+            for category in categories if category.get("id")
+        ]
+        CatalogHelper._upsert(db, CatalogCategory, rows, ["name", "sort_order", "modified_time", "raw_json"])
+
+    @staticmethod
+    def upsert_modifier_groups(db: Session, merchant_id: str, groups: List[Dict[str, Any]]) -> None:
+        """Upsert a batch of Clover modifier group elements (caller commits)"""
+        rows = [
+            {
+                "clover_merchant_id": merchant_id,
+                "clover_modifier_group_id": group["id"],
+                "name": group.get("name"),
+                "min_required": group.get("minRequired"),
+                "max_allowed": group.get("maxAllowed"),
+                "modified_time": group.get("modifiedTime"),
+                "raw_json": json.dumps(group),
+            }
+            for group in groups if group.get("id")
+        ]
+        CatalogHelper._upsert(
+            db, CatalogModifierGroup, rows,
+            ["name", "min_required", "max_allowed", "modified_time", "raw_json"]
+        )
+
+    @staticmethod
+    def upsert_items(db: Session, merchant_id: str, items: List[Dict[str, Any]]) -> None:
+        """
+        Upsert a batch of Clover item elements together with their variants and
+        category links (caller commits). Items must be fetched with
+        expand=variants,categories for the child tables to be populated
+        (the sync also expands tags, kept in raw_json for dietary tagging).
+        """
+        items = [item for item in items if item.get("id")]
+        if not items:
+            return
+
+        item_rows = []
+        variant_rows = []
+        link_rows = []
+        for item in items:
+            item_rows.append({
+                "clover_merchant_id": merchant_id,
+                "clover_item_id": item["id"],
+                "name": item.get("name"),
+                "price": item.get("price"),
+                "price_type": item.get("priceType"),
+                "is_hidden": bool(item.get("hidden", False)),
+                "available": bool(item.get("available", True)),
+                "modified_time": item.get("modifiedTime"),
+                "raw_json": json.dumps(item),
+            })
+            for variant in _elements(item.get("variants")):
+                if variant.get("id"):
+                    variant_rows.append({
+                        "clover_merchant_id": merchant_id,
+                        "clover_variant_id": variant["id"],
+                        "clover_item_id": item["id"],
+                        "name": variant.get("name"),
+                        "price": variant.get("price"),
+                    })
+            for category in _elements(item.get("categories")):
+                if category.get("id"):
+                    link_rows.append({
+                        "clover_merchant_id": merchant_id,
+                        "clover_item_id": item["id"],
+                        "clover_category_id": category["id"],
+                    })
+
+        CatalogHelper._upsert(
+            db, CatalogItem, item_rows,
+            ["name", "price", "price_type", "is_hidden", "available", "modified_time", "raw_json"]
+        )
+
+        # Children are replaced wholesale for the items in this batch
+        item_ids = [item["id"] for item in items]
+        for start in range(0, len(item_ids), UPSERT_CHUNK_SIZE):
+            id_chunk = item_ids[start:start + UPSERT_CHUNK_SIZE]
+            db.execute(delete(CatalogVariant).where(
+                CatalogVariant.clover_merchant_id == merchant_id,
+                CatalogVariant.clover_item_id.in_(id_chunk)
+            ))
+            db.execute(delete(CatalogItemCategory).where(
+                CatalogItemCategory.clover_merchant_id == merchant_id,
+                CatalogItemCategory.clover_item_id.in_(id_chunk)
+            ))
+        for start in range(0, len(variant_rows), UPSERT_CHUNK_SIZE):
+            db.execute(insert(CatalogVariant), variant_rows[start:start + UPSERT_CHUNK_SIZE])
+        for start in range(0, len(link_rows), UPSERT_CHUNK_SIZE):
+            db.execute(insert(CatalogItemCategory), link_rows[start:start + UPSERT_CHUNK_SIZE])
+
+    @staticmethod
+    def prune(db: Session, merchant_id: str, resource: str, keep_ids: Set[str]) -> int:
+        """Delete rows of `resource` that Clover no longer returns (used after a full sync)"""
+        model, id_column = _RESOURCE_MODELS[resource]
+        existing = {
+            row[0] for row in db.query(id_column).filter(model.clover_merchant_id == merchant_id).all()
+        }
+        stale_ids = list(existing - keep_ids)
+        for start in range(0, len(stale_ids), UPSERT_CHUNK_SIZE):
+            id_chunk = stale_ids[start:start + UPSERT_CHUNK_SIZE]
+            db.execute(delete(model).where(model.clover_merchant_id == merchant_id, id_column.in_(id_chunk)))
+            if resource == "items":
+                db.execute(delete(CatalogVariant).where(
+                    CatalogVariant.clover_merchant_id == merchant_id,
+                    CatalogVariant.clover_item_id.in_(id_chunk)
+                ))
+                db.execute(delete(CatalogItemCategory).where(
+                    CatalogItemCategory.clover_merchant_id == merchant_id,
+                    CatalogItemCategory.clover_item_id.in_(id_chunk)
+                ))
+        return len(stale_ids)
+
+    @staticmethod
+    def get_sync_state(db: Session, merchant_id: str, resource: str) -> Optional[CatalogSyncState]:
+        """Get the incremental sync cursor for a merchant resource"""
+        return db.query(CatalogSyncState).filter(
+            CatalogSyncState.clover_merchant_id == merchant_id,
+            CatalogSyncState.resource == resource
+        ).first()
+
+    @staticmethod
+    def save_sync_state(
+        db: Session,
+        merchant_id: str,
+        resource: str,
+        last_modified_time: Optional[int],
+        full_sync: bool = False
+    ) -> CatalogSyncState:
+        """Advance the incremental sync cursor (caller commits)"""
+        state = CatalogHelper.get_sync_state(db, merchant_id, resource)
+        if not state:
+            state = CatalogSyncState(clover_merchant_id=merchant_id, resource=resource)
+            db.add(state)
+
+        now = datetime.now()
+        if last_modified_time is not None:
+            state.last_modified_time = last_modified_time
+        state.last_synced_at = now
+        if full_sync:
+            state.last_full_sync_at = now
+        return state
+
+    @staticmethod
+    def has_synced(db: Session, merchant_id: str, resource: str) -> bool:
+        """True once the local store holds a completed sync for this merchant resource"""
+        state = CatalogHelper.get_sync_state(db, merchant_id, resource)
+        return state is not None and state.last_synced_at is not None
+
+    @staticmethod
+    def _get_page(db: Session, merchant_id: str, resource: str, order_by, limit: Optional[int], offset: int) -> Dict[str, Any]:
+        model, _ = _RESOURCE_MODELS[resource]
+        query = db.query(model.raw_json).filter(
+            model.clover_merchant_id == merchant_id
+        ).order_by(*order_by)
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return {"elements": [json.loads(row[0]) for row in query.all() if row[0]]}
+
+    @staticmethod
+    def _item_variants(db: Session, merchant_id: str, item_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        variants: Dict[str, List[Dict[str, Any]]] = {}
+        rows = db.query(CatalogVariant).filter(
+            CatalogVariant.clover_merchant_id == merchant_id,
+            CatalogVariant.clover_item_id.in_(item_ids)
+        ).order_by(CatalogVariant.id).all()
+        for row in rows:
+            variants.setdefault(row.clover_item_id, []).append({
+                "id": row.clover_variant_id,
+                "name": row.name,
+                "price": row.price,
+            })
+        return variants
+
+    @staticmethod
+    def _item_categories(db: Session, merchant_id: str, item_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        categories: Dict[str, List[Dict[str, Any]]] = {}
+        rows = db.query(
+            CatalogItemCategory.clover_item_id,
+            CatalogItemCategory.clover_category_id,
+            CatalogCategory.raw_json
+        ).outerjoin(
+            CatalogCategory,
+            and_(
+                CatalogCategory.clover_merchant_id == CatalogItemCategory.clover_merchant_id,
+                CatalogCategory.clover_category_id == CatalogItemCategory.clover_category_id
+            )
+        ).filter(
+            CatalogItemCategory.clover_merchant_id == merchant_id,
+            CatalogItemCategory.clover_item_id.in_(item_ids)
+        ).order_by(CatalogItemCategory.id).all()
+        for item_id, category_id, raw_json in rows:
+            category = json.loads(raw_json) if raw_json else {"id": category_id}
+            categories.setdefault(item_id, []).append(category)
+        return categories
+
+    @staticmethod
+    def get_items_page(
+        db: Session, merchant_id: str, limit: Optional[int] = None, offset: int = 0, expand: str = ""
+    ) -> Dict[str, Any]:
+        """
+        Clover-shaped {"elements": [...]} page of items from the local store.
+        As with Clover, variants, categories and tags are only included when
+        named in `expand`; variants and categories are read from the normalized
+        tables, tags from the stored item JSON.
+        """
+        page = CatalogHelper._get_page(db, merchant_id, "items", [CatalogItem.id], limit, offset)
+        items = page["elements"]
+        requested = {part.strip() for part in (expand or "").split(",") if part.strip()}
+        for item in items:
+            item.pop("variants", None)
+            item.pop("categories", None)
+            tags = item.pop("tags", None)
+            if "tags" in requested:
+                item["tags"] = {"elements": _elements(tags)}
+
+        item_ids = [item["id"] for item in items if item.get("id")]
+        if not item_ids:
+            return page
+
+        if "variants" in requested:
+            variants = CatalogHelper._item_variants(db, merchant_id, item_ids)
+            for item in items:
+                item["variants"] = {"elements": variants.get(item.get("id"), [])}
+        if "categories" in requested:
+            categories = CatalogHelper._item_categories(db, merchant_id, item_ids)
+            for item in items:
+                item["categories"] = {"elements": categories.get(item.get("id"), [])}
+        return page
+
+    @staticmethod
+    def get_categories_page(db: Session, merchant_id: str, limit: Optional[int] = None, offset: int = 0) -> Dict[str, Any]:
+        """Clover-shaped {"elements": [...]} page of categories from the local store"""
+        return CatalogHelper._get_page(
+            db, merchant_id, "categories", [CatalogCategory.sort_order, CatalogCategory.id], limit, offset
+        )
+
+    @staticmethod
+    def get_modifier_groups_page(db: Session, merchant_id: str, limit: Optional[int] = None, offset: int = 0) -> Dict[str, Any]:
+        """Clover-shaped {"elements": [...]} page of modifier groups from the local store"""
+        return CatalogHelper._get_page(db, merchant_id, "modifier_groups", [CatalogModifierGroup.id], limit, offset)
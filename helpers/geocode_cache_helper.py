@@ -0,0 +1,46 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import update, func
+from typing import Dict, Any, Iterable, List
+from models.geocode_cache import GeocodeCache
+from helpers.upsert_helper import UpsertHelper
+
+
+class GeocodeCacheHelper:
+    """Helper class for the geocode_cache table"""
+
+    @staticmethod
+    def get_many(db: Session, address_hashes: Iterable[str]) -> Dict[str, GeocodeCache]:
+        """Cached rows for the given address hashes, keyed by hash"""
+        address_hashes = list(set(address_hashes))
+        if not address_hashes:
+            return {}
+        rows = db.query(GeocodeCache).filter(GeocodeCache.address_hash.in_(address_hashes)).all()
+        return {row.address_hash: row for row in rows}
+
+    @staticmethod
+    def record_hits(db: Session, address_hashes: Iterable[str]) -> None:
+        """Bump the hit counter of cached addresses (caller commits)"""
+        address_hashes = list(set(address_hashes))
+        if address_hashes:
+            db.execute(
+                update(GeocodeCache)
+                .where(GeocodeCache.address_hash.in_(address_hashes))
+                .values(hits=GeocodeCache.hits + 1)
+            )
+
+    @staticmethod
+    def store_many(db: Session, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert or refresh cache rows (address_hash, normalized_address, latitude,
+        longitude) as an upsert on address_hash, so two workers resolving the
+        same address do not collide. Caller commits.
+        """
+        if not rows:
+            return
+
+        rows = [{"hits": 0, **row} for row in rows]
+        UpsertHelper.upsert(
+            db, GeocodeCache, rows, ["address_hash"],
+            update_columns=["normalized_address", "latitude", "longitude"],
+            extra_updates={"updated_at": func.now()}
+        )
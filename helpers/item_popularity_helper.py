@@ -0,0 +1,66 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, func
+from typing import Dict, Any, Iterable, List
+from models.catalog import CatalogItem
+from models.item_popularity import ItemPopularity
+from helpers.upsert_helper import UpsertHelper
+import json
+
+# Columns refreshed from the latest write; counters are added instead
+_DETAIL_COLUMNS = ["dietary_type", "item_name", "description", "category", "price"]
+_COUNTER_COLUMNS = ["order_count", "cart_count", "score"]
+
+
+class ItemPopularityHelper:
+    """Helper class for the item_popularity table"""
+
+    @staticmethod
+    def increment_many(db: Session, rows: List[Dict[str, Any]]) -> None:
+        """
+        Add each row's order_count/cart_count/score to the stored counters,
+        inserting rows for items seen for the first time, in one upsert
+        (see UpsertHelper). Caller commits.
+        """
+        if not rows:
+            return
+
+        UpsertHelper.upsert(
+            db, ItemPopularity, rows, ["clover_merchant_id", "clover_item_id"],
+            update_columns=_DETAIL_COLUMNS,
+            increment_columns=_COUNTER_COLUMNS,
+            extra_updates={"updated_at": func.now()}
+        )
+
+    @staticmethod
+    def top_by_dietary_type(db: Session, dietary_type: str, limit: int) -> List[ItemPopularity]:
+        """Most popular items of one dietary type (served by ix_item_popularity_diet_score)"""
+        return db.query(ItemPopularity).filter(
+            ItemPopularity.dietary_type == dietary_type,
+            ItemPopularity.score > 0
+        ).order_by(ItemPopularity.score.desc()).limit(limit).all()
+
+    @staticmethod
+    def catalog_details(db: Session, merchant_id: str, clover_item_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Synced Clover elements for the given items, keyed by clover_item_id"""
+        clover_item_ids = list(set(clover_item_ids))
+        if not clover_item_ids:
+            return {}
+        rows = db.query(CatalogItem.clover_item_id, CatalogItem.raw_json).filter(
+            CatalogItem.clover_merchant_id == merchant_id,
+            CatalogItem.clover_item_id.in_(clover_item_ids)
+        ).all()
+        details = {}
+        for clover_item_id, raw_json in rows:
+            try:
+                details[clover_item_id] = json.loads(raw_json) if raw_json else {}
+            except (TypeError, ValueError):
+                details[clover_item_id] = {}
+        return details
+
+    @staticmethod
+    def is_empty(db: Session) -> bool:
+        return db.query(ItemPopularity.id).first() is None
+
+    @staticmethod
+    def clear(db: Session) -> None:
+        db.execute(delete(ItemPopularity))
@@ -1,11 +1,13 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional
 from models.merchant import Merchant
 from models.merchant_detail import MerchantDetail
 from models.merchant_token import MerchantToken
-from services.geocoding_service import geocoding_service
+from services.geocoding_queue import geocoding_queue, merchant_address_key
+from services.merchant_geo_index import merchant_geo_index
 import json
 
 
@@ -149,6 +151,8 @@ class MerchantHelper:
             MerchantDetail.clover_merchant_id == clover_merchant_id
         ).first()
 
+        previous_address_key = merchant_address_key(existing_detail) if existing_detail else None
+
         if existing_detail:
             # Update existing details with safe extraction
             existing_detail.name = safe_extract_string(merchant_data, "name", 255)
@@ -181,25 +185,11 @@ class MerchantHelper:
             )
             db.add(detail)
 
-        # Try to geocode the address to get coordinates
-        try:
-            coordinates = await MerchantHelper._geocode_merchant_address(
-                existing_detail if existing_detail else detail,
-                merchant_data
-            )
-            if coordinates:
-                lat, lon = coordinates
-                if existing_detail:
-                    existing_detail.latitude = lat
-                    existing_detail.longitude = lon
-                else:
-                    detail.latitude = lat
-                    detail.longitude = lon
-                print(f"✅ Coordinates geocoded: ({lat}, {lon})")
-            else:
-                print("⚠️ Could not geocode address - coordinates not available")
-        except Exception as e:
-            print(f"⚠️ Geocoding failed: {str(e)} - continuing without coordinates")
+        # Coordinates come from the geocode cache when possible; otherwise they are
+        # filled in the background so onboarding never waits on Nominatim
+        needs_geocoding = await run_in_threadpool(
+            geocoding_queue.prepare_merchant, db, existing_detail if existing_detail else detail, previous_address_key
+        )
 
         try:
             db.commit()
@@ -209,6 +199,11 @@ class MerchantHelper:
             print(f"❌ Error committing to database: {str(e)}")
             raise Exception(f"Database commit failed: {str(e)}")
 
+        # Keep the nearby-merchants index in step with the stored coordinates
+        merchant_geo_index.upsert(existing_detail if existing_detail else detail)
+        if needs_geocoding:
+            geocoding_queue.enqueue((existing_detail if existing_detail else detail).id)
+
     @staticmethod
     def get_merchant_token(db: Session, clover_merchant_id: str) -> Optional[str]:
         """Get merchant access token"""
@@ -268,44 +263,3 @@ class MerchantHelper:
         except Exception as e:
             db.rollback()
             raise Exception(f"Failed to store merchant data: {str(e)}")
-
-    @staticmethod
-    async def _geocode_merchant_address(merchant_detail: MerchantDetail, merchant_data: Dict[str, Any]) -> Optional[Tuple[float, float]]:
-        """Geocode merchant address to get latitude and longitude coordinates"""
-        try:
-            # First try to get address data from merchant_detail object (already stored)
-            address = merchant_detail.address
-            city = merchant_detail.city
-            state = merchant_detail.state
-            country = merchant_detail.country
-            postal_code = merchant_detail.postal_code
-
-            # If not available in merchant_detail, try to extract from merchant_data
-            if not address:
-                address = merchant_data.get("address1") or merchant_data.get("address")
-                city = merchant_data.get("city")
-                state = merchant_data.get("state")
-                country = merchant_data.get("country")
-                postal_code = merchant_data.get("zip") or merchant_data.get("postal_code")
-
-            # Only proceed if we have at least an address
-            if not address:
-                print("⚠️ No address found for geocoding")
-                return None
-
-            print(f"🔍 Geocoding address: {address}, {city}, {state}, {country}, {postal_code}")
-
-            # Call the geocoding service
-            coordinates = await geocoding_service.geocode_address(
-                address=address,
-                city=city,
-                state=state,
-                country=country,
-                postal_code=postal_code
-            )
-
-            return coordinates
-
-        except Exception as e:
-            print(f"❌ Error in geocoding: {str(e)}")
-            return None
@@ -0,0 +1,27 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import Optional
+from models.metadata_version import MetadataVersion
+from helpers.upsert_helper import UpsertHelper
+
+
+class MetadataVersionHelper:
+    """Helper class for the metadata_versions table"""
+
+    @staticmethod
+    def get_version(db: Session, name: str) -> Optional[int]:
+        """Current version of a metadata cache, or None if it was never bumped"""
+        row = db.query(MetadataVersion.version).filter(MetadataVersion.name == name).first()
+        return row[0] if row else None
+
+    @staticmethod
+    def bump(db: Session, name: str) -> None:
+        """
+        Increment a version, creating it at 1, as a single upsert (see
+        UpsertHelper) so concurrent writers never lose a bump. Caller commits.
+        """
+        UpsertHelper.upsert(
+            db, MetadataVersion, [{"name": name, "version": 1}], ["name"],
+            increment_columns=["version"],
+            extra_updates={"updated_at": func.now()}
+        )
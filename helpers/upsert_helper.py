@@ -0,0 +1,107 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from typing import Any, Dict, Iterable, List, Optional
+
+# Dialects with a native INSERT ... ON CONFLICT DO UPDATE
+_ON_CONFLICT_DIALECTS = ("sqlite", "postgresql")
+
+
+class UpsertHelper:
+    """Insert-or-update shared by the cache and catalog helpers"""
+
+    @staticmethod
+    def upsert(
+        db: Session,
+        model,
+        rows: List[Dict[str, Any]],
+        key_columns: Iterable[str],
+        update_columns: Iterable[str] = (),
+        increment_columns: Iterable[str] = (),
+        extra_updates: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Insert `rows`, or update the existing row with the same `key_columns`
+        (which must carry a unique constraint). On conflict, `update_columns`
+        take the incoming value, `increment_columns` are added to the stored
+        value and `extra_updates` maps columns to SQL expressions such as
+        func.now(). Rows must all have the same keys. Caller commits.
+
+        MySQL uses ON DUPLICATE KEY UPDATE and SQLite/PostgreSQL ON CONFLICT,
+        one statement per call. Other dialects fall back to a per-row UPDATE,
+        then an INSERT in a savepoint, retrying the UPDATE if a concurrent
+        writer inserted the row first.
+        """
+        if not rows:
+            return
+
+        key_columns = list(key_columns)
+        update_columns = list(update_columns)
+        increment_columns = list(increment_columns)
+        extra_updates = extra_updates or {}
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+            stmt = mysql_insert(model).values(rows)
+            incoming = stmt.inserted
+            stmt = stmt.on_duplicate_key_update({
+                **{col: incoming[col] for col in update_columns},
+                **{col: getattr(model, col) + incoming[col] for col in increment_columns},
+                **extra_updates,
+            })
+        elif dialect in _ON_CONFLICT_DIALECTS:
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            stmt = dialect_insert(model).values(rows)
+            incoming = stmt.excluded
+            set_ = {
+                **{col: incoming[col] for col in update_columns},
+                **{col: getattr(model, col) + incoming[col] for col in increment_columns},
+                **extra_updates,
+            }
+            if set_:
+                stmt = stmt.on_conflict_do_update(index_elements=key_columns, set_=set_)
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=key_columns)
+        else:
+            UpsertHelper._portable_upsert(
+                db, model, rows, key_columns, update_columns, increment_columns, extra_updates
+            )
+            return
+        db.execute(stmt)
+
+    @staticmethod
+    def _portable_upsert(
+        db: Session,
+        model,
+        rows: List[Dict[str, Any]],
+        key_columns: List[str],
+        update_columns: List[str],
+        increment_columns: List[str],
+        extra_updates: Dict[str, Any]
+    ) -> None:
+        """Row-by-row upsert in plain SQL for dialects without a native form"""
+        for row in rows:
+            match = and_(*(getattr(model, col) == row[col] for col in key_columns))
+            values = {
+                **{col: row[col] for col in update_columns},
+                **{col: getattr(model, col) + row[col] for col in increment_columns},
+                **extra_updates,
+            }
+
+            def update_existing() -> bool:
+                if not values:
+                    return db.execute(select(*(getattr(model, col) for col in key_columns)).where(match)).first() is not None
+                return db.execute(update(model).where(match).values(values)).rowcount > 0
+
+            if update_existing():
+                continue
+            try:
+                with db.begin_nested():
+                    db.execute(insert(model).values(row))
+            except IntegrityError:
+                # Inserted by a concurrent writer since the UPDATE above
+                update_existing()
@@ -1,42 +1,32 @@
 from sqlalchemy.orm import Session
-from typing import Optional, List, Dict
-from models.conversation import QuestionMaster, AnswerMaster
+from typing import Any, Optional, List, Dict
+from services.question_flow import FlowQuestion, question_flow
+
+# Question/answer metadata is served from the in-process question flow snapshot;
+# `db` is only used when the snapshot has to be built or its version checked.
 
 def validate_question_key(db: Session, question_key: str) -> bool:
     """Validate if question key exists and is active"""
-    question = db.query(QuestionMaster).filter(
-        QuestionMaster.question_key == question_key,
-        QuestionMaster.is_active == True
-    ).first()
-    return question is not None
+    return question_flow.get(db).question(question_key) is not None
 
 def validate_answer_key(db: Session, answer_key: str, question_key: str) -> bool:
     """Validate if answer key exists for the given question"""
-    answer = db.query(AnswerMaster).filter(
-        AnswerMaster.answer_key == answer_key,
-        AnswerMaster.question_key == question_key,
-        AnswerMaster.is_active == True
-    ).first()
-    return answer is not None
+    return question_flow.get(db).is_valid_answer(question_key, answer_key)
 
-def get_question_with_answers(db: Session, question_key: str) -> Optional[QuestionMaster]:
+def get_question_with_answers(db: Session, question_key: str) -> Optional[FlowQuestion]:
     """Get question with all its active answers"""
-    return db.query(QuestionMaster).filter(
-        QuestionMaster.question_key == question_key,
-        QuestionMaster.is_active == True
-    ).first()
+    return question_flow.get(db).question(question_key)
 
 def get_active_answers_for_question(db: Session, question_key: str) -> List[Dict[str, str]]:
     """Get all active answers for a question"""
-    answers = db.query(AnswerMaster).filter(
-        AnswerMaster.question_key == question_key,
-        AnswerMaster.is_active == True
-    ).all()
-
     return [
         {
             "answer_key": answer.answer_key,
             "answer_text": answer.answer_text
         }
-        for answer in answers
+        for answer in question_flow.get(db).active_answers(question_key)
     ]
+
+def get_active_answers_with_translations(db: Session, question_key: str) -> List[Dict[str, Any]]:
+    """Active answers for a question with all their translated texts"""
+    return question_flow.get(db).answers_with_translations(question_key)
@@ -1,7 +1,6 @@
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from difflib import SequenceMatcher
-from models.conversation import AnswerMaster
 
 def calculate_similarity(text1: str, text2: str) -> float:
     """Calculate similarity between two texts"""
@@ -13,39 +12,41 @@ def match_voice_to_answer(
     db: Session,
     voice_text: str,
     question_key: str,
-    threshold: float = 0.6
+    threshold: Optional[float] = None,
+    margin: Optional[float] = None
 ) -> Optional[str]:
     """
     Match voice text to the most appropriate answer
     Returns answer_key if match found, None otherwise
-    """
-    # Get all active answers for the question
-    answers = db.query(AnswerMaster).filter(
-        AnswerMaster.question_key == question_key,
-        AnswerMaster.is_active == True
-    ).all()
-
-    if not answers:
-        return None
-
-    best_match = None
-    best_score = 0.0
-
-    for answer in answers:
-        # Check against answer text
-        score = calculate_similarity(voice_text, answer.answer_text)
 
-        # Also check for common variations
-        variations = get_common_variations(answer.answer_text)
-        for variation in variations:
-            variation_score = calculate_similarity(voice_text, variation)
-            score = max(score, variation_score)
-
-        if score > best_score and score >= threshold:
-            best_score = score
-            best_match = answer.answer_key
-
-    return best_match
+    Uses the precompiled per-question answer index, so after the first call for
+    a question this is pure in-memory work. `threshold` is the minimum trigram
+    cosine similarity for a fuzzy match and `margin` how far it must lead the
+    next answer; both default to LOCAL_MATCH_THRESHOLD / LOCAL_MATCH_MARGIN,
+    the values the chat flow uses.
+    """
+    from services.answer_matcher import answer_matcher, LOCAL_MATCH_THRESHOLD, LOCAL_MATCH_MARGIN
+
+    match = answer_matcher.match(
+        db, question_key, voice_text,
+        threshold=LOCAL_MATCH_THRESHOLD if threshold is None else threshold,
+        margin=LOCAL_MATCH_MARGIN if margin is None else margin
+    )
+    return match.answer_key if match else None
+
+# Common food preference variations, keyed by a phrase found in the answer text
+VARIATION_MAP = {
+    "vegetarian": ["veg", "veggie", "vegetarian", "pure veg"],
+    "non-vegetarian": ["non veg", "non-veg", "nonveg", "meat"],
+    "vegan": ["vegan", "plant based", "no dairy"],
+    "chinese": ["chinese", "chinese food", "indo chinese"],
+    "italian": ["italian", "pasta", "pizza"],
+    "mexican": ["mexican", "tex mex", "tacos"],
+    "japanese": ["japanese", "sushi", "ramen"],
+    "hungry": ["hungry", "very hungry", "starving"],
+    "just snacking": ["snacking", "snack", "light bite"],
+    "super hungry": ["super hungry", "very hungry", "famished", "starving"]
+}
 
 def get_common_variations(answer_text: str) -> List[str]:
     """
@@ -55,21 +56,7 @@ def get_common_variations(answer_text: str) -> List[str]:
     variations = []
     answer_lower = answer_text.lower()
 
-    # Add common food preference variations
-    variation_map = {
-        "vegetarian": ["veg", "veggie", "vegetarian", "pure veg"],
-        "non-vegetarian": ["non veg", "non-veg", "nonveg", "meat"],
-        "vegan": ["vegan", "plant based", "no dairy"],
-        "chinese": ["chinese", "chinese food", "indo chinese"],
-        "italian": ["italian", "pasta", "pizza"],
-        "mexican": ["mexican", "tex mex", "tacos"],
-        "japanese": ["japanese", "sushi", "ramen"],
-        "hungry": ["hungry", "very hungry", "starving"],
-        "just snacking": ["snacking", "snack", "light bite"],
-        "super hungry": ["super hungry", "very hungry", "famished", "starving"]
-    }
-
-    for key, values in variation_map.items():
+    for key, values in VARIATION_MAP.items():
         if key in answer_lower:
             variations.extend(values)
 
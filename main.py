@@ -20,8 +20,16 @@ from datetime import datetime
 import httpx
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from database.database import get_db
+from database.database import SessionLocal, get_db, dispose_async_engine, get_pool_stats
 from helpers.merchant_helper import MerchantHelper
+from services.clover_client import clover_http, get_clover_client
+from services.catalog_sync_service import catalog_sync_service
+from services.geocoding_service import geocoding_service
+from services.geocoding_queue import geocoding_queue
+from services.item_popularity_service import item_popularity_service
+from services.ai_gateway import ai_gateway
+from services.ai_providers import ai_providers
+from services.classification_batcher import classification_batcher
 from models.merchant_token import MerchantToken
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import question_master
@@ -29,6 +37,7 @@ from routers.router import api_router
 from fastapi.exceptions import RequestValidationError
 from middleware.response_middleware import ResponseFormatMiddleware
 from utils.response_formatter import success_response, error_response
+from utils.json_response import FastJSONResponse
 from utils.exception_handlers import (
     http_exception_handler,
     starlette_http_exception_handler,
@@ -68,7 +77,8 @@ from utils.exception_handlers import register_exception_handlers
 
 
 
-app = FastAPI()
+# orjson-backed responses for every route that does not pick its own response class
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -125,6 +135,70 @@ router.include_router(items.router, prefix="/items", tags=["items"])
 router.include_router(merchants.router, prefix="/merchants", tags=["merchants"])
 router.include_router(recommendations.router, prefix="/recommendations", tags=["recommendations"])
 
+
+@app.on_event("startup")
+async def startup_clover_client():
+    """Open the shared, pooled Clover HTTP client"""
+    await clover_http.startup()
+
+
+@app.on_event("startup")
+async def startup_catalog_sync():
+    """Start the periodic Clover catalog sync when CATALOG_SYNC_INTERVAL_SECONDS > 0"""
+    catalog_sync_service.start_periodic_sync()
+
+
+@app.on_event("startup")
+async def startup_geocoding_queue():
+    """Start the geocoding backfill; one process (the MySQL named-lock holder) geocodes"""
+    try:
+        await geocoding_queue.start()
+    except Exception as e:
+        print(f"⚠️ Geocoding backfill skipped: {str(e)}")
+
+
+@app.on_event("startup")
+async def startup_item_popularity():
+    """Backfill suggestion popularity from cart history on first run"""
+    db = SessionLocal()
+    try:
+        item_popularity_service.ensure_seeded(db)
+    except Exception as e:
+        print(f"⚠️ Item popularity backfill skipped: {str(e)}")
+    finally:
+        db.close()
+
+
+@app.on_event("shutdown")
+async def shutdown_clover_client():
+    """Close pooled Clover connections"""
+    await clover_http.shutdown()
+
+
+@app.on_event("shutdown")
+async def shutdown_catalog_sync():
+    """Stop the periodic Clover catalog sync"""
+    await catalog_sync_service.stop_periodic_sync()
+
+
+@app.on_event("shutdown")
+async def shutdown_geocoding():
+    """Stop the background geocoder and close its Nominatim client"""
+    await geocoding_queue.stop()
+    await geocoding_service.aclose()
+
+
+@app.on_event("shutdown")
+async def shutdown_async_db():
+    """Close pooled async database connections"""
+    await dispose_async_engine()
+
+
+@app.on_event("shutdown")
+async def shutdown_ai_gateway():
+    """Drop queued LLM calls and stop the provider worker pools"""
+    ai_gateway.shutdown()
+
 @app.get("/")
 def read_root():
     return success_response(
@@ -132,6 +206,42 @@ def read_root():
         data={"message": "Welcome to FAST API!"}
     )
 
+@app.get("/health/db-pool")
+def db_pool_health():
+    """Connection pool usage: checked-out connections, checkout wait times and overflow events"""
+    return success_response(
+        message="Database pool stats",
+        data=get_pool_stats()
+    )
+
+@app.get("/health/ai-gateway")
+def ai_gateway_health():
+    """LLM provider pools: queued and in-flight calls, latency, errors and timeouts"""
+    return success_response(
+        message="AI gateway stats",
+        data=ai_gateway.stats()
+    )
+
+@app.get("/health/ai-usage")
+def ai_usage_dashboard():
+    """Per-task model, latency percentiles, tokens and estimated cost, plus provider pool state"""
+    return success_response(
+        message="AI usage stats",
+        data={
+            "tasks": ai_providers.usage(),
+            "providers": ai_gateway.stats(),
+            "batching": classification_batcher.stats()
+        }
+    )
+
+@app.get("/health/geocoding")
+def geocoding_health():
+    """Background geocoding queue: pending merchants, batches, cache hits and Nominatim requests"""
+    return success_response(
+        message="Geocoding stats",
+        data=geocoding_queue.stats()
+    )
+
 @app.get("/merchant")
 async def get_merchant_details():
     """Get merchant details - Mobile app calls this"""
@@ -149,21 +259,21 @@ async def get_merchant_details():
         "Content-Type": "application/json"
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
+    client = get_clover_client()
+    try:
+        response = await client.get(url, headers=headers)
+        response.raise_for_status()
 
-            return success_response(
-                message="Merchant details retrieved successfully",
-                data=response.json()
-            )
+        return success_response(
+            message="Merchant details retrieved successfully",
+            data=response.json()
+        )
 
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(
-                status_code=e.response.status_code,
-                detail=f"Clover API error: {e.response.text}"
-            )
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Clover API error: {e.response.text}"
+        )
 
 # @app.get("/merchant/properties")
 async def get_merchant_properties():
@@ -178,21 +288,21 @@ async def get_merchant_properties():
         "Content-Type": "application/json"
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
+    client = get_clover_client()
+    try:
+        response = await client.get(url, headers=headers)
+        response.raise_for_status()
 
-            return success_response(
-                message="Merchant properties retrieved successfully",
-                data=response.json()
-            )
+        return success_response(
+            message="Merchant properties retrieved successfully",
+            data=response.json()
+        )
 
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(
-                status_code=e.response.status_code,
-                detail=f"Clover API error: {e.response.text}"
-            )
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Clover API error: {e.response.text}"
+        )
 
 
 async def store_merchant_in_db(
@@ -431,64 +541,64 @@ async def add_merchant_token(merchant: MerchantToken, db: Session = Depends(get_
         "Content-Type": "application/json"
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            merchant_data = response.json()
-
-            # DEBUG: Print the merchant data structure
-            # print("=== MERCHANT DATA DEBUG ===")
-            # print(f"Full merchant_data type: {type(merchant_data)}")
-            # print(f"Full merchant_data: {merchant_data}")
-
-            # Check each field and its type
-            for key, value in merchant_data.items():
-                print(f"Field '{key}': Type={type(value).__name__}, Value={repr(value)}")
-                if isinstance(value, dict):
-                    print(f"  -> DICT DETECTED in field '{key}': {value}")
-                elif isinstance(value, list):
-                    print(f"  -> LIST DETECTED in field '{key}': {value}")
-
-            # Validate the response
-            if not validate_merchant_response(merchant_data):
-                raise HTTPException(status_code=400, detail="Invalid merchant data received")
-
-
-            # Store in database using helper (this is where the error occurs)
-            merchant_id = await MerchantHelper.store_complete_merchant_data(
-                db,
-                merchant.merchant_id,
-                merchant_data,
-                merchant.access_token
-            )
+    client = get_clover_client()
+    try:
+        response = await client.get(url, headers=headers)
+        response.raise_for_status()
+        merchant_data = response.json()
+
+        # DEBUG: Print the merchant data structure
+        # print("=== MERCHANT DATA DEBUG ===")
+        # print(f"Full merchant_data type: {type(merchant_data)}")
+        # print(f"Full merchant_data: {merchant_data}")
+
+        # Check each field and its type
+        for key, value in merchant_data.items():
+            print(f"Field '{key}': Type={type(value).__name__}, Value={repr(value)}")
+            if isinstance(value, dict):
+                print(f"  -> DICT DETECTED in field '{key}': {value}")
+            elif isinstance(value, list):
+                print(f"  -> LIST DETECTED in field '{key}': {value}")
+
+        # Validate the response
+        if not validate_merchant_response(merchant_data):
+            raise HTTPException(status_code=400, detail="Invalid merchant data received")
+
+
+        # Store in database using helper (this is where the error occurs)
+        merchant_id = await MerchantHelper.store_complete_merchant_data(
+            db,
+            merchant.merchant_id,
+            merchant_data,
+            merchant.access_token
+        )
 
-            # Extract clean merchant summary for response
-            summary = get_merchant_summary(merchant_data)
+        # Extract clean merchant summary for response
+        summary = get_merchant_summary(merchant_data)
 
-            # Get total merchants count
-            total_count = MerchantHelper.get_total_merchants_count(db)
+        # Get total merchants count
+        total_count = MerchantHelper.get_total_merchants_count(db)
 
-            return success_response(
-                message=f"✅ Merchant {merchant.merchant_id} added successfully",
-                data={
-                    "merchant_info": summary,
-                    "database_id": merchant_id,
-                    "total_merchants": total_count
-                }
-            )
+        return success_response(
+            message=f"✅ Merchant {merchant.merchant_id} added successfully",
+            data={
+                "merchant_info": summary,
+                "database_id": merchant_id,
+                "total_merchants": total_count
+            }
+        )
 
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid token for merchant {merchant.merchant_id}: {e.response.text}"
-            )
-        except Exception as e:
-            print(f"Full error details: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Database error: {str(e)}"
-            )
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid token for merchant {merchant.merchant_id}: {e.response.text}"
+        )
+    except Exception as e:
+        print(f"Full error details: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Database error: {str(e)}"
+        )
 
 
 # @app.get("/inventory/items")
@@ -553,26 +663,26 @@ async def get_merchant_details_endpoint(merchant_id: str = Path(..., description
         "Content-Type": "application/json"
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            raw_data = response.json()
+    client = get_clover_client()
+    try:
+        response = await client.get(url, headers=headers)
+        response.raise_for_status()
+        raw_data = response.json()
 
-            # Extract only relevant merchant details using our utility function
-            cleaned_data = extract_merchant_details(raw_data)
+        # Extract only relevant merchant details using our utility function
+        cleaned_data = extract_merchant_details(raw_data)
 
-            return {
-                "success": True,
-                "merchant_id": merchant_id,
-                "merchant_details": cleaned_data
-            }
+        return {
+            "success": True,
+            "merchant_id": merchant_id,
+            "merchant_details": cleaned_data
+        }
 
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(
-                status_code=e.response.status_code,
-                detail=f"Clover API error for merchant {merchant_id}: {e.response.text}"
-            )
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Clover API error for merchant {merchant_id}: {e.response.text}"
+        )
 
 @app.get("/merchants/{merchant_id}/inventory/items")
 async def get_inventory_items(
@@ -590,26 +700,26 @@ async def get_inventory_items(
         "Content-Type": "application/json"
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            raw_data = response.json()
+    client = get_clover_client()
+    try:
+        response = await client.get(url, headers=headers, params=params)
+        response.raise_for_status()
+        raw_data = response.json()
 
-            # Extract and clean inventory data
-            cleaned_data = extract_inventory_items(raw_data)
+        # Extract and clean inventory data
+        cleaned_data = extract_inventory_items(raw_data)
 
-            return {
-                "success": True,
-                "merchant_id": merchant_id,
-                "inventory": cleaned_data
-            }
+        return {
+            "success": True,
+            "merchant_id": merchant_id,
+            "inventory": cleaned_data
+        }
 
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(
-                status_code=e.response.status_code,
-                detail=f"Clover API error for merchant {merchant_id}: {e.response.text}"
-            )
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Clover API error for merchant {merchant_id}: {e.response.text}"
+        )
 
 @app.get("/merchants/{merchant_id}/orders")
 async def get_orders(
@@ -627,26 +737,26 @@ async def get_orders(
         "Content-Type": "application/json"
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            raw_data = response.json()
+    client = get_clover_client()
+    try:
+        response = await client.get(url, headers=headers, params=params)
+        response.raise_for_status()
+        raw_data = response.json()
 
-            # Extract and clean orders data
-            cleaned_data = extract_orders(raw_data)
+        # Extract and clean orders data
+        cleaned_data = extract_orders(raw_data)
 
-            return {
-                "success": True,
-                "merchant_id": merchant_id,
-                "orders": cleaned_data
-            }
+        return {
+            "success": True,
+            "merchant_id": merchant_id,
+            "orders": cleaned_data
+        }
 
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(
-                status_code=e.response.status_code,
-                detail=f"Clover API error for merchant {merchant_id}: {e.response.text}"
-            )
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Clover API error for merchant {merchant_id}: {e.response.text}"
+        )
 
 @app.delete("/merchants/{merchant_id}")
 async def remove_merchant(merchant_id: str = Path(..., description="Merchant ID")):
@@ -681,21 +791,21 @@ async def get_orders(limit: Optional[int] = 100):
         "Content-Type": "application/json"
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
+    client = get_clover_client()
+    try:
+        response = await client.get(url, headers=headers, params=params)
+        response.raise_for_status()
 
-            return {
-                "success": True,
-                "data": response.json()
-            }
+        return {
+            "success": True,
+            "data": response.json()
+        }
 
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(
-                status_code=e.response.status_code,
-                detail=f"Clover API error: {e.response.text}"
-            )
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Clover API error: {e.response.text}"
+        )
 
 
 @app.get("/test-connection")
@@ -719,25 +829,25 @@ async def test_clover_connection():
         "Content-Type": "application/json"
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
+    client = get_clover_client()
+    try:
+        response = await client.get(url, headers=headers)
+        response.raise_for_status()
 
-            return {
-                "success": True,
-                "message": "✅ Clover connection working!",
-                "merchant_id": CLOVER_MERCHANT_ID,
-                "token_status": "Valid"
-            }
+        return {
+            "success": True,
+            "message": "✅ Clover connection working!",
+            "merchant_id": CLOVER_MERCHANT_ID,
+            "token_status": "Valid"
+        }
 
-        except httpx.HTTPStatusError as e:
-            return {
-                "success": False,
-                "message": "❌ Clover connection failed",
-                "error": e.response.text,
-                "status_code": e.response.status_code
-            }
+    except httpx.HTTPStatusError as e:
+        return {
+            "success": False,
+            "message": "❌ Clover connection failed",
+            "error": e.response.text,
+            "status_code": e.response.status_code
+        }
 
 # @app.get("/health", tags=["Root"])
 # async def health_check():
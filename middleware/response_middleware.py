@@ -1,21 +1,29 @@
 """
 Response Middleware for automatic response formatting
 """
-from typing import Callable, Any
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from utils.json_response import FastJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
 
 logger = logging.getLogger(__name__)
 
-class ResponseFormatMiddleware(BaseHTTPMiddleware):
+class ResponseFormatMiddleware:
     """
-    Middleware that automatically formats responses to follow the standard format
+    Pure ASGI middleware that guarantees a standard-format error body when an
+    exception escapes the app before the response has started.
+
+    Response bodies are streamed through untouched: the standard envelope is
+    built before serialization by success_response()/error_response(), so
+    nothing is decoded, parsed or re-encoded here.
+
+    The previous BaseHTTPMiddleware version re-parsed JSON bodies to format
+    them, but call_next() hands back a streaming response rather than a
+    JSONResponse, so its formatting never applied; passing bodies through
+    keeps the wire format clients already see.
     """
 
-    def __init__(self, app, exclude_paths: list = None):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, exclude_paths: list = None):
+        self.app = app
         self.exclude_paths = exclude_paths or [
             "/docs",
             "/redoc",
@@ -23,33 +31,28 @@ class ResponseFormatMiddleware(BaseHTTPMiddleware):
             "/favicon.ico"
         ]
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """
-        Process the request and format the response
-        """
-        # Skip formatting for excluded paths
-        if request.url.path in self.exclude_paths:
-            return await call_next(request)
-
-        try:
-            # Process the request
-            response = await call_next(request)
-
-            # Only format JSON responses that aren't already formatted
-            if (isinstance(response, JSONResponse) and
-                response.status_code < 500 and
-                not self._is_already_formatted(response)):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Skip non-HTTP traffic and excluded paths
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
 
-                # Format the response
-                formatted_response = self._format_response(response)
-                return formatted_response
+        response_started = False
 
-            return response
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
+        try:
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             logger.error(f"Error in response middleware: {str(e)}")
+            if response_started:
+                raise
             # Return a formatted error response
-            return JSONResponse(
+            response = FastJSONResponse(
                 content={
                     "success": False,
                     "message": "Internal server error",
@@ -57,85 +60,4 @@ class ResponseFormatMiddleware(BaseHTTPMiddleware):
                 },
                 status_code=500
             )
-
-    def _is_already_formatted(self, response: JSONResponse) -> bool:
-        """
-        Check if the response is already in the standard format
-        """
-        try:
-            content = response.body.decode('utf-8')
-            import json
-            data = json.loads(content)
-
-            # Check if it has the standard format
-            return (
-                isinstance(data, dict) and
-                "success" in data and
-                "message" in data and
-                "data" in data
-            )
-        except:
-            return False
-
-    def _format_response(self, response: JSONResponse) -> JSONResponse:
-        """
-        Format the response to follow the standard format
-        """
-        try:
-            import json
-            content = response.body.decode('utf-8')
-            data = json.loads(content)
-
-            # Determine success based on status code
-            success = 200 <= response.status_code < 400
-
-            # Create standard format
-            formatted_data = {
-                "success": success,
-                "message": self._get_message(data, success, response.status_code),
-                "data": data if not self._is_already_formatted(response) else data.get("data", data)
-            }
-
-            return JSONResponse(
-                content=formatted_data,
-                status_code=response.status_code,
-                headers=dict(response.headers)
-            )
-
-        except Exception as e:
-            logger.error(f"Error formatting response: {str(e)}")
-            # Return original response if formatting fails
-            return response
-
-    def _get_message(self, data: Any, success: bool, status_code: int) -> str:
-        """
-        Extract or generate an appropriate message
-        """
-        # If data is a dict and has a message field, use it
-        if isinstance(data, dict) and "message" in data:
-            return data["message"]
-
-        # Generate default messages based on status code
-        if success:
-            if status_code == 200:
-                return "Operation completed successfully"
-            elif status_code == 201:
-                return "Resource created successfully"
-            elif status_code == 204:
-                return "Operation completed successfully"
-        else:
-            if status_code == 400:
-                return "Bad request"
-            elif status_code == 401:
-                return "Unauthorized"
-            elif status_code == 403:
-                return "Forbidden"
-            elif status_code == 404:
-                return "Resource not found"
-            elif status_code == 422:
-                return "Validation error"
-            else:
-                return "An error occurred"
-
-        return "Operation completed" if success else "An error occurred"
-
+            await response(scope, receive, send)
@@ -18,6 +18,15 @@ class Cart(Base):
     subtotal = Column(Float, default=0.0)
     total_amount = Column(Float, default=0.0)
 
+    # Clover order sync
+    clover_order_id = Column(String(64), nullable=True)
+    clover_idempotency_key = Column(String(64), nullable=True, unique=True)  # reused by every retry of the checkout
+    synced_at = Column(DateTime, nullable=True)
+    # Set before pushing lines/modifiers and cleared once Clover confirmed every one;
+    # while set, the next sync reads the order back before pushing again
+    clover_items_push_started_at = Column(DateTime, nullable=True)
+    clover_modifiers_push_started_at = Column(DateTime, nullable=True)
+
     # Timestamps
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
@@ -46,6 +55,9 @@ class CartItem(Base):
     # Calculated totals
     line_total = Column(Float, nullable=False)  # price * quantity
 
+    # Clover line item created for this cart item by the order sync
+    clover_line_item_id = Column(String(64), nullable=True)
+
     # Metadata
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
@@ -70,6 +82,9 @@ class CartItemModifier(Base):
     name = Column(String(255), nullable=False)
     price = Column(Float, default=0.0)  # Additional cost
 
+    # Clover modification created for this modifier by the order sync
+    clover_modification_id = Column(String(64), nullable=True)
+
     # Metadata
     created_at = Column(DateTime, server_default=func.now())
 
@@ -0,0 +1,104 @@
+# models/catalog.py
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, DateTime, Index, UniqueConstraint, func
+from database.database import Base
+
+
+# Local, normalized copy of the Clover catalog. Rows are keyed by
+# (clover_merchant_id, clover_*_id) and kept current by services/catalog_sync_service.py.
+# `raw_json` holds the Clover element as synced so reads can return Clover-shaped payloads.
+
+class CatalogCategory(Base):
+    __tablename__ = 'catalog_categories'
+    __table_args__ = (
+        UniqueConstraint('clover_merchant_id', 'clover_category_id', name='uq_catalog_categories_merchant_category'),
+        Index('ix_catalog_categories_merchant_sort', 'clover_merchant_id', 'sort_order'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    clover_merchant_id = Column(String(64), nullable=False)
+    clover_category_id = Column(String(64), nullable=False)
+    name = Column(String(255), nullable=True)
+    sort_order = Column(Integer, nullable=True)
+    modified_time = Column(BigInteger, nullable=True)  # Clover modifiedTime (epoch ms)
+    raw_json = Column(Text, nullable=True)
+    synced_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class CatalogItem(Base):
+    __tablename__ = 'catalog_items'
+    __table_args__ = (
+        UniqueConstraint('clover_merchant_id', 'clover_item_id', name='uq_catalog_items_merchant_item'),
+        Index('ix_catalog_items_merchant_modified', 'clover_merchant_id', 'modified_time'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    clover_merchant_id = Column(String(64), nullable=False)
+    clover_item_id = Column(String(64), nullable=False)
+    name = Column(String(255), nullable=True)
+    price = Column(Integer, nullable=True)  # Clover price in cents
+    price_type = Column(String(32), nullable=True)
+    is_hidden = Column(Boolean, default=False)
+    available = Column(Boolean, default=True)
+    modified_time = Column(BigInteger, nullable=True)
+    raw_json = Column(Text, nullable=True)
+    synced_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class CatalogItemCategory(Base):
+    __tablename__ = 'catalog_item_categories'
+    __table_args__ = (
+        UniqueConstraint('clover_merchant_id', 'clover_item_id', 'clover_category_id', name='uq_catalog_item_categories'),
+        Index('ix_catalog_item_categories_category', 'clover_merchant_id', 'clover_category_id'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    clover_merchant_id = Column(String(64), nullable=False)
+    clover_item_id = Column(String(64), nullable=False)
+    clover_category_id = Column(String(64), nullable=False)
+
+
+class CatalogVariant(Base):
+    __tablename__ = 'catalog_variants'
+    __table_args__ = (
+        UniqueConstraint('clover_merchant_id', 'clover_variant_id', name='uq_catalog_variants_merchant_variant'),
+        Index('ix_catalog_variants_merchant_item', 'clover_merchant_id', 'clover_item_id'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    clover_merchant_id = Column(String(64), nullable=False)
+    clover_variant_id = Column(String(64), nullable=False)
+    clover_item_id = Column(String(64), nullable=False)
+    name = Column(String(255), nullable=True)
+    price = Column(Integer, nullable=True)  # cents
+
+
+class CatalogModifierGroup(Base):
+    __tablename__ = 'catalog_modifier_groups'
+    __table_args__ = (
+        UniqueConstraint('clover_merchant_id', 'clover_modifier_group_id', name='uq_catalog_modifier_groups_merchant_group'),
+        Index('ix_catalog_modifier_groups_merchant_modified', 'clover_merchant_id', 'modified_time'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    clover_merchant_id = Column(String(64), nullable=False)
+    clover_modifier_group_id = Column(String(64), nullable=False)
+    name = Column(String(255), nullable=True)
+    min_required = Column(Integer, nullable=True)
+    max_allowed = Column(Integer, nullable=True)
+    modified_time = Column(BigInteger, nullable=True)
+    raw_json = Column(Text, nullable=True)
+    synced_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class CatalogSyncState(Base):
+    __tablename__ = 'catalog_sync_state'
+    __table_args__ = (
+        UniqueConstraint('clover_merchant_id', 'resource', name='uq_catalog_sync_state_merchant_resource'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    clover_merchant_id = Column(String(64), nullable=False)
+    resource = Column(String(32), nullable=False)  # items, categories, modifier_groups
+    last_modified_time = Column(BigInteger, nullable=True)  # incremental cursor (epoch ms)
+    last_synced_at = Column(DateTime, nullable=True)
+    last_full_sync_at = Column(DateTime, nullable=True)
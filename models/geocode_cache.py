@@ -0,0 +1,20 @@
+# models/geocode_cache.py
+from sqlalchemy import Column, Integer, String, Float, DateTime, func
+from database.database import Base
+
+
+# Address -> coordinate cache for services/geocoding_service.py. Rows are keyed by
+# the SHA-256 of the normalized address, so "12 Main St." and "12 main st" share a row.
+# A row with NULL coordinates records a lookup Nominatim could not resolve.
+
+class GeocodeCache(Base):
+    __tablename__ = 'geocode_cache'
+
+    id = Column(Integer, primary_key=True, index=True)
+    address_hash = Column(String(64), unique=True, nullable=False)
+    normalized_address = Column(String(512), nullable=False)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
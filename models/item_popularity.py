@@ -0,0 +1,29 @@
+# models/item_popularity.py
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, UniqueConstraint, func
+from database.database import Base
+
+
+# Per-item order/cart counters behind FoodSuggestionService, maintained by
+# services/item_popularity_service.py on cart and order writes. dietary_type is
+# stored lowercase (vegetarian, non-vegetarian, vegan, unknown) so lookups can
+# use ix_item_popularity_diet_score instead of LOWER(...) scans.
+
+class ItemPopularity(Base):
+    __tablename__ = 'item_popularity'
+    __table_args__ = (
+        UniqueConstraint('clover_merchant_id', 'clover_item_id', name='uq_item_popularity_merchant_item'),
+        Index('ix_item_popularity_diet_score', 'dietary_type', 'score'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    clover_merchant_id = Column(String(64), nullable=False)
+    clover_item_id = Column(String(64), nullable=False)
+    dietary_type = Column(String(32), nullable=False, default="unknown")
+    item_name = Column(String(255), nullable=True)
+    description = Column(String(255), nullable=True)
+    category = Column(String(255), nullable=True)
+    price = Column(Float, nullable=True)  # dollars
+    order_count = Column(Integer, nullable=False, default=0)
+    cart_count = Column(Integer, nullable=False, default=0)
+    score = Column(Float, nullable=False, default=0.0)  # order_count * ORDER_WEIGHT + cart_count
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
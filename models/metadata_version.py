@@ -0,0 +1,15 @@
+# models/metadata_version.py
+from sqlalchemy import Column, Integer, String, DateTime, func
+from database.database import Base
+
+
+# One row per in-process metadata cache (e.g. "question_flow"). Admin writes bump
+# `version`; every worker compares it with the version of its own snapshot and
+# reloads only when they differ, so the check is a single primary-key read.
+
+class MetadataVersion(Base):
+    __tablename__ = 'metadata_versions'
+
+    name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
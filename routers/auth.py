@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from database.database import SessionLocal
+from database.database import get_db
 from models.user import User
 from models.user_schema import MobileLogin, OTPVerify, OTPVerifyRequest, RegisterRequest
 from models.otp import OTP
@@ -13,13 +13,6 @@ router = APIRouter()
 
 STATIC_OTP = "123456"  # Static OTP for now
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/send-otp")
 # def send_otp(data: MobileLogin):
 #     mobile = data.mobile
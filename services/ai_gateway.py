@@ -0,0 +1,172 @@
+"""
+Bounded, timeout-aware execution of blocking LLM SDK calls (Gemini / OpenAI)
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PROVIDER_SETTINGS = {
+    "gemini": {
+        "max_concurrency": int(os.getenv("AI_GEMINI_MAX_CONCURRENCY", "8")),
+        "timeout": float(os.getenv("AI_GEMINI_TIMEOUT", "20")),
+    },
+    "openai": {
+        "max_concurrency": int(os.getenv("AI_OPENAI_MAX_CONCURRENCY", "8")),
+        "timeout": float(os.getenv("AI_OPENAI_TIMEOUT", "20")),
+    },
+}
+
+
+class AIGatewayTimeout(TimeoutError):
+    """The provider call did not finish (queue wait included) within its timeout"""
+
+
+class _Provider:
+    """One provider's worker pool and counters; the pool size is its concurrency limit"""
+
+    def __init__(self, name: str, max_concurrency: int, timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"ai-{name}")
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "timeout_seconds": self.timeout,
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+                "calls": self.calls,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "cancelled": self.cancelled,
+                "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+                "max_ms": round(self.max_ms, 2),
+            }
+
+
+class AIGateway:
+    """
+    Runs blocking SDK calls (model.generate_content, chat.completions.create)
+    on a dedicated thread pool per provider, so they never block the event loop
+    and one provider's slowness cannot starve the other or the default threadpool.
+
+    - call(): for code already running in a worker thread (e.g. ConversationService
+      via run_in_threadpool)
+    - run(): for async routes; awaiting it never blocks the loop
+
+    Both enforce the provider timeout, which includes time spent queued. A call
+    that times out or is cancelled while still queued never reaches the
+    provider. A call that is already running cannot be interrupted, so callers
+    should also pass the SDK's own timeout (see timeout_for) to free the thread.
+    """
+
+    def __init__(self, settings: Dict[str, Dict[str, Any]] = PROVIDER_SETTINGS):
+        self._providers = {name: _Provider(name, **config) for name, config in settings.items()}
+
+    def _provider(self, provider: str) -> _Provider:
+        try:
+            return self._providers[provider]
+        except KeyError:
+            raise ValueError(f"Unknown AI provider: {provider}")
+
+    def timeout_for(self, provider: str) -> float:
+        return self._provider(provider).timeout
+
+    def _submit(self, p: _Provider, fn: Callable[..., T], args: tuple, kwargs: dict) -> Future:
+        def task():
+            with p.lock:
+                p.queued -= 1
+                p.in_flight += 1
+            started = time.perf_counter()
+            failed = False
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                with p.lock:
+                    p.in_flight -= 1
+                    p.calls += 1
+                    p.errors += failed
+                    p.total_ms += elapsed_ms
+                    p.max_ms = max(p.max_ms, elapsed_ms)
+
+        with p.lock:
+            p.queued += 1
+        return p.executor.submit(task)
+
+    def _abandon(self, p: _Provider, future: Future, timed_out: bool) -> None:
+        # cancel() only succeeds while the call is still queued
+        was_queued = future.cancel()
+        with p.lock:
+            if was_queued:
+                p.queued -= 1
+            if timed_out:
+                p.timeouts += 1
+            else:
+                p.cancelled += 1
+
+    def call(self, provider: str, fn: Callable[..., T], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> T:
+        """Blocking call with the provider's concurrency limit and timeout"""
+        p = self._provider(provider)
+        timeout = timeout or p.timeout
+        future = self._submit(p, fn, args, kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._abandon(p, future, timed_out=True)
+            logger.warning(f"{provider} call timed out after {timeout}s")
+            raise AIGatewayTimeout(f"{provider} call timed out after {timeout}s")
+
+    async def run(self, provider: str, fn: Callable[..., T], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> T:
+        """Awaitable call with the provider's concurrency limit and timeout; cancelling the task drops a queued call"""
+        p = self._provider(provider)
+        timeout = timeout or p.timeout
+        future = self._submit(p, fn, args, kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._abandon(p, future, timed_out=True)
+            logger.warning(f"{provider} call timed out after {timeout}s")
+            raise AIGatewayTimeout(f"{provider} call timed out after {timeout}s")
+        except asyncio.CancelledError:
+            self._abandon(p, future, timed_out=False)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: p.stats() for name, p in self._providers.items()}
+
+    def shutdown(self) -> None:
+        """Drop queued calls and stop accepting new ones (called on app shutdown)"""
+        for p in self._providers.values():
+            p.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Create a singleton instance
+ai_gateway = AIGateway()
@@ -0,0 +1,209 @@
+"""
+Application-scoped AI provider clients, model selection per task, and per-task usage metrics
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import google.generativeai as genai
+import openai
+from dotenv import load_dotenv
+
+from services.ai_gateway import ai_gateway
+
+load_dotenv()
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+
+@dataclass(frozen=True)
+class TaskConfig:
+    provider: str
+    model: str
+
+
+# The prompts and response parsing are provider specific, so only the model is
+# configurable per task: AI_MODEL_<TASK>, e.g. AI_MODEL_ANSWER_CLASSIFICATION=gemini-2.5-flash-lite
+TASKS: Dict[str, TaskConfig] = {
+    "answer_classification": TaskConfig("gemini", os.getenv("AI_MODEL_ANSWER_CLASSIFICATION", "gemini-2.5-flash")),
+    "text_analysis": TaskConfig("openai", os.getenv("AI_MODEL_TEXT_ANALYSIS", "gpt-4o-mini")),
+    "language_detection": TaskConfig("gemini", os.getenv("AI_MODEL_LANGUAGE_DETECTION", "gemini-2.5-flash")),
+    "service_detection": TaskConfig("gemini", os.getenv("AI_MODEL_SERVICE_DETECTION", "gemini-2.5-flash")),
+}
+
+# USD per 1M tokens (input, output). List prices at the time of writing; override
+# or extend with AI_MODEL_PRICES='{"model": [input, output]}'.
+MODEL_PRICES: Dict[str, List[float]] = {
+    "gemini-2.5-pro": [1.25, 10.0],
+    "gemini-2.5-flash": [0.30, 2.50],
+    "gemini-2.5-flash-lite": [0.10, 0.40],
+    "gpt-4o": [2.50, 10.0],
+    "gpt-4o-mini": [0.15, 0.60],
+}
+MODEL_PRICES.update(json.loads(os.getenv("AI_MODEL_PRICES", "{}")))
+
+# Recent latencies kept per task for percentiles
+AI_USAGE_LATENCY_SAMPLES = int(os.getenv("AI_USAGE_LATENCY_SAMPLES", "500"))
+
+
+class _TaskUsage:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+        self.latencies = deque(maxlen=AI_USAGE_LATENCY_SAMPLES)
+
+
+class AIProviderRegistry:
+    """
+    Long-lived provider clients shared by every analyzer and detection service:
+    genai is configured once, one GenerativeModel is kept per model name, and
+    one OpenAI client is reused (it pools its HTTP connections).
+
+    complete() / acomplete() run a task's prompt on its configured model through
+    the AI gateway (concurrency limit + timeout) and record latency, tokens and
+    estimated cost per task.
+    """
+
+    def __init__(self, tasks: Dict[str, TaskConfig] = TASKS):
+        self.tasks = tasks
+        self._lock = threading.Lock()
+        self._gemini_configured = False
+        self._gemini_models: Dict[str, Any] = {}
+        self._openai_client = None
+        self._usage: Dict[str, _TaskUsage] = {task: _TaskUsage() for task in tasks}
+
+    def task_config(self, task: str) -> TaskConfig:
+        try:
+            return self.tasks[task]
+        except KeyError:
+            raise ValueError(f"Unknown AI task: {task}")
+
+    def get_gemini_model(self, model_name: str):
+        with self._lock:
+            if not self._gemini_configured:
+                if not GEMINI_API_KEY:
+                    raise ValueError("GEMINI_API_KEY not found in environment variables")
+                genai.configure(api_key=GEMINI_API_KEY)
+                self._gemini_configured = True
+            model = self._gemini_models.get(model_name)
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                self._gemini_models[model_name] = model
+            return model
+
+    def get_openai_client(self):
+        with self._lock:
+            if self._openai_client is None:
+                if not OPENAI_API_KEY:
+                    raise ValueError("OPENAI_API_KEY not found in environment variables")
+                # The client timeout frees gateway workers whose callers already gave up
+                self._openai_client = openai.OpenAI(api_key=OPENAI_API_KEY, timeout=ai_gateway.timeout_for("openai"))
+            return self._openai_client
+
+    def _request(self, config: TaskConfig, prompt: str, system: Optional[str], params: Dict[str, Any]):
+        """(callable, args, kwargs) for one provider request"""
+        if config.provider == "gemini":
+            model = self.get_gemini_model(config.model)
+            contents = f"{system}\n\n{prompt}" if system else prompt
+            return model.generate_content, (contents,), {
+                "request_options": {"timeout": ai_gateway.timeout_for("gemini")},
+                **params,
+            }
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        return self.get_openai_client().chat.completions.create, (), {
+            "model": config.model,
+            "messages": messages,
+            **params,
+        }
+
+    @staticmethod
+    def _parse(config: TaskConfig, response) -> tuple:
+        """(text, input_tokens, output_tokens)"""
+        if config.provider == "gemini":
+            usage = getattr(response, "usage_metadata", None)
+            return (
+                response.text.strip(),
+                getattr(usage, "prompt_token_count", 0) or 0,
+                getattr(usage, "candidates_token_count", 0) or 0,
+            )
+        usage = getattr(response, "usage", None)
+        return (
+            response.choices[0].message.content.strip(),
+            getattr(usage, "prompt_tokens", 0) or 0,
+            getattr(usage, "completion_tokens", 0) or 0,
+        )
+
+    def _record(self, task: str, config: TaskConfig, elapsed_ms: float, input_tokens: int = 0,
+                output_tokens: int = 0, failed: bool = False) -> None:
+        input_price, output_price = MODEL_PRICES.get(config.model, [0.0, 0.0])
+        with self._lock:
+            usage = self._usage[task]
+            usage.calls += 1
+            usage.errors += failed
+            usage.input_tokens += input_tokens
+            usage.output_tokens += output_tokens
+            usage.cost_usd += (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+            usage.latencies.append(elapsed_ms)
+
+    def complete(self, task: str, prompt: str, system: Optional[str] = None, **params: Any) -> str:
+        """Blocking completion for code already running in a worker thread"""
+        config = self.task_config(task)
+        started = time.perf_counter()
+        try:
+            fn, args, kwargs = self._request(config, prompt, system, params)
+            text, input_tokens, output_tokens = self._parse(config, ai_gateway.call(config.provider, fn, *args, **kwargs))
+        except Exception:
+            self._record(task, config, (time.perf_counter() - started) * 1000, failed=True)
+            raise
+        self._record(task, config, (time.perf_counter() - started) * 1000, input_tokens, output_tokens)
+        return text
+
+    async def acomplete(self, task: str, prompt: str, system: Optional[str] = None, **params: Any) -> str:
+        """Awaitable completion for async routes"""
+        config = self.task_config(task)
+        started = time.perf_counter()
+        try:
+            fn, args, kwargs = self._request(config, prompt, system, params)
+            text, input_tokens, output_tokens = self._parse(config, await ai_gateway.run(config.provider, fn, *args, **kwargs))
+        except Exception:
+            self._record(task, config, (time.perf_counter() - started) * 1000, failed=True)
+            raise
+        self._record(task, config, (time.perf_counter() - started) * 1000, input_tokens, output_tokens)
+        return text
+
+    def usage(self) -> Dict[str, Any]:
+        """Per-task latency, token and estimated cost summary"""
+        with self._lock:
+            summary = {}
+            for task, usage in self._usage.items():
+                config = self.tasks[task]
+                latencies = sorted(usage.latencies)
+                summary[task] = {
+                    "provider": config.provider,
+                    "model": config.model,
+                    "calls": usage.calls,
+                    "errors": usage.errors,
+                    "latency_ms": {
+                        "p50": round(latencies[len(latencies) // 2], 1) if latencies else 0.0,
+                        "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1) if latencies else 0.0,
+                        "max": round(latencies[-1], 1) if latencies else 0.0,
+                    },
+                    "input_tokens": usage.input_tokens,
+                    "output_tokens": usage.output_tokens,
+                    "cost_usd": round(usage.cost_usd, 6),
+                    "cost_per_call_usd": round(usage.cost_usd / usage.calls, 8) if usage.calls else 0.0,
+                }
+            return summary
+
+
+# Create a singleton instance
+ai_providers = AIProviderRegistry()
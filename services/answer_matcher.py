@@ -0,0 +1,301 @@
+"""
+Tiered local answer matcher used before falling back to the Gemini/OpenAI analyzers
+"""
+import math
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from helpers.voice_matcher import VARIATION_MAP
+from services.classification_cache import normalize_text
+from services.question_flow import QuestionFlowSnapshot, question_flow
+
+load_dotenv()
+
+# Minimum trigram cosine similarity for a fuzzy match to be trusted without the LLM
+LOCAL_MATCH_THRESHOLD = float(os.getenv("LOCAL_MATCH_THRESHOLD", "0.8"))
+# Required lead of the best answer over the runner-up, so near-ties go to the LLM
+LOCAL_MATCH_MARGIN = float(os.getenv("LOCAL_MATCH_MARGIN", "0.1"))
+ANSWER_INDEX_CACHE_SIZE = int(os.getenv("ANSWER_INDEX_CACHE_SIZE", "256"))
+
+TIERS = ("exact", "alias", "fuzzy", "llm")
+
+# A phrase found next to one of these is left to the LLM: negations ("not veg")
+# and suggestion requests ("suggest something veg"), which Gemini labels SUGGESTION_REQUEST
+DEFER_WORDS = {
+    "not", "no", "dont", "don't", "never", "without", "nahi", "nahin", "na",
+    "suggest", "suggestion", "suggestions", "recommend", "recommendation", "recommendations",
+    "what", "which", "help",
+}
+# A word starting with one of these negates what follows ("non vegetarian", "nonveg"),
+# so it must be part of the matched phrase for a local match to stand
+NEGATING_PREFIXES = ("non",)
+
+
+@dataclass
+class LocalMatch:
+    answer_key: str
+    score: float
+    tier: str
+    phrase: str
+
+
+def _fold(text: Optional[str]) -> str:
+    """
+    normalize_text with hyphens folded into spaces: speech-to-text and typing
+    produce "non vegetarian" as often as "non-vegetarian", so both must index
+    and match as the same phrase
+    """
+    return " ".join(normalize_text(text).replace("-", " ").split())
+
+
+def _defers(word: str) -> bool:
+    return word in DEFER_WORDS or word.startswith(NEGATING_PREFIXES)
+
+
+def _drops_negation(text: str, phrase: str) -> bool:
+    """True when `text` has a "non..." word but the phrase matched inside it has none"""
+    def negated(words: str) -> bool:
+        return any(word.startswith(NEGATING_PREFIXES) for word in words.split())
+    return negated(text) and not negated(phrase)
+
+
+def _variations(phrase: str) -> List[str]:
+    # Whole-word match on the hyphenated form, unlike get_common_variations'
+    # substring test, so "non-vegetarian" does not also pick up the "vegetarian" aliases
+    padded = f" {phrase} "
+    return [
+        variation
+        for key, values in VARIATION_MAP.items() if f" {key} " in padded
+        for variation in values
+    ]
+
+
+def _trigrams(phrase: str) -> Counter:
+    padded = f"  {phrase} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class AnswerIndex:
+    """
+    Precompiled phrases for one answer set: answer texts, their translations and
+    the common variations from helpers.voice_matcher, all normalized once.
+
+    - exact: whole input equals a phrase
+    - alias: a phrase appears as a run of words inside the input
+    - fuzzy: character-trigram cosine similarity over every phrase
+    """
+
+    def __init__(self, answers: Iterable[Dict[str, Any]]):
+        self.answers: List[Dict[str, str]] = []
+        self.answer_texts: Dict[str, str] = {}
+        # Own texts/translations outrank variations, so "Hungry" keeps "hungry"
+        # even though "Super Hungry" lists it as a variation
+        primary: Dict[str, set] = defaultdict(set)
+        aliases: Dict[str, set] = defaultdict(set)
+
+        for answer in answers:
+            answer_key = answer["answer_key"]
+            answer_text = normalize_text(answer.get("answer_text"))
+            self.answer_texts[answer_key] = answer.get("answer_text") or ""
+            self.answers.append({"answer_key": answer_key, "answer_text": self.answer_texts[answer_key]})
+            for text in [answer_text, *(answer.get("translations") or [])]:
+                phrase = _fold(text)
+                if phrase:
+                    primary[phrase].add(answer_key)
+            for text in [answer_key.replace("_", " "), *_variations(answer_text)]:
+                phrase = _fold(text)
+                if phrase:
+                    aliases[phrase].add(answer_key)
+
+        # A phrase claimed by two answers at the same level (e.g. "very hungry") cannot decide alone
+        self.phrases: Dict[str, str] = {}
+        for phrase, keys in aliases.items():
+            if len(keys) == 1 and phrase not in primary:
+                self.phrases[phrase] = next(iter(keys))
+        for phrase, keys in primary.items():
+            if len(keys) == 1:
+                self.phrases[phrase] = next(iter(keys))
+        self.ambiguous = set(primary) | set(aliases)
+        self.ambiguous.difference_update(self.phrases)
+        self.max_phrase_words = max((len(p.split()) for p in self.phrases.keys() | self.ambiguous), default=0)
+
+        self._vectors: List[Tuple[str, str, Counter, float]] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        for phrase, answer_key in self.phrases.items():
+            vector = _trigrams(phrase)
+            position = len(self._vectors)
+            self._vectors.append((phrase, answer_key, vector, math.sqrt(sum(v * v for v in vector.values()))))
+            for gram in vector:
+                self._postings[gram].append(position)
+
+    def match_exact(self, text: str) -> Optional[LocalMatch]:
+        answer_key = self.phrases.get(text)
+        return LocalMatch(answer_key, 1.0, "exact", text) if answer_key else None
+
+    def match_alias(self, text: str) -> Optional[LocalMatch]:
+        """
+        Longest phrases first. Gives up if the input names two different answers,
+        contains an ambiguous phrase, or has a DEFER_WORDS word or a "non..."
+        word outside the match.
+        """
+        words = text.split()
+        if not words or not self.max_phrase_words:
+            return None
+        covered = [False] * len(words)
+        found: Dict[str, str] = {}
+        for size in range(min(self.max_phrase_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                if any(covered[start:start + size]):
+                    continue
+                phrase = " ".join(words[start:start + size])
+                if phrase in self.ambiguous:
+                    return None
+                answer_key = self.phrases.get(phrase)
+                if answer_key is None:
+                    continue
+                for i in range(start, start + size):
+                    covered[i] = True
+                found.setdefault(answer_key, phrase)
+        if len(found) != 1:
+            return None
+        if any(_defers(word) for word, used in zip(words, covered) if not used):
+            return None
+        answer_key, phrase = next(iter(found.items()))
+        return LocalMatch(answer_key, 1.0, "alias", phrase)
+
+    def match_fuzzy(self, text: str) -> Tuple[Optional[LocalMatch], float]:
+        """Best match by trigram cosine, plus its lead over the best other answer"""
+        query = _trigrams(text)
+        query_norm = math.sqrt(sum(v * v for v in query.values()))
+        if not query_norm:
+            return None, 0.0
+
+        dots: Dict[int, int] = defaultdict(int)
+        for gram, count in query.items():
+            for position in self._postings.get(gram, ()):
+                dots[position] += count * self._vectors[position][2][gram]
+
+        best_per_answer: Dict[str, Tuple[float, str]] = {}
+        for position, dot in dots.items():
+            phrase, answer_key, _, norm = self._vectors[position]
+            score = dot / (query_norm * norm)
+            if score > best_per_answer.get(answer_key, (0.0, ""))[0]:
+                best_per_answer[answer_key] = (score, phrase)
+        if not best_per_answer:
+            return None, 0.0
+
+        ranked = sorted(best_per_answer.items(), key=lambda item: item[1][0], reverse=True)
+        answer_key, (score, phrase) = ranked[0]
+        runner_up = ranked[1][1][0] if len(ranked) > 1 else 0.0
+        return LocalMatch(answer_key, round(score, 4), "fuzzy", phrase), score - runner_up
+
+    def match(
+        self,
+        user_text: str,
+        threshold: float = LOCAL_MATCH_THRESHOLD,
+        margin: float = LOCAL_MATCH_MARGIN,
+    ) -> Optional[LocalMatch]:
+        text = _fold(user_text)
+        if not text:
+            return None
+        result = self.match_exact(text) or self.match_alias(text)
+        if result:
+            return result
+        result, lead = self.match_fuzzy(text)
+        if result and result.score >= threshold and lead >= margin and not _drops_negation(text, result.phrase):
+            return result
+        return None
+
+
+class AnswerMatcher:
+    """
+    Holds one compiled AnswerIndex per question_key and records which tier
+    resolved each input; "llm" counts the inputs that had to go to the model.
+
+    An index is compiled from the question flow snapshot the first time its
+    question is matched and reused until that snapshot is replaced (admin
+    writes, a version change seen from another worker, or the snapshot TTL)
+    or invalidate() is called.
+    """
+
+    def __init__(self, max_indexes: int = ANSWER_INDEX_CACHE_SIZE):
+        self.max_indexes = max_indexes
+        self._indexes: "OrderedDict[str, Tuple[AnswerIndex, QuestionFlowSnapshot]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = {tier: 0 for tier in TIERS}
+        self._elapsed_ms = {tier: 0.0 for tier in TIERS}
+        self.builds = 0
+
+    def get_index(self, db: Session, question_key: str) -> AnswerIndex:
+        snapshot = question_flow.get(db)
+        with self._lock:
+            entry = self._indexes.get(question_key)
+            if entry is not None and entry[1] is snapshot:
+                self._indexes.move_to_end(question_key)
+                return entry[0]
+
+        index = AnswerIndex(snapshot.answers_with_translations(question_key))
+        with self._lock:
+            self._indexes[question_key] = (index, snapshot)
+            self._indexes.move_to_end(question_key)
+            self.builds += 1
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def get_answers(self, db: Session, question_key: str) -> List[Dict[str, str]]:
+        """Active answers as [{"answer_key", "answer_text"}], the format the LLM analyzers take"""
+        return self.get_index(db, question_key).answers
+
+    def match(self, db: Session, question_key: str, user_text: str, **options: float) -> Optional[LocalMatch]:
+        """Local match for `user_text`, or None when the caller should ask the LLM"""
+        index = self.get_index(db, question_key)
+        started = time.perf_counter()
+        result = index.match(user_text, **options) if index.answers else None
+        self.record(result.tier if result else "llm", (time.perf_counter() - started) * 1000)
+        return result
+
+    def invalidate(self, question_key: Optional[str] = None) -> int:
+        """Drop the index of one question, or all of them"""
+        with self._lock:
+            if question_key is None:
+                removed = len(self._indexes)
+                self._indexes.clear()
+                return removed
+            return 1 if self._indexes.pop(question_key, None) else 0
+
+    def record(self, tier: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self._hits[tier] += 1
+            self._elapsed_ms[tier] += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self._hits.values())
+            return {
+                "lookups": total,
+                "indexes": len(self._indexes),
+                "index_builds": self.builds,
+                "threshold": LOCAL_MATCH_THRESHOLD,
+                "margin": LOCAL_MATCH_MARGIN,
+                "tiers": {
+                    tier: {
+                        "hits": self._hits[tier],
+                        "hit_rate": round(self._hits[tier] / total, 4) if total else 0.0,
+                        "avg_ms": round(self._elapsed_ms[tier] / self._hits[tier], 4) if self._hits[tier] else 0.0,
+                    }
+                    for tier in TIERS
+                },
+                "local_hit_rate": round((total - self._hits["llm"]) / total, 4) if total else 0.0,
+            }
+
+
+# Create a singleton instance
+answer_matcher = AnswerMatcher()
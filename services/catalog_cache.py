@@ -0,0 +1,195 @@
+"""
+In-process cache for Clover catalog reads (items, categories, modifier groups)
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_CACHE_STALE_TTL = float(os.getenv("CATALOG_CACHE_STALE_TTL", "3600"))
+CATALOG_CACHE_MAX_BYTES = int(os.getenv("CATALOG_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# (clover_merchant_id, resource, expand, limit, offset)
+CacheKey = Tuple[str, str, Optional[str], Optional[int], Optional[int]]
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    size: int
+    fetched_at: float
+
+
+class CatalogCache:
+    """
+    LRU cache with a byte budget and stale-while-revalidate semantics.
+
+    Entries younger than `ttl` are served directly. Entries older than `ttl`
+    but younger than `ttl + stale_ttl` are served immediately while a single
+    background task refreshes them from Clover. Anything older is refetched
+    inline. Concurrent misses for the same key share one Clover request.
+
+    Cached values are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        ttl: float = CATALOG_CACHE_TTL,
+        stale_ttl: float = CATALOG_CACHE_STALE_TTL,
+        max_bytes: int = CATALOG_CACHE_MAX_BYTES,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._current_bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        clover_merchant_id: str,
+        resource: str,
+        expand: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> CacheKey:
+        return (clover_merchant_id, resource, expand or None, limit, offset)
+
+    async def get_or_fetch(self, key: CacheKey, fetcher: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for `key`, calling `fetcher` on a miss"""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            age = now - entry.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self._start_fetch(key, fetcher, background=True)
+                return entry.value
+
+        self.misses += 1
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._start_fetch(key, fetcher, background=False)
+        return await asyncio.shield(future)
+
+    def _start_fetch(self, key: CacheKey, fetcher: Callable[[], Awaitable[Any]], background: bool) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+
+        async def run():
+            try:
+                value = await fetcher()
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                if background:
+                    # Nobody awaits a background refresh; keep serving the stale copy
+                    self.refresh_errors += 1
+                    future.exception()
+                    logger.warning(f"Background catalog refresh failed for {key}: {str(e)}")
+            else:
+                self._store(key, value)
+                if not future.done():
+                    future.set_result(value)
+            finally:
+                self._inflight.pop(key, None)
+
+        loop.create_task(run())
+        return future
+
+    def _store(self, key: CacheKey, value: Any) -> None:
+        try:
+            size = len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            size = 0
+
+        if size > self.max_bytes:
+            logger.info(f"Catalog response for {key} exceeds cache budget ({size} bytes); not cached")
+            self._discard(key)
+            return
+
+        self._discard(key)
+        self._entries[key] = _CacheEntry(value=value, size=size, fetched_at=time.monotonic())
+        self._current_bytes += size
+
+        while self._current_bytes > self.max_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            self._discard(oldest_key)
+            self.evictions += 1
+
+    def _discard(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._current_bytes -= entry.size
+
+    def invalidate(
+        self,
+        clover_merchant_id: Optional[str] = None,
+        resource: Optional[str] = None,
+        expanded: Optional[str] = None,
+    ) -> int:
+        """
+        Drop cached entries. With no arguments everything is cleared;
+        `resource` matches exactly or as a prefix (e.g. "items" also drops "items/ABC").
+        `expanded` limits it to entries fetched with that expansion
+        (e.g. resource="items", expanded="categories").
+        """
+        removed = 0
+        for key in list(self._entries.keys()):
+            merchant_id, key_resource, key_expand = key[0], key[1], key[2]
+            if clover_merchant_id and merchant_id != clover_merchant_id:
+                continue
+            if resource and not (key_resource == resource or key_resource.startswith(f"{resource}/")):
+                continue
+            if expanded and expanded not in (key_expand or "").split(","):
+                continue
+            self._discard(key)
+            removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._current_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "refresh_errors": self.refresh_errors,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+        }
+
+
+# Create a singleton instance
+catalog_cache = CatalogCache()
@@ -0,0 +1,157 @@
+"""
+Sync job that mirrors each merchant's Clover catalog into the local catalog tables
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database.database import SessionLocal
+from helpers.catalog_helper import CatalogHelper
+from services.catalog_cache import catalog_cache
+from services.clover_api import CloverAPI
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SYNC_BATCH_SIZE = int(os.getenv("CATALOG_SYNC_BATCH_SIZE", "500"))
+CATALOG_SYNC_INTERVAL_SECONDS = int(os.getenv("CATALOG_SYNC_INTERVAL_SECONDS", "0"))
+
+# Synced in this order so item -> category links always point at known categories
+SYNC_RESOURCES = [
+    ("categories", None, CatalogHelper.upsert_categories),
+    ("modifier_groups", None, CatalogHelper.upsert_modifier_groups),
+    ("items", "variants,categories,tags", CatalogHelper.upsert_items),
+]
+
+
+class CatalogSyncService:
+    """
+    Pulls Clover catalog resources page by page and bulk-upserts them into
+    the local store.
+
+    Incremental runs only request elements whose `modifiedTime` is at or past
+    the stored cursor; a full run walks everything and prunes rows Clover no
+    longer returns (deletions are not visible to an incremental filter).
+
+    Every call on the synchronous session runs in the threadpool, so a sync
+    (periodic or via POST /clover/catalog/sync) never blocks the event loop.
+    """
+
+    def __init__(self, batch_size: int = CATALOG_SYNC_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def _sync_resource(
+        self,
+        db: Session,
+        clover: CloverAPI,
+        merchant_id: str,
+        resource: str,
+        expand: Optional[str],
+        upsert,
+        full: bool
+    ) -> Dict[str, Any]:
+        state = await run_in_threadpool(CatalogHelper.get_sync_state, db, merchant_id, resource)
+        cursor = state.last_modified_time if (state and not full) else None
+        filter = f"modifiedTime>={cursor}" if cursor else None
+
+        batch: List[Dict[str, Any]] = []
+        seen_ids = set()
+        max_modified = cursor
+        synced = 0
+
+        async for element in clover.iter_elements(resource, expand=expand, filter=filter):
+            batch.append(element)
+            seen_ids.add(element.get("id"))
+            modified = element.get("modifiedTime")
+            if modified is not None and (max_modified is None or modified > max_modified):
+                max_modified = modified
+            if len(batch) >= self.batch_size:
+                await run_in_threadpool(upsert, db, merchant_id, batch)
+                synced += len(batch)
+                batch = []
+
+        if batch:
+            await run_in_threadpool(upsert, db, merchant_id, batch)
+            synced += len(batch)
+
+        def finish() -> int:
+            pruned = CatalogHelper.prune(db, merchant_id, resource, seen_ids) if full else 0
+            CatalogHelper.save_sync_state(db, merchant_id, resource, max_modified, full_sync=full)
+            db.commit()
+            return pruned
+
+        pruned = await run_in_threadpool(finish)
+
+        return {"synced": synced, "pruned": pruned, "cursor": max_modified, "incremental": filter is not None}
+
+    async def sync_merchant(self, db: Session, merchant_id: str, access_token: str, full: bool = False) -> Dict[str, Any]:
+        """Sync categories, modifier groups and items for one merchant"""
+        clover = CloverAPI(merchant_id, access_token)
+        results = {}
+        for resource, expand, upsert in SYNC_RESOURCES:
+            try:
+                results[resource] = await self._sync_resource(db, clover, merchant_id, resource, expand, upsert, full)
+            except Exception:
+                await run_in_threadpool(db.rollback)
+                raise
+            # Cached Clover responses for this resource may now be older than the store
+            catalog_cache.invalidate(merchant_id, resource)
+        return results
+
+    async def sync_all_merchants(self, db: Session, full: bool = False) -> Dict[str, Any]:
+        """Sync every merchant that has a stored Clover token"""
+        query = text("""
+            SELECT m.clover_merchant_id, mt.token
+            FROM merchants m
+            JOIN merchant_tokens mt ON m.id = mt.merchant_id
+            WHERE mt.token IS NOT NULL
+        """)
+        merchants = await run_in_threadpool(lambda: db.execute(query).fetchall())
+
+        results = {}
+        for clover_merchant_id, token in merchants:
+            try:
+                results[clover_merchant_id] = await self.sync_merchant(db, clover_merchant_id, token, full=full)
+            except Exception as e:
+                logger.warning(f"Catalog sync failed for merchant {clover_merchant_id}: {str(e)}")
+                results[clover_merchant_id] = {"error": str(e)}
+        return results
+
+    async def _run_periodically(self, interval_seconds: int) -> None:
+        while True:
+            db = SessionLocal()
+            try:
+                await self.sync_all_merchants(db)
+            except Exception as e:
+                logger.error(f"Periodic catalog sync failed: {str(e)}")
+            finally:
+                await run_in_threadpool(db.close)
+            await asyncio.sleep(interval_seconds)
+
+    def start_periodic_sync(self, interval_seconds: int = CATALOG_SYNC_INTERVAL_SECONDS) -> None:
+        """Start the background incremental sync loop (disabled when the interval is 0)"""
+        if interval_seconds <= 0 or self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run_periodically(interval_seconds))
+        logger.info(f"Catalog sync scheduled every {interval_seconds}s")
+
+    async def stop_periodic_sync(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Create a singleton instance
+catalog_sync_service = CatalogSyncService()
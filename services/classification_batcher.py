@@ -0,0 +1,218 @@
+"""
+Micro-batching and in-flight de-duplication for concurrent LLM answer classifications
+"""
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from services.ai_gateway import ai_gateway
+from services.classification_cache import normalize_text
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# How long the first request for a question waits for others to join its batch; 0 disables batching
+CLASSIFICATION_BATCH_WINDOW_MS = float(os.getenv("CLASSIFICATION_BATCH_WINDOW_MS", "25"))
+CLASSIFICATION_BATCH_MAX_SIZE = int(os.getenv("CLASSIFICATION_BATCH_MAX_SIZE", "16"))
+# Worker threads allowed to wait on one group at once; further callers classify on their own
+CLASSIFICATION_BATCH_MAX_WAITERS = int(os.getenv("CLASSIFICATION_BATCH_MAX_WAITERS", str(CLASSIFICATION_BATCH_MAX_SIZE)))
+
+
+class BatchParseError(ValueError):
+    """The batch reply could not be split into one label per input"""
+
+
+class _Batch:
+    def __init__(self):
+        self.texts: List[str] = []
+        self.futures: List[Future] = []
+        self.text_keys: List[str] = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        # Set when the batch reply was unusable: each owner classifies its own text
+        self.fallback = False
+
+    def add(self, text_key: str, user_text: str, future: Future) -> None:
+        self.text_keys.append(text_key)
+        self.texts.append(user_text)
+        self.futures.append(future)
+
+
+class ClassificationBatcher:
+    """
+    Coalesces classifications that arrive together for the same question and
+    answer set (`group_key`).
+
+    The first caller becomes the batch leader: it waits up to the batching
+    window (or until the batch is full), then makes ONE model call for all
+    collected inputs and hands each caller its own result. A caller whose
+    normalized text is already pending or in flight for the same group just
+    waits for that result instead of adding another item. If the batch reply
+    cannot be parsed, every input is classified on its own instead of failing
+    the whole batch.
+
+    Callers are worker threads (the analyzers run via run_in_threadpool), so
+    coordination uses locks and concurrent.futures.Future. At most
+    `max_waiters` threads wait on one group; callers beyond that skip batching
+    and make their own call, so a slow batch cannot tie up the threadpool.
+    """
+
+    def __init__(
+        self,
+        window_ms: float = CLASSIFICATION_BATCH_WINDOW_MS,
+        max_batch_size: int = CLASSIFICATION_BATCH_MAX_SIZE,
+        max_waiters: int = CLASSIFICATION_BATCH_MAX_WAITERS
+    ):
+        self.window = window_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_waiters = max(1, max_waiters)
+        self._lock = threading.Lock()
+        self._open: Dict[Hashable, _Batch] = {}
+        self._inflight: Dict[Tuple[Hashable, str], Future] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.requests = 0
+        self.deduplicated = 0
+        self.model_calls = 0
+        self.batched_items = 0
+        self.largest_batch = 0
+        self.bypassed = 0
+        self.fallbacks = 0
+
+    def classify(
+        self,
+        group_key: Hashable,
+        user_text: str,
+        run_single: Callable[[str], str],
+        run_batch: Callable[[List[str]], List[str]],
+    ) -> str:
+        """
+        Raw model label for `user_text`. `run_single(text)` is used when the
+        batch ends up with one input; `run_batch(texts)` must return one label
+        per text, in order, and raise BatchParseError for an unusable reply
+        (each input is then retried with `run_single`). Other errors are raised
+        to every caller of the batch.
+        """
+        text_key = normalize_text(user_text)
+        batch: Optional[_Batch] = None
+        owned: Optional[_Batch] = None
+        with self._lock:
+            self.requests += 1
+            waiters = self._waiters.get(group_key, 0)
+            if waiters >= self.max_waiters:
+                self.bypassed += 1
+                self.model_calls += 1
+                future = None
+            else:
+                self._waiters[group_key] = waiters + 1
+                future = self._inflight.get((group_key, text_key))
+                if future is not None:
+                    self.deduplicated += 1
+                else:
+                    future = Future()
+                    self._inflight[(group_key, text_key)] = future
+                    owned = self._open.get(group_key)
+                    if owned is None:
+                        batch = owned = _Batch()
+                        batch.add(text_key, user_text, future)
+                        if self.window > 0 and self.max_batch_size > 1:
+                            self._open[group_key] = batch
+                        else:
+                            batch.full.set()
+                    else:
+                        owned.add(text_key, user_text, future)
+                        if len(owned.texts) >= self.max_batch_size:
+                            del self._open[group_key]
+                            owned.full.set()
+
+        if future is None:
+            return run_single(user_text)
+
+        try:
+            if batch is not None:
+                batch.full.wait(self.window)
+                with self._lock:
+                    if self._open.get(group_key) is batch:
+                        del self._open[group_key]
+                self._execute(group_key, batch, run_single, run_batch)
+
+            # The model calls are bounded by the gateway timeout; these only guard against a lost leader
+            model_timeout = ai_gateway.timeout_for("gemini")
+            if owned is not None:
+                if not owned.done.wait(self.window + model_timeout + 5):
+                    raise TimeoutError("Classification batch did not complete")
+                if owned.fallback:
+                    self._run_fallback(user_text, future, run_single)
+            # A deduplicated caller may also be waiting out the owner's fallback call
+            return future.result(timeout=self.window + 2 * model_timeout + 5)
+        finally:
+            with self._lock:
+                remaining = self._waiters.get(group_key, 1) - 1
+                if remaining > 0:
+                    self._waiters[group_key] = remaining
+                else:
+                    self._waiters.pop(group_key, None)
+
+    def _execute(self, group_key: Hashable, batch: _Batch, run_single, run_batch) -> None:
+        try:
+            if len(batch.texts) == 1:
+                labels = [run_single(batch.texts[0])]
+            else:
+                try:
+                    labels = run_batch(batch.texts)
+                    if len(labels) != len(batch.texts):
+                        raise BatchParseError(
+                            f"Batch classification returned {len(labels)} labels for {len(batch.texts)} inputs"
+                        )
+                except BatchParseError as e:
+                    logger.warning(f"Unusable batch classification reply, classifying {len(batch.texts)} inputs singly: {str(e)}")
+                    batch.fallback = True
+                    with self._lock:
+                        self.fallbacks += 1
+                    return
+            for future, label in zip(batch.futures, labels):
+                future.set_result(label)
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                self.model_calls += 1
+                self.batched_items += len(batch.texts)
+                self.largest_batch = max(self.largest_batch, len(batch.texts))
+                for text_key in batch.text_keys:
+                    self._inflight.pop((group_key, text_key), None)
+            batch.done.set()
+
+    def _run_fallback(self, user_text: str, future: Future, run_single) -> None:
+        with self._lock:
+            self.model_calls += 1
+        try:
+            future.set_result(run_single(user_text))
+        except Exception as e:
+            future.set_exception(e)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch_size": self.max_batch_size,
+                "max_waiters": self.max_waiters,
+                "requests": self.requests,
+                "deduplicated": self.deduplicated,
+                "model_calls": self.model_calls,
+                "avg_batch_size": round(self.batched_items / self.model_calls, 2) if self.model_calls else 0.0,
+                "largest_batch": self.largest_batch,
+                "bypassed": self.bypassed,
+                "fallbacks": self.fallbacks,
+                "calls_saved": self.requests - self.model_calls,
+            }
+
+
+# Create a singleton instance
+classification_batcher = ClassificationBatcher()
@@ -0,0 +1,139 @@
+"""
+In-process cache for LLM answer classifications (Gemini / OpenAI analyzers)
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CLASSIFICATION_CACHE_TTL = float(os.getenv("CLASSIFICATION_CACHE_TTL", "86400"))
+CLASSIFICATION_CACHE_MAX_ENTRIES = int(os.getenv("CLASSIFICATION_CACHE_MAX_ENTRIES", "10000"))
+
+# (provider, question_key, normalized user text, answer-set version)
+ClassificationKey = Tuple[str, str, str, str]
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Returned by get() on a miss, since None is a valid cached classification
+MISS = object()
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Case-, width- and punctuation-insensitive form: " Non  Veg!! " -> "non veg" """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    # Drop punctuation/symbols by Unicode category; a \W regex would also strip
+    # the combining vowel signs of Indic scripts
+    text = "".join(
+        " " if ch != "-" and unicodedata.category(ch)[0] in "PS" else ch
+        for ch in text
+    )
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def answer_set_version(available_answers: Iterable[Dict[str, str]]) -> str:
+    """
+    Short digest of the answer keys and texts offered to the model. Editing,
+    adding or deactivating an answer changes the version, so classifications
+    made against the old answer set are never served again.
+    """
+    digest = hashlib.sha1()
+    for answer_key, answer_text in sorted(
+        (ans.get("answer_key") or "", ans.get("answer_text") or "") for ans in available_answers
+    ):
+        digest.update(f"{answer_key}\x1f{answer_text}\x1e".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class ClassificationCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+
+    The analyzers run in the threadpool, so access is guarded by a lock.
+    Only successful model answers are stored; API errors are never cached.
+    """
+
+    def __init__(self, ttl: float = CLASSIFICATION_CACHE_TTL, max_entries: int = CLASSIFICATION_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[ClassificationKey, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        question_key: str,
+        user_text: str,
+        available_answers: Iterable[Dict[str, str]],
+    ) -> ClassificationKey:
+        # The provider is part of the key because the Gemini and OpenAI prompts
+        # have different output contracts (e.g. SUGGESTION_REQUEST is Gemini-only)
+        return (provider, question_key, normalize_text(user_text), answer_set_version(available_answers))
+
+    def get(self, key: ClassificationKey) -> Any:
+        """Cached classification for `key`, or MISS"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISS
+            value, stored_at = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: ClassificationKey, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, question_key: Optional[str] = None) -> int:
+        """Drop every entry, or only those for one question"""
+        with self._lock:
+            if question_key is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            keys = [key for key in self._entries if key[1] == question_key]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+            }
+
+
+# Create a singleton instance
+classification_cache = ClassificationCache()
@@ -1,6 +1,10 @@
+import asyncio
 import httpx
 import os
+from typing import Any, AsyncIterator, Dict, Optional
 from fastapi import HTTPException
+from services.clover_client import get_clover_client
+from services.catalog_cache import catalog_cache
 
 BASE_URL = os.getenv("CLOVER_BASE_URL", "https://apisandbox.dev.clover.com/v3/merchants")
 
@@ -11,38 +15,55 @@ async def make_clover_api_request(merchant_id: str, access_token: str, endpoint:
     url = f"{BASE_URL}/v3/merchants/{merchant_id}/{endpoint}"
     headers = {"Authorization": f"Bearer {access_token}"}
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()  # Raises HTTPStatusError for 4XX/5XX responses
-            return response.json()
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=503, detail=f"A network error occurred: {e}")
-        except httpx.HTTPStatusError as e:
-            # Pass the error up to be handled by the specific route
-            raise HTTPException(status_code=e.response.status_code, detail=f"Clover API error: {e.response.text}")
+    client = get_clover_client()
+    try:
+        response = await client.get(url, headers=headers, params=params)
+        response.raise_for_status()  # Raises HTTPStatusError for 4XX/5XX responses
+        return response.json()
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=503, detail=f"A network error occurred: {e}")
+    except httpx.HTTPStatusError as e:
+        # Pass the error up to be handled by the specific route
+        raise HTTPException(status_code=e.response.status_code, detail=f"Clover API error: {e.response.text}")
 
 
 async def get_clover_merchant_details(merchant_id: str, access_token: str):
-    """Fetches details for a specific merchant."""
-    return await make_clover_api_request(merchant_id, access_token, "")
+    """Fetches details for a specific merchant (served from the catalog cache when fresh)."""
+    return await catalog_cache.get_or_fetch(
+        catalog_cache.make_key(merchant_id, "merchant"),
+        lambda: make_clover_api_request(merchant_id, access_token, "")
+    )
 
 
 async def get_clover_item_details(merchant_id: str, item_id: str, access_token: str):
     """Fetches details for a specific item, expanding variants."""
-    return await make_clover_api_request(merchant_id, access_token, f"items/{item_id}", params={"expand": "variants"})
+    return await catalog_cache.get_or_fetch(
+        catalog_cache.make_key(merchant_id, f"items/{item_id}", "variants"),
+        lambda: make_clover_api_request(merchant_id, access_token, f"items/{item_id}", params={"expand": "variants"})
+    )
 
 
 async def get_clover_categories(merchant_id: str, access_token: str):
-    """Fetches all categories for a given merchant from the Clover API."""
-    return await make_clover_api_request(merchant_id, access_token, "categories")
+    """Fetches all categories for a given merchant from the Clover API, walking every page."""
+    return await catalog_cache.get_or_fetch(
+        catalog_cache.make_key(merchant_id, "categories"),
+        lambda: CloverAPI(merchant_id, access_token).get_all("categories")
+    )
 
 
 async def get_clover_items(merchant_id: str, access_token: str):
     """
     Fetches all items for a merchant, expanding to include variants and categories.
+    Every page is walked, so merchants with more than one page of items get a full menu.
     """
-    return await make_clover_api_request(merchant_id, access_token, "items", params={"expand": "variants,categories"})
+    return await catalog_cache.get_or_fetch(
+        catalog_cache.make_key(merchant_id, "items", "variants,categories"),
+        lambda: CloverAPI(merchant_id, access_token).get_all("items", expand="variants,categories")
+    )
+
+
+CLOVER_PAGE_SIZE = int(os.getenv("CLOVER_PAGE_SIZE", "1000"))  # Clover caps `limit` at 1000
+
 
 class CloverAPI:
     def __init__(self, merchant_id: str, access_token: str):
@@ -50,25 +71,65 @@ class CloverAPI:
         self.access_token = access_token
         self.headers = {"Authorization": f"Bearer {access_token}"}
 
-    async def get_items(self, limit: int = 100, offset: int = 0, expand: str | None = None):
-        url = f"{BASE_URL}/{self.merchant_id}/items"
+    async def _get_page(self, resource: str, limit: int, offset: int, expand: Optional[str] = None, filter: Optional[str] = None):
         params = {"limit": limit, "offset": offset}
         if expand:
             params["expand"] = expand
-        async with httpx.AsyncClient() as client:
-            r = await client.get(url, headers=self.headers, params=params)
-            return r.json()
+        if filter:
+            params["filter"] = filter  # Clover filter syntax, e.g. "modifiedTime>=1700000000000"
+        return await make_clover_api_request(self.merchant_id, self.access_token, resource, params=params)
+
+    async def get_items(self, limit: int = 100, offset: int = 0, expand: str | None = None):
+        return await self._get_page("items", limit, offset, expand)
 
     async def get_categories(self, limit: int = 100, offset: int = 0):
-        url = f"{BASE_URL}/{self.merchant_id}/categories"
-        params = {"limit": limit, "offset": offset}
-        async with httpx.AsyncClient() as client:
-            r = await client.get(url, headers=self.headers, params=params)
-            return r.json()
+        return await self._get_page("categories", limit, offset)
 
     async def get_modifier_groups(self, limit: int = 100, offset: int = 0):
-        url = f"{BASE_URL}/{self.merchant_id}/modifier_groups"
-        params = {"limit": limit, "offset": offset}
-        async with httpx.AsyncClient() as client:
-            r = await client.get(url, headers=self.headers, params=params)
-            return r.json()
+        return await self._get_page("modifier_groups", limit, offset)
+
+    async def iter_elements(
+        self,
+        resource: str,
+        expand: Optional[str] = None,
+        page_size: int = CLOVER_PAGE_SIZE,
+        filter: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield every element of a paginated Clover resource.
+
+        The next page is requested as soon as the current one arrives, so the
+        Clover round trip overlaps with the caller consuming the current page.
+        Pagination stops at the first short page.
+        """
+        offset = 0
+        next_page = asyncio.ensure_future(self._get_page(resource, page_size, offset, expand, filter))
+        try:
+            while next_page is not None:
+                page = await next_page
+                elements = page.get("elements", [])
+
+                next_page = None
+                if len(elements) >= page_size:
+                    offset += page_size
+                    next_page = asyncio.ensure_future(self._get_page(resource, page_size, offset, expand, filter))
+
+                for element in elements:
+                    yield element
+        finally:
+            # Consumer stopped early (or a page failed): drop the prefetch
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+    def iter_items(self, expand: Optional[str] = None, page_size: int = CLOVER_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        return self.iter_elements("items", expand=expand, page_size=page_size)
+
+    def iter_categories(self, page_size: int = CLOVER_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        return self.iter_elements("categories", page_size=page_size)
+
+    def iter_modifier_groups(self, expand: Optional[str] = None, page_size: int = CLOVER_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        return self.iter_elements("modifier_groups", expand=expand, page_size=page_size)
+
+    async def get_all(self, resource: str, expand: Optional[str] = None, page_size: int = CLOVER_PAGE_SIZE) -> Dict[str, Any]:
+        """Collect every page into a single Clover-shaped {"elements": [...]} payload"""
+        return {"elements": [element async for element in self.iter_elements(resource, expand, page_size)]}
@@ -0,0 +1,160 @@
+"""
+Shared, pooled HTTP client for all Clover API calls
+"""
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CLOVER_HTTP_MAX_CONNECTIONS = int(os.getenv("CLOVER_HTTP_MAX_CONNECTIONS", "100"))
+CLOVER_HTTP_MAX_KEEPALIVE = int(os.getenv("CLOVER_HTTP_MAX_KEEPALIVE", "20"))
+CLOVER_HTTP_MAX_PER_HOST = int(os.getenv("CLOVER_HTTP_MAX_PER_HOST", "50"))
+CLOVER_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("CLOVER_HTTP_KEEPALIVE_EXPIRY", "30"))
+CLOVER_HTTP_CONNECT_TIMEOUT = float(os.getenv("CLOVER_HTTP_CONNECT_TIMEOUT", "5"))
+CLOVER_HTTP_READ_TIMEOUT = float(os.getenv("CLOVER_HTTP_READ_TIMEOUT", "30"))
+CLOVER_HTTP_WRITE_TIMEOUT = float(os.getenv("CLOVER_HTTP_WRITE_TIMEOUT", "30"))
+CLOVER_HTTP_POOL_TIMEOUT = float(os.getenv("CLOVER_HTTP_POOL_TIMEOUT", "10"))
+CLOVER_HTTP2 = os.getenv("CLOVER_HTTP2", "true").lower() in ("1", "true", "yes")
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (pip install httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response stream that releases a per-host slot once the body is closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class _PerHostLimitedTransport(httpx.AsyncBaseTransport):
+    """Caps the number of in-flight requests to any single host"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_per_host: int):
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore_for(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._max_per_host)
+            self._semaphores[host] = semaphore
+        return semaphore
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        semaphore = self._semaphore_for(request.url.host)
+        await semaphore.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+
+        response.stream = _ReleasingStream(response.stream, semaphore.release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class CloverHTTPClient:
+    """
+    Application-scoped wrapper around a single httpx.AsyncClient.
+
+    The underlying client is created on application startup and closed on
+    shutdown, so every Clover call reuses pooled keep-alive connections
+    instead of paying a fresh TCP/TLS handshake per request.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = CLOVER_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = CLOVER_HTTP_MAX_KEEPALIVE,
+        max_connections_per_host: int = CLOVER_HTTP_MAX_PER_HOST,
+        keepalive_expiry: float = CLOVER_HTTP_KEEPALIVE_EXPIRY,
+        http2: bool = CLOVER_HTTP2,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and _http2_available()
+        self.timeout = httpx.Timeout(
+            connect=CLOVER_HTTP_CONNECT_TIMEOUT,
+            read=CLOVER_HTTP_READ_TIMEOUT,
+            write=CLOVER_HTTP_WRITE_TIMEOUT,
+            pool=CLOVER_HTTP_POOL_TIMEOUT,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        transport = _PerHostLimitedTransport(
+            httpx.AsyncHTTPTransport(limits=limits, http2=self.http2),
+            max_per_host=self.max_connections_per_host,
+        )
+        return httpx.AsyncClient(transport=transport, timeout=self.timeout)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the shared client, creating it lazily outside the app lifecycle"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def startup(self) -> None:
+        """Create the pooled client (called from the FastAPI startup event)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        logger.info(
+            "Clover HTTP client started (http2=%s, max_connections=%s, per_host=%s)",
+            self.http2, self.max_connections, self.max_connections_per_host
+        )
+
+    async def shutdown(self) -> None:
+        """Close pooled connections (called from the FastAPI shutdown event)"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        logger.info("Clover HTTP client closed")
+
+
+# Create a singleton instance
+clover_http = CloverHTTPClient()
+
+
+def get_clover_client() -> httpx.AsyncClient:
+    """Shortcut used by routes and services to reach the shared Clover client"""
+    return clover_http.client
@@ -1,21 +1,20 @@
 from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any
 from datetime import datetime
-from models.conversation import ConversationEntry, QuestionMaster, AnswerMaster
-from app.schemas.conversation import ConversationEntryCreate, ConversationEntryResponse
+from models.conversation import ConversationEntry
+from app.schemas.conversation import ConversationEntryCreate, ConversationEntryResponse, QuestionResponse
 from helpers.validators import validate_question_key, validate_answer_key, get_active_answers_for_question
 from helpers.voice_matcher import match_voice_to_answer
-from services.openaiservice_question import OpenAIAnalyzer
-from services.gemini_service import GeminiAnalyzer
+from services.openaiservice_question import get_openai_analyzer
+from services.gemini_service import get_gemini_analyzer
+from services.answer_matcher import answer_matcher
+from services.question_flow import FlowQuestion, question_flow
 from services.food_suggestion_service import FoodSuggestionService
 
 
 class ConversationService:
     """Service layer for handling conversation entries"""
 
-    def __init__(self):
-        ai_analyzer = OpenAIAnalyzer()
-
     @staticmethod
     def create_conversation_entry(
         db: Session,
@@ -23,9 +22,6 @@ class ConversationService:
     ) -> ConversationEntryResponse:
         """Create a new conversation entry with AI analysis"""
 
-        # Create AI analyzer instance
-        ai_analyzer = OpenAIAnalyzer()
-
         print("=== RAW entry_data ===", entry_data)
         print("=== entry_data.dict() ===", entry_data.dict())
         print("=== responseText specifically ===", entry_data.responseText)
@@ -118,8 +114,8 @@ class ConversationService:
         without creating a conversation entry
         """
 
-        # Create AI analyzer instance
-        ai_analyzer = OpenAIAnalyzer()
+        # Shared AI analyzer instance
+        ai_analyzer = get_openai_analyzer()
 
         # Validate question exists
         if not validate_question_key(db, question_key):
@@ -156,11 +152,16 @@ class ConversationService:
             print(f"Question: {question_key}")
 
             try:
-                ai_analyzer = GeminiAnalyzer()
-                available_answers = get_active_answers_for_question(db, question_key)
-
-                if available_answers:
-                    # available_answers is already in the correct format (list of dicts)
+                # In-memory answer index: exact/alias/fuzzy match first; only
+                # low-confidence input reaches Gemini
+                local_match = answer_matcher.match(db, question_key, response_text)
+                available_answers = answer_matcher.get_answers(db, question_key)
+
+                if local_match:
+                    answer_key = local_match.answer_key
+                    print(f"Local {local_match.tier} match: {answer_key} (score {local_match.score})")
+                elif available_answers:
+                    ai_analyzer = get_gemini_analyzer()
                     answer_list = available_answers
 
                     print(f"Available answers: {answer_list}")
@@ -236,11 +237,16 @@ class ConversationService:
 
         matched_answer_key = None
         try:
-            ai_analyzer = GeminiAnalyzer()
-            available_answers = get_active_answers_for_question(db, question_key)
-
-            if available_answers:
-                # available_answers is already in the correct format (list of dicts)
+            # In-memory answer index: exact/alias/fuzzy match first; only
+            # low-confidence input reaches Gemini
+            local_match = answer_matcher.match(db, question_key, voice_text)
+            available_answers = answer_matcher.get_answers(db, question_key)
+
+            if local_match:
+                matched_answer_key = local_match.answer_key
+                print(f"Local {local_match.tier} match: {matched_answer_key} (score {local_match.score})")
+            elif available_answers:
+                ai_analyzer = get_gemini_analyzer()
                 answer_list = available_answers
 
                 print(f"Available answers: {answer_list}")
@@ -314,30 +320,22 @@ class ConversationService:
         db: Session,
         session_id: str,
         current_question_key: Optional[str] = None
-    ) -> Optional[QuestionMaster]:
-        """Get the next question in the wizard flow"""
-
-        if current_question_key:
-            # Get current question order
-            current_question = db.query(QuestionMaster).filter(
-                QuestionMaster.question_key == current_question_key
-            ).first()
-
-            if current_question:
-                # Get next question by order
-                next_question = db.query(QuestionMaster).filter(
-                    QuestionMaster.question_order > current_question.question_order,
-                    QuestionMaster.is_active == True
-                ).order_by(QuestionMaster.question_order).first()
-
-                return next_question
-        else:
-            # Get first question
-            return db.query(QuestionMaster).filter(
-                QuestionMaster.is_active == True
-            ).order_by(QuestionMaster.question_order).first()
+    ) -> Optional[FlowQuestion]:
+        """Get the next question in the wizard flow (served from the question flow snapshot)"""
+        return question_flow.get(db).next_question(current_question_key)
 
-        return None
+    @staticmethod
+    def get_next_question_response(
+        db: Session,
+        session_id: str,
+        current_question_key: Optional[str] = None
+    ) -> Optional[QuestionResponse]:
+        """
+        get_next_question serialized (answers included) while the session is
+        still usable, so async routes can call it through run_sync_helper.
+        """
+        next_question = ConversationService.get_next_question(db, session_id, current_question_key)
+        return QuestionResponse.from_orm(next_question) if next_question else None
 
     @staticmethod
     def get_conversation_history(
@@ -0,0 +1,218 @@
+"""
+Bounded-concurrency, rate-limited fan-out for multi-merchant Clover operations
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+FANOUT_MAX_CONCURRENCY = int(os.getenv("FANOUT_MAX_CONCURRENCY", "10"))
+FANOUT_MAX_RETRIES = int(os.getenv("FANOUT_MAX_RETRIES", "3"))
+FANOUT_BACKOFF_BASE = float(os.getenv("FANOUT_BACKOFF_BASE", "0.5"))
+FANOUT_BACKOFF_MAX = float(os.getenv("FANOUT_BACKOFF_MAX", "8"))
+CLOVER_APP_ID = os.getenv("CLOVER_APP_ID", "default")
+CLOVER_APP_RATE_PER_SECOND = float(os.getenv("CLOVER_APP_RATE_PER_SECOND", "16"))
+CLOVER_APP_BURST = int(os.getenv("CLOVER_APP_BURST", "16"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# Failures that prove the request was never processed, so even a non-idempotent
+# POST can be sent again: throttled by Clover, or no connection was made
+NOT_PROCESSED_STATUS_CODES = {429}
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class RetryableError(Exception):
+    """Raised by a fan-out worker when the call should be retried (429, 5xx, timeouts)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+def raise_for_retryable(response: httpx.Response) -> None:
+    """Turn a throttled or 5xx Clover response into a RetryableError, honouring Retry-After"""
+    if response.status_code not in RETRYABLE_STATUS_CODES:
+        return
+    retry_after = None
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            retry_after = float(header)
+        except ValueError:
+            retry_after = None
+    raise RetryableError(
+        f"Clover API returned {response.status_code}", retry_after=retry_after, status_code=response.status_code
+    )
+
+
+def _was_not_processed(error: Exception) -> bool:
+    if isinstance(error, RetryableError):
+        return error.status_code in NOT_PROCESSED_STATUS_CODES
+    return isinstance(error, NOT_SENT_ERRORS)
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        # The lock makes waiters queue in FIFO order instead of racing for each refill
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+
+
+def get_rate_limiter(app_id: str = CLOVER_APP_ID) -> TokenBucket:
+    """One shared token bucket per Clover app, since Clover rate limits are applied per app"""
+    limiter = _rate_limiters.get(app_id)
+    if limiter is None:
+        limiter = TokenBucket(CLOVER_APP_RATE_PER_SECOND, CLOVER_APP_BURST)
+        _rate_limiters[app_id] = limiter
+    return limiter
+
+
+@dataclass
+class FanOutResult:
+    key: Hashable
+    success: bool
+    value: Any = None
+    error: Optional[str] = None
+    attempts: int = 0
+    # The last attempt may have been applied by Clover (timeout or 5xx on a
+    # non-idempotent call): read the resource back before sending it again
+    ambiguous: bool = False
+
+
+class FanOutExecutor:
+    """
+    Runs one async worker per target with a concurrency cap, a shared per-app
+    token bucket, and jittered exponential backoff on retryable failures.
+
+    Workers signal a retryable failure by raising RetryableError (see
+    raise_for_retryable), httpx.TimeoutException or httpx.TransportError.
+    Any other exception fails that target only; it never aborts the batch.
+
+    Pass idempotent=False for calls that create something (Clover POSTs).
+    They are retried only when the request provably never took effect (429,
+    connection not established). A timeout or 5xx is returned as an
+    `ambiguous` failure instead, because a retry could create a duplicate.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = FANOUT_MAX_CONCURRENCY,
+        max_retries: int = FANOUT_MAX_RETRIES,
+        backoff_base: float = FANOUT_BACKOFF_BASE,
+        backoff_max: float = FANOUT_BACKOFF_MAX,
+        rate_limiter: Optional[TokenBucket] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter: spread retries from many merchants instead of retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def call(self, key: Hashable, worker: Callable[[], Awaitable[Any]], idempotent: bool = True) -> FanOutResult:
+        """Run one worker with rate limiting and retries"""
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.rate_limiter.acquire()
+            try:
+                return FanOutResult(key=key, success=True, value=await worker(), attempts=attempt)
+            except (RetryableError, httpx.TimeoutException, httpx.TransportError) as e:
+                if not idempotent and not _was_not_processed(e):
+                    logger.warning(f"Not retrying {key}, outcome unknown: {str(e) or type(e).__name__}")
+                    return FanOutResult(
+                        key=key, success=False, error=str(e) or type(e).__name__, attempts=attempt, ambiguous=True
+                    )
+                if attempt > self.max_retries:
+                    logger.warning(f"Giving up on {key} after {attempt} attempts: {str(e) or type(e).__name__}")
+                    return FanOutResult(key=key, success=False, error=str(e) or type(e).__name__, attempts=attempt)
+                delay = self._backoff(attempt - 1, getattr(e, "retry_after", None))
+                logger.info(f"Retrying {key} in {delay:.2f}s after: {str(e) or type(e).__name__}")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                return FanOutResult(key=key, success=False, error=str(e), attempts=attempt)
+
+    async def stream(
+        self,
+        targets: Iterable[Any],
+        worker: Callable[[Any], Awaitable[Any]],
+        key: Callable[[Any], Hashable] = lambda target: target,
+        idempotent: bool = True,
+    ) -> AsyncIterator[FanOutResult]:
+        """
+        Yield a FanOutResult per target as soon as it finishes (completion order).
+        At most `max_concurrency` workers run at once; closing the iterator early
+        cancels whatever is still pending.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_one(target):
+            async with semaphore:
+                result = await self.call(key(target), lambda: worker(target), idempotent)
+            await queue.put(result)
+
+        tasks = [asyncio.ensure_future(run_one(target)) for target in targets]
+        try:
+            for _ in range(len(tasks)):
+                yield await queue.get()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def run(
+        self,
+        targets: Iterable[Any],
+        worker: Callable[[Any], Awaitable[Any]],
+        key: Callable[[Any], Hashable] = lambda target: target,
+        idempotent: bool = True,
+    ) -> List[FanOutResult]:
+        """Run every target and return results in input order"""
+        targets = list(targets)
+        results: Dict[Hashable, FanOutResult] = {}
+        async for result in self.stream(targets, worker, key, idempotent):
+            results[result.key] = result
+        return [results[key(target)] for target in targets]
+
+
+# Create a singleton instance
+clover_fanout = FanOutExecutor()
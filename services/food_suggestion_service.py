@@ -1,8 +1,7 @@
 # food_suggestion_service.py
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-import random
+from services.item_popularity_service import item_popularity_service
 
 class FoodSuggestionService:
     """Service for suggesting food items based on dietary preferences"""
@@ -36,18 +35,12 @@ class FoodSuggestionService:
         diet_value = diet_mapping.get(dietary_preference.lower(), 'vegetarian')
 
         try:
-            # Try to get suggestions from order items first
-            suggestions = self._get_suggestions_from_orders(diet_value, limit)
+            # Weighted sample of the most ordered / carted items of this dietary type
+            suggestions = item_popularity_service.suggest(self.db, diet_value, limit)
 
-            # If not enough suggestions from orders, get from cart items
-            if len(suggestions) < limit:
-                cart_suggestions = self._get_suggestions_from_cart(diet_value, limit - len(suggestions))
-                suggestions.extend(cart_suggestions)
-
-            # If still not enough, get from any available items
-            if len(suggestions) < limit:
-                general_suggestions = self._get_general_suggestions(diet_value, limit - len(suggestions))
-                suggestions.extend(general_suggestions)
+            # Nothing recorded yet for this dietary type
+            if not suggestions:
+                return self._get_fallback_suggestions(dietary_preference)
 
             return suggestions[:limit]
 
@@ -55,103 +48,6 @@ class FoodSuggestionService:
             print(f"Error getting food suggestions: {str(e)}")
             return self._get_fallback_suggestions(dietary_preference)
 
-    def _get_suggestions_from_orders(self, diet_value: str, limit: int) -> List[Dict[str, str]]:
-        """Get suggestions from order items table"""
-        try:
-            query = text("""
-                SELECT DISTINCT item_name, item_description, price, category
-                FROM order_items
-                WHERE LOWER(dietary_type) = LOWER(:diet_value)
-                AND item_name IS NOT NULL
-                ORDER BY RANDOM()
-                LIMIT :limit
-            """)
-
-            result = self.db.execute(query, {"diet_value": diet_value, "limit": limit})
-            suggestions = []
-
-            for row in result:
-                suggestions.append({
-                    "item_name": row[0] or "Unknown Item",
-                    "description": row[1] or "Delicious food item",
-                    "price": f"${row[2]}" if row[2] else "Price on request",
-                    "category": row[3] or "Food",
-                    "source": "Popular Orders"
-                })
-
-            return suggestions
-
-        except Exception as e:
-            print(f"Error getting suggestions from orders: {str(e)}")
-            return []
-
-    def _get_suggestions_from_cart(self, diet_value: str, limit: int) -> List[Dict[str, str]]:
-        """Get suggestions from cart items table"""
-        try:
-            query = text("""
-                SELECT DISTINCT item_name, item_description, price, category
-                FROM cart_items
-                WHERE LOWER(dietary_type) = LOWER(:diet_value)
-                AND item_name IS NOT NULL
-                ORDER BY RANDOM()
-                LIMIT :limit
-            """)
-
-            result = self.db.execute(query, {"diet_value": diet_value, "limit": limit})
-            suggestions = []
-
-            for row in result:
-                suggestions.append({
-                    "item_name": row[0] or "Unknown Item",
-                    "description": row[1] or "Delicious food item",
-                    "price": f"${row[2]}" if row[2] else "Price on request",
-                    "category": row[3] or "Food",
-                    "source": "Cart Items"
-                })
-
-            return suggestions
-
-        except Exception as e:
-            print(f"Error getting suggestions from cart: {str(e)}")
-            return []
-
-    def _get_general_suggestions(self, diet_value: str, limit: int) -> List[Dict[str, str]]:
-        """Get general suggestions when specific tables don't have enough data"""
-        try:
-            # Try to get from any table that might have food items
-            query = text("""
-                SELECT DISTINCT item_name, item_description, price, category
-                FROM (
-                    SELECT item_name, item_description, price, category, dietary_type
-                    FROM order_items
-                    UNION ALL
-                    SELECT item_name, item_description, price, category, dietary_type
-                    FROM cart_items
-                ) AS all_items
-                WHERE LOWER(dietary_type) = LOWER(:diet_value)
-                AND item_name IS NOT NULL
-                ORDER BY RANDOM()
-                LIMIT :limit
-            """)
-
-            result = self.db.execute(query, {"diet_value": diet_value, "limit": limit})
-            suggestions = []
-
-            for row in result:
-                suggestions.append({
-                    "item_name": row[0] or "Unknown Item",
-                    "description": row[1] or "Delicious food item",
-                    "price": f"${row[2]}" if row[2] else "Price on request",
-                    "category": row[3] or "Food",
-                    "source": "General"
-                })
-
-            return suggestions
-
-        except Exception as e:
-            print(f"Error getting general suggestions: {str(e)}")
-            return []
-
     def _get_fallback_suggestions(self, dietary_preference: str) -> List[Dict[str, str]]:
         """Fallback suggestions when database queries fail"""
         fallback_suggestions = {
@@ -1,10 +1,12 @@
 # gemini_service.py
 from typing import Optional, List, Dict
-import google.generativeai as genai
 import os
 from sqlalchemy.orm import Session
 import json
 from models.conversation import AnswerMaster
+from services.classification_cache import classification_cache, answer_set_version, MISS
+from services.ai_providers import ai_providers
+from services.classification_batcher import classification_batcher, BatchParseError
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,9 +20,7 @@ class GeminiAnalyzer:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
 
-        # Configure Gemini
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-pro')
+        # Clients and the model come from the shared registry (see AI_MODEL_* settings)
 
     def analyze_user_response(
         self,
@@ -43,13 +43,55 @@ class GeminiAnalyzer:
         if not available_answers:
             return None
 
+        # Repeat phrasings ("veg", "Veg!") against the same answer set skip the model
+        cache_key = classification_cache.make_key("gemini", question_key, user_text, available_answers)
+        cached = classification_cache.get(cache_key)
+        if cached is not MISS:
+            return cached
+
         # Prepare the answer options for the prompt
         answer_options = "\n".join([
             f"- {ans['answer_key']}: {ans['answer_text']}"
             for ans in available_answers
         ])
 
-        prompt = f"""You are an intelligent assistant that categorizes user responses into predefined categories.
+        try:
+            # Concurrent requests for the same question share one Gemini call;
+            # identical in-flight inputs share one result
+            answer = classification_batcher.classify(
+                group_key=(question_key, answer_set_version(available_answers)),
+                user_text=user_text,
+                run_single=lambda text: ai_providers.complete(
+                    "answer_classification", self._build_prompt(text, answer_options)
+                ),
+                run_batch=lambda texts: self._parse_batch_response(
+                    ai_providers.complete("answer_classification", self._build_batch_prompt(texts, answer_options)),
+                    len(texts)
+                )
+            )
+        except Exception as e:
+            print(f"Gemini API error: {str(e)}")
+            return None
+
+        # Validate that the returned answer_key exists in our options
+        valid_keys = [ans['answer_key'] for ans in available_answers]
+        if answer in valid_keys:
+            result = answer
+        elif answer == "NONE":
+            result = "SORRY_DONT_UNDERSTAND"
+        elif answer == "SUGGESTION_REQUEST":
+            result = "SUGGESTION_REQUEST"
+        else:
+            # If Gemini returns something unexpected, return sorry message (not cached)
+            print(f"Gemini returned unexpected answer: {answer}")
+            return "SORRY_DONT_UNDERSTAND"
+
+        classification_cache.set(cache_key, result)
+        return result
+
+    @staticmethod
+    def _build_prompt(user_text: str, answer_options: str) -> str:
+        return f"""You are an intelligent assistant that categorizes user responses into predefined categories.
 
 Given the user's message, determine which category it best fits into.
 
@@ -67,23 +109,48 @@ Instructions:
 
 Response:"""
 
+    @staticmethod
+    def _build_batch_prompt(user_texts: List[str], answer_options: str) -> str:
+        messages = "\n".join(f"{i}. {json.dumps(text, ensure_ascii=False)}" for i, text in enumerate(user_texts, 1))
+        return f"""You are an intelligent assistant that categorizes user responses into predefined categories.
+
+Each numbered line below is a separate message from a different user. Classify every message on its own.
+
+User Messages:
+{messages}
+
+Available Categories:
+{answer_options}
+
+Instructions:
+1. Analyze each message carefully
+2. Match it with the most appropriate category from the list and use its category key (answer_key)
+3. If a user is asking for suggestions, recommendations, or general questions (not selecting a category), use "SUGGESTION_REQUEST"
+4. If no category matches well and it's not a suggestion request, use "NONE"
+5. Return ONLY a JSON object mapping every message number to its label, e.g. {{"1": "answer_key", "2": "NONE"}}
+
+Response:"""
+
+    @staticmethod
+    def _parse_batch_response(response_text: str, count: int) -> List[str]:
+        """Labels in message order from the batch prompt's JSON answer"""
+        # Tolerates a ```json fence or text around the object
         try:
-            response = self.model.generate_content(prompt)
-            answer = response.text.strip()
-
-            # Validate that the returned answer_key exists in our options
-            valid_keys = [ans['answer_key'] for ans in available_answers]
-            if answer in valid_keys:
-                return answer
-            elif answer == "NONE":
-                return "SORRY_DONT_UNDERSTAND"
-            elif answer == "SUGGESTION_REQUEST":
-                return "SUGGESTION_REQUEST"
-            else:
-                # If Gemini returns something unexpected, return sorry message
-                print(f"Gemini returned unexpected answer: {answer}")
-                return "SORRY_DONT_UNDERSTAND"
+            labels = json.loads(response_text[response_text.index("{"):response_text.rindex("}") + 1])
+        except (AttributeError, ValueError) as e:
+            raise BatchParseError(f"Unparseable batch reply: {str(e)}") from e
+        if not isinstance(labels, dict):
+            raise BatchParseError("Batch reply is not a JSON object")
+        # Missing numbers come back as "", which the caller treats as unexpected (not cached)
+        return [str(labels.get(str(i), "")).strip() for i in range(1, count + 1)]
 
-        except Exception as e:
-            print(f"Gemini API error: {str(e)}")
-            return None
+
+_gemini_analyzer: Optional[GeminiAnalyzer] = None
+
+
+def get_gemini_analyzer() -> GeminiAnalyzer:
+    """Shared analyzer instance"""
+    global _gemini_analyzer
+    if _gemini_analyzer is None:
+        _gemini_analyzer = GeminiAnalyzer()
+    return _gemini_analyzer
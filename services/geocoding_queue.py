@@ -0,0 +1,316 @@
+"""
+Background queue that fills merchant_detail coordinates without blocking onboarding
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database.database import SessionLocal, engine
+from models.merchant_detail import MerchantDetail
+from services.geocoding_service import address_hash, geocoding_service, normalize_address
+from services.merchant_geo_index import merchant_geo_index
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Merchants geocoded per batch: one cache query and one commit per batch
+GEOCODING_QUEUE_BATCH_SIZE = int(os.getenv("GEOCODING_QUEUE_BATCH_SIZE", "25"))
+# Pause after the first enqueue so an onboarding burst is handled as one batch
+GEOCODING_QUEUE_BATCH_WAIT_SECONDS = float(os.getenv("GEOCODING_QUEUE_BATCH_WAIT_SECONDS", "0.5"))
+# Merchants without coordinates queued per backfill scan
+GEOCODING_BACKFILL_LIMIT = int(os.getenv("GEOCODING_BACKFILL_LIMIT", "1000"))
+# Seconds between backfill scans by the geocoding worker; they pick up merchants
+# onboarded by other processes and work lost on restart
+GEOCODING_BACKFILL_INTERVAL_SECONDS = float(os.getenv("GEOCODING_BACKFILL_INTERVAL_SECONDS", "30"))
+# "false" keeps this process out of geocoding entirely
+GEOCODING_WORKER_ENABLED = os.getenv("GEOCODING_WORKER_ENABLED", "true").lower() == "true"
+# MySQL named lock held by the one process allowed to call Nominatim
+GEOCODING_WORKER_LOCK_NAME = os.getenv("GEOCODING_WORKER_LOCK_NAME", "geocoding_queue_worker")
+
+
+def merchant_address_key(detail: MerchantDetail) -> Optional[str]:
+    """Cache key of a merchant's address, or None without a street address"""
+    if not detail.address:
+        return None
+    return address_hash(normalize_address(detail.address, detail.city, detail.state, detail.country, detail.postal_code))
+
+
+class GeocodingQueue:
+    """
+    Merchant ids waiting for coordinates, drained by one asyncio worker.
+
+    Write paths call prepare_merchant() before committing a merchant_detail
+    row (clears coordinates of a changed address and fills them straight from
+    the geocode cache when it can) and enqueue() after the commit when a
+    lookup is still needed. The worker takes up to batch_size merchants,
+    collapses duplicate addresses, and resolves them through
+    geocoding_service.geocode_batch, which keeps Nominatim at one request per
+    second. Only ids are queued: the address is read when the batch runs, so
+    a merchant edited while queued is geocoded at its latest address.
+
+    The one-request-per-second limit is per process, so only one process
+    geocodes: on MySQL, the one holding the GEOCODING_WORKER_LOCK_NAME named
+    lock (other processes retry it on every backfill interval and take over
+    if the holder exits). In that process enqueue() wakes the worker
+    directly; elsewhere it is a no-op and the holder's periodic backfill
+    scan picks the merchant up. All database work runs in the threadpool.
+    """
+
+    def __init__(self, batch_size: int = GEOCODING_QUEUE_BATCH_SIZE,
+                 batch_wait: float = GEOCODING_QUEUE_BATCH_WAIT_SECONDS):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        # Insertion-ordered set of merchant_detail ids
+        self._pending: Dict[int, None] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._backfill_task: Optional[asyncio.Task] = None
+        self._lock_connection = None
+        self.is_worker = False
+        self._scan_after_id = 0
+        self.enqueued = 0
+        self.batches = 0
+        self.geocoded = 0
+        self.unresolved = 0
+        self.failed_batches = 0
+
+    def prepare_merchant(self, db: Session, detail: MerchantDetail, previous_key: Optional[str] = None) -> bool:
+        """
+        Call before committing a merchant's address. Drops coordinates that
+        belonged to a previous address and fills them from the cache on a hit.
+        Returns True when the merchant still needs a lookup (enqueue it after commit).
+        """
+        key = merchant_address_key(detail)
+        if key != previous_key:
+            detail.latitude = None
+            detail.longitude = None
+        if key is None or (detail.latitude is not None and detail.longitude is not None):
+            return False
+        try:
+            hit, coordinates = geocoding_service.cached_coordinates(db, key)
+        except Exception as e:
+            logger.warning(f"Geocode cache lookup failed: {str(e)}")
+            return True
+        if coordinates:
+            detail.latitude, detail.longitude = coordinates
+        return not hit
+
+    def enqueue(self, merchant_detail_id: int) -> None:
+        """Queue one merchant for geocoding; returns immediately"""
+        if merchant_detail_id is None or not self.is_worker:
+            # Another process geocodes; its backfill scan finds the merchant
+            return
+        self._pending[merchant_detail_id] = None
+        self.enqueued += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): the next backfill scan picks the merchant up
+            return
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        self._wakeup.set()
+
+    def missing_ids(self, db: Session, limit: int = GEOCODING_BACKFILL_LIMIT, after_id: int = 0) -> List[int]:
+        """Merchants that have an address but no coordinates, by id from after_id"""
+        rows = db.query(MerchantDetail.id).filter(
+            MerchantDetail.id > after_id,
+            MerchantDetail.address.isnot(None),
+            (MerchantDetail.latitude.is_(None)) | (MerchantDetail.longitude.is_(None))
+        ).order_by(MerchantDetail.id).limit(limit).all()
+        return [merchant_detail_id for (merchant_detail_id,) in rows]
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            await asyncio.sleep(self.batch_wait)
+            ids = list(self._pending)[:self.batch_size]
+            for merchant_detail_id in ids:
+                del self._pending[merchant_detail_id]
+            try:
+                await self.process_batch(ids)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Left without coordinates; retried on the next backfill or onboarding
+                self.failed_batches += 1
+                logger.error(f"Geocoding batch of {len(ids)} merchants failed: {str(e)}")
+
+    @staticmethod
+    def _addresses_to_geocode(db: Session, merchant_detail_ids: List[int]) -> Dict[str, Tuple[str, str]]:
+        """{address_hash: (normalized_address, full_address)} of the batch's merchants still missing coordinates"""
+        details = db.query(MerchantDetail).filter(MerchantDetail.id.in_(merchant_detail_ids)).all()
+        addresses = {}
+        for detail in details:
+            if detail.latitude is not None and detail.longitude is not None:
+                continue
+            key = merchant_address_key(detail)
+            if key is not None and key not in addresses:
+                normalized = normalize_address(detail.address, detail.city, detail.state, detail.country, detail.postal_code)
+                full_address = geocoding_service._build_address_string(
+                    detail.address, detail.city, detail.state, detail.country, detail.postal_code
+                )
+                addresses[key] = (normalized, full_address)
+        return addresses
+
+    def _apply_results(self, db: Session, merchant_detail_ids: List[int],
+                       results: Dict[str, Optional[Tuple[float, float]]]) -> List[MerchantDetail]:
+        """Store coordinates on the merchants and commit; returns the merchants updated"""
+        # Re-read: an address may have changed or been geocoded elsewhere while Nominatim was called
+        details = db.query(MerchantDetail).populate_existing().filter(
+            MerchantDetail.id.in_(merchant_detail_ids)
+        ).all()
+        updated = []
+        for detail in details:
+            if detail.latitude is not None and detail.longitude is not None:
+                continue
+            key = merchant_address_key(detail)
+            if key not in results:
+                continue
+            if results[key] is None:
+                self.unresolved += 1
+                continue
+            detail.latitude, detail.longitude = results[key]
+            updated.append(detail)
+        db.commit()
+        return updated
+
+    async def process_batch(self, merchant_detail_ids: List[int]) -> int:
+        """Geocode one batch of merchants; returns how many got coordinates"""
+        db = SessionLocal()
+        try:
+            addresses = await run_in_threadpool(self._addresses_to_geocode, db, merchant_detail_ids)
+            if not addresses:
+                return 0
+
+            results = await geocoding_service.geocode_batch(db, addresses)
+            self.batches += 1
+
+            updated = await run_in_threadpool(self._apply_results, db, merchant_detail_ids, results)
+            for detail in updated:
+                merchant_geo_index.upsert(detail)
+            self.geocoded += len(updated)
+            return len(updated)
+        except Exception:
+            await run_in_threadpool(db.rollback)
+            raise
+        finally:
+            await run_in_threadpool(db.close)
+
+    def _hold_worker_role(self) -> bool:
+        """
+        True when this process may geocode. On MySQL that means holding the
+        named lock on a dedicated connection (taken without waiting); other
+        databases are single-process deployments and always qualify.
+        """
+        if engine.dialect.name != "mysql":
+            return True
+        try:
+            if self._lock_connection is None:
+                self._lock_connection = engine.connect()
+            params = {"name": GEOCODING_WORKER_LOCK_NAME}
+            held = self._lock_connection.execute(
+                text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), params
+            ).scalar()
+            if not held:
+                held = self._lock_connection.execute(text("SELECT GET_LOCK(:name, 0)"), params).scalar() == 1
+            return bool(held)
+        except Exception as e:
+            logger.warning(f"Could not take the geocoding worker lock: {str(e)}")
+            self._release_worker_role()
+            return False
+
+    def _release_worker_role(self) -> None:
+        # Closing the connection releases the named lock
+        if self._lock_connection is not None:
+            try:
+                self._lock_connection.close()
+            except Exception:
+                pass
+            self._lock_connection = None
+
+    async def _backfill_periodically(self, interval_seconds: float) -> None:
+        while True:
+            try:
+                # enqueue() needs the loop; the ids are queued once the scan returns
+                ids = await run_in_threadpool(self._missing_ids)
+                if not self.is_worker:
+                    self._stand_down()
+                for merchant_detail_id in ids:
+                    self.enqueue(merchant_detail_id)
+                if ids:
+                    logger.info(f"Queued {len(ids)} merchants for background geocoding")
+            except Exception as e:
+                logger.error(f"Geocoding backfill scan failed: {str(e)}")
+            if interval_seconds <= 0:
+                return
+            await asyncio.sleep(interval_seconds)
+
+    def _missing_ids(self) -> List[int]:
+        self.is_worker = self._hold_worker_role()
+        if not self.is_worker:
+            return []
+        db = SessionLocal()
+        try:
+            ids = self.missing_ids(db, GEOCODING_BACKFILL_LIMIT, self._scan_after_id)
+        finally:
+            db.close()
+        # Page through the table so merchants Nominatim can't resolve don't
+        # fill every scan; start over once the end is reached
+        self._scan_after_id = ids[-1] if len(ids) >= GEOCODING_BACKFILL_LIMIT else 0
+        return ids
+
+    def _stand_down(self) -> None:
+        """Stop geocoding after another process took the worker role"""
+        self._pending.clear()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def start(self, interval_seconds: float = GEOCODING_BACKFILL_INTERVAL_SECONDS) -> None:
+        """Start the backfill loop, which also decides whether this process is the geocoding worker"""
+        if not GEOCODING_WORKER_ENABLED:
+            return
+        if self._backfill_task is None or self._backfill_task.done():
+            self._backfill_task = asyncio.get_running_loop().create_task(self._backfill_periodically(interval_seconds))
+
+    async def stop(self) -> None:
+        for task in (self._backfill_task, self._task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._backfill_task = None
+        self._task = None
+        self._pending.clear()
+        self.is_worker = False
+        await run_in_threadpool(self._release_worker_role)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._pending),
+            "worker": self.is_worker,
+            "running": self._task is not None and not self._task.done(),
+            "enqueued": self.enqueued,
+            "batches": self.batches,
+            "geocoded": self.geocoded,
+            "unresolved": self.unresolved,
+            "failed_batches": self.failed_batches,
+            "geocoder": geocoding_service.stats(),
+        }
+
+
+# Create a singleton instance
+geocoding_queue = GeocodingQueue()
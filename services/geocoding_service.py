@@ -1,21 +1,205 @@
 import httpx
 import asyncio
-from typing import Optional, Dict, Any, Tuple
+import hashlib
+import os
+import re
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple
 import logging
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from database.database import SessionLocal
+from helpers.geocode_cache_helper import GeocodeCacheHelper
+
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Nominatim's usage policy allows at most one request per second per application
+GEOCODING_MIN_INTERVAL_SECONDS = float(os.getenv("GEOCODING_MIN_INTERVAL_SECONDS", "1.0"))
+GEOCODING_TIMEOUT_SECONDS = float(os.getenv("GEOCODING_TIMEOUT_SECONDS", "10"))
+# How long an address Nominatim could not resolve is remembered before it is tried again
+GEOCODE_NEGATIVE_CACHE_DAYS = int(os.getenv("GEOCODE_NEGATIVE_CACHE_DAYS", "7"))
+
+# Street-type spellings folded together so they share a cache entry
+_ADDRESS_ABBREVIATIONS = {
+    "street": "st", "avenue": "ave", "road": "rd", "boulevard": "blvd", "drive": "dr",
+    "lane": "ln", "court": "ct", "place": "pl", "highway": "hwy", "parkway": "pkwy",
+    "suite": "ste", "apartment": "apt", "building": "bldg", "floor": "fl",
+}
+
+Coordinates = Tuple[float, float]
+
+
+def normalize_address(address: str = None, city: str = None, state: str = None,
+                      country: str = None, postal_code: str = None) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of an address, used as the cache key"""
+    parts = []
+    for part in (address, city, state, postal_code, country):
+        if not part:
+            continue
+        text = unicodedata.normalize("NFKC", str(part)).lower()
+        words = re.sub(r"[^\w\s]", " ", text).split()
+        words = [_ADDRESS_ABBREVIATIONS.get(word, word) for word in words]
+        if words:
+            parts.append(" ".join(words))
+    return ", ".join(parts)
+
+
+def address_hash(normalized_address: str) -> str:
+    return hashlib.sha256(normalized_address.encode("utf-8")).hexdigest()
+
+
 class GeocodingService:
     """Service for geocoding addresses to get latitude and longitude coordinates"""
 
-    def __init__(self):
+    def __init__(self, min_interval: float = GEOCODING_MIN_INTERVAL_SECONDS):
         self.nominatim_base_url = "https://nominatim.openstreetmap.org"
         self.headers = {
             "User-Agent": "BiteWise-Merchant-Service/1.0"  # Required by Nominatim
         }
+        self.min_interval = min_interval
+        self._client: Optional[httpx.AsyncClient] = None
+        # Created on first use so it binds to the running event loop
+        self._rate_lock: Optional[asyncio.Lock] = None
+        self._last_request_at = 0.0
+        self.requests = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.errors = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """One pooled client for all Nominatim calls instead of a new connection per lookup"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(headers=self.headers, timeout=GEOCODING_TIMEOUT_SECONDS)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get(self, path: str, params: Dict[str, Any]) -> httpx.Response:
+        """GET against Nominatim, spaced at least min_interval apart across all callers"""
+        if self._rate_lock is None:
+            self._rate_lock = asyncio.Lock()
+        async with self._rate_lock:
+            wait = self._last_request_at + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                self.requests += 1
+                return await self._get_client().get(f"{self.nominatim_base_url}{path}", params=params)
+            finally:
+                self._last_request_at = time.monotonic()
+
+    async def _search(self, full_address: str) -> Optional[Coordinates]:
+        """
+        One Nominatim search. Returns None when the address has no usable
+        result; raises on transport/HTTP errors so those are not cached.
+        """
+        params = {
+            "q": full_address,
+            "format": "json",
+            "limit": 1,
+            "addressdetails": 1
+        }
+        response = await self._get("/search", params)
+        if response.status_code != 200:
+            raise Exception(f"Geocoding API error: {response.status_code} - {response.text}")
+
+        data = response.json()
+        if not data:
+            logger.warning(f"No results found for address: {full_address}")
+            return None
+
+        result = data[0]
+        lat = float(result.get("lat", 0))
+        lon = float(result.get("lon", 0))
+        if lat != 0 and lon != 0:
+            logger.info(f"Successfully geocoded address: {full_address} -> ({lat}, {lon})")
+            return (lat, lon)
+        logger.warning(f"Invalid coordinates returned for address: {full_address}")
+        return None
+
+    @staticmethod
+    def _is_fresh(row) -> bool:
+        """Resolved rows never expire; unresolved ones are retried after GEOCODE_NEGATIVE_CACHE_DAYS"""
+        if row.latitude is not None and row.longitude is not None:
+            return True
+        checked_at = row.updated_at or row.created_at
+        return checked_at is not None and datetime.now() - checked_at < timedelta(days=GEOCODE_NEGATIVE_CACHE_DAYS)
+
+    def cached_coordinates(self, db: Session, key: str) -> Tuple[bool, Optional[Coordinates]]:
+        """(hit, coordinates) from the cache table only - never calls Nominatim"""
+        row = GeocodeCacheHelper.get_many(db, [key]).get(key)
+        if row is None or not self._is_fresh(row):
+            return False, None
+        self.cache_hits += 1
+        GeocodeCacheHelper.record_hits(db, [key])
+        if row.latitude is None or row.longitude is None:
+            return True, None
+        return True, (row.latitude, row.longitude)
+
+    async def geocode_batch(self, db: Session, addresses: Dict[str, Tuple[str, str]]) -> Dict[str, Optional[Coordinates]]:
+        """
+        Resolve many addresses at once: {address_hash: (normalized_address, full_address)}.
+
+        Cached addresses are answered from a single query; the rest go to
+        Nominatim one per min_interval and are written back in one upsert.
+        Addresses whose lookup failed are left out of the result. Cache reads
+        and writes run in the threadpool so the event loop never waits on the
+        database.
+        """
+        results = await run_in_threadpool(self._cached_results, db, list(addresses.keys()))
+
+        new_rows = []
+        for key, (normalized, full_address) in addresses.items():
+            if key in results:
+                continue
+            self.cache_misses += 1
+            try:
+                coordinates = await self._search(full_address)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error geocoding address '{full_address}': {str(e)}")
+                continue
+            results[key] = coordinates
+            new_rows.append({
+                "address_hash": key,
+                "normalized_address": normalized[:512],
+                "latitude": coordinates[0] if coordinates else None,
+                "longitude": coordinates[1] if coordinates else None,
+            })
+
+        if new_rows:
+            await run_in_threadpool(self._store_results, db, new_rows)
+        return results
+
+    def _cached_results(self, db: Session, keys: List[str]) -> Dict[str, Optional[Coordinates]]:
+        """Fresh cache entries for `keys`, with their hits recorded and committed"""
+        results: Dict[str, Optional[Coordinates]] = {}
+        cached = GeocodeCacheHelper.get_many(db, keys)
+        for key, row in cached.items():
+            if self._is_fresh(row):
+                results[key] = (row.latitude, row.longitude) if row.latitude is not None and row.longitude is not None else None
+        self.cache_hits += len(results)
+        GeocodeCacheHelper.record_hits(db, results.keys())
+        # Don't hold a transaction open while waiting on Nominatim
+        db.commit()
+        return results
+
+    @staticmethod
+    def _store_results(db: Session, rows: List[Dict[str, Any]]) -> None:
+        GeocodeCacheHelper.store_many(db, rows)
+        db.commit()
 
     async def geocode_address(self, address: str, city: str = None, state: str = None,
-                            country: str = None, postal_code: str = None) -> Optional[Tuple[float, float]]:
+                            country: str = None, postal_code: str = None,
+                            db: Session = None) -> Optional[Tuple[float, float]]:
         """
         Geocode an address to get latitude and longitude coordinates
 
@@ -25,58 +209,31 @@ class GeocodingService:
             state: State/Province name
             country: Country name
             postal_code: Postal/ZIP code
+            db: Session for the geocode cache (a short-lived one is opened if omitted)
 
         Returns:
             Tuple of (latitude, longitude) if found, None otherwise
         """
-        try:
-            # Build the full address string
-            full_address = self._build_address_string(address, city, state, country, postal_code)
-
-            if not full_address.strip():
-                logger.warning("Empty address provided for geocoding")
-                return None
-
-            # Prepare the query parameters
-            params = {
-                "q": full_address,
-                "format": "json",
-                "limit": 1,
-                "addressdetails": 1
-            }
-
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.nominatim_base_url}/search",
-                    params=params,
-                    headers=self.headers,
-                    timeout=10.0
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-
-                    if data and len(data) > 0:
-                        result = data[0]
-                        lat = float(result.get("lat", 0))
-                        lon = float(result.get("lon", 0))
-
-                        if lat != 0 and lon != 0:
-                            logger.info(f"Successfully geocoded address: {full_address} -> ({lat}, {lon})")
-                            return (lat, lon)
-                        else:
-                            logger.warning(f"Invalid coordinates returned for address: {full_address}")
-                            return None
-                    else:
-                        logger.warning(f"No results found for address: {full_address}")
-                        return None
-                else:
-                    logger.error(f"Geocoding API error: {response.status_code} - {response.text}")
-                    return None
+        full_address = self._build_address_string(address, city, state, country, postal_code)
+        normalized = normalize_address(address, city, state, country, postal_code)
+        if not normalized:
+            logger.warning("Empty address provided for geocoding")
+            return None
 
+        key = address_hash(normalized)
+        own_session = db is None
+        if own_session:
+            db = SessionLocal()
+        try:
+            results = await self.geocode_batch(db, {key: (normalized, full_address)})
+            return results.get(key)
         except Exception as e:
+            await run_in_threadpool(db.rollback)
             logger.error(f"Error geocoding address '{full_address}': {str(e)}")
             return None
+        finally:
+            if own_session:
+                await run_in_threadpool(db.close)
 
     def _build_address_string(self, address: str, city: str = None, state: str = None,
                             country: str = None, postal_code: str = None) -> str:
@@ -115,30 +272,32 @@ class GeocodingService:
                 "addressdetails": 1
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.nominatim_base_url}/reverse",
-                    params=params,
-                    headers=self.headers,
-                    timeout=10.0
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    if data and "address" in data:
-                        logger.info(f"Successfully reverse geocoded coordinates: ({latitude}, {longitude})")
-                        return data
-                    else:
-                        logger.warning(f"No address found for coordinates: ({latitude}, {longitude})")
-                        return None
+            response = await self._get("/reverse", params)
+
+            if response.status_code == 200:
+                data = response.json()
+                if data and "address" in data:
+                    logger.info(f"Successfully reverse geocoded coordinates: ({latitude}, {longitude})")
+                    return data
                 else:
-                    logger.error(f"Reverse geocoding API error: {response.status_code} - {response.text}")
+                    logger.warning(f"No address found for coordinates: ({latitude}, {longitude})")
                     return None
+            else:
+                logger.error(f"Reverse geocoding API error: {response.status_code} - {response.text}")
+                return None
 
         except Exception as e:
             logger.error(f"Error reverse geocoding coordinates ({latitude}, {longitude}): {str(e)}")
             return None
 
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "nominatim_requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "errors": self.errors,
+            "min_interval_seconds": self.min_interval,
+        }
+
 # Create a singleton instance
 geocoding_service = GeocodingService()
-
@@ -0,0 +1,386 @@
+"""
+Item popularity by dietary type, kept current on cart/order writes and sampled in memory
+"""
+import bisect
+import logging
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from helpers.catalog_helper import _elements
+from helpers.item_popularity_helper import ItemPopularityHelper
+from models.cart import Cart, CartItem
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Most popular items kept in memory per dietary type; sampling cost depends on this, not on history size
+ITEM_POPULARITY_POOL_SIZE = int(os.getenv("ITEM_POPULARITY_POOL_SIZE", "200"))
+# Seconds before a pool is reloaded (picks up writes from other workers)
+ITEM_POPULARITY_TTL = float(os.getenv("ITEM_POPULARITY_TTL", "300"))
+# An ordered item counts this many times as much as one added to a cart
+ITEM_POPULARITY_ORDER_WEIGHT = float(os.getenv("ITEM_POPULARITY_ORDER_WEIGHT", "3"))
+# Rows per INSERT statement when the table is rebuilt from cart history
+ITEM_POPULARITY_REBUILD_CHUNK_SIZE = 500
+
+DIETARY_TYPES = ("vegetarian", "non-vegetarian", "vegan")
+
+VEGAN_KEYWORDS = {"vegan", "plantbased", "dairyfree"}
+NON_VEG_KEYWORDS = {
+    "nonveg", "chicken", "beef", "pork", "lamb", "mutton", "goat", "fish", "salmon", "tuna",
+    "shrimp", "prawn", "prawns", "crab", "lobster", "bacon", "ham", "turkey", "duck",
+    "sausage", "pepperoni", "salami", "meat", "meatball", "meatballs", "steak", "anchovy",
+    "anchovies", "seafood", "wings", "brisket", "chorizo", "keema",
+}
+VEG_KEYWORDS = {
+    "veg", "vegetarian", "veggie", "vegetable", "paneer", "tofu", "margherita", "falafel",
+    "salad", "cheese", "mushroom", "spinach", "potato", "aloo", "gobi", "palak", "dal", "daal",
+    "chana", "bean", "lentil", "hummus", "caprese", "eggplant", "broccoli", "corn", "pesto",
+}
+# Only these count when the label is a tag or category name: "Salads" may hold a chicken salad,
+# but a "Vegetarian" tag is an explicit statement about the item
+EXPLICIT_VEG_KEYWORDS = {"veg", "vegetarian", "veggie"}
+EXPLICIT_NON_VEG_KEYWORDS = {"nonveg", "meat"}
+
+
+def _keywords(*texts: Optional[str]) -> set:
+    """Lowercase words of the texts plus their singular forms ("Chickens" -> "chicken")"""
+    joined = " ".join(text for text in texts if text).lower()
+    # "non-veg", "non veg" and "plant based" become single tokens
+    joined = re.sub(r"\bnon[\s-]*veg", "nonveg", joined)
+    joined = re.sub(r"\bplant[\s-]*based", "plantbased", joined)
+    joined = re.sub(r"\bdairy[\s-]*free", "dairyfree", joined)
+    words = set()
+    for word in re.findall(r"[a-z]+", joined):
+        words.add(word)
+        if word.endswith("ies") and len(word) > 4:
+            words.add(word[:-3] + "y")
+        elif word.endswith("es") and len(word) > 3:
+            words.update((word[:-1], word[:-2]))
+        elif word.endswith("s") and len(word) > 3:
+            words.add(word[:-1])
+    return words
+
+
+def classify_dietary_type(*texts: Optional[str], labels: Iterable[Optional[str]] = ()) -> str:
+    """
+    Keyword guess from item name/category/description: vegan, non-vegetarian,
+    vegetarian or unknown. `labels` (catalog tag names) win when they name a
+    diet outright.
+    """
+    tagged = _keywords(*labels)
+    if tagged & VEGAN_KEYWORDS:
+        return "vegan"
+    if tagged & EXPLICIT_NON_VEG_KEYWORDS:
+        return "non-vegetarian"
+    if tagged & EXPLICIT_VEG_KEYWORDS:
+        return "vegetarian"
+
+    words = _keywords(*texts)
+    if words & VEGAN_KEYWORDS:
+        return "vegan"
+    if words & NON_VEG_KEYWORDS:
+        return "non-vegetarian"
+    if words & VEG_KEYWORDS:
+        return "vegetarian"
+    return "unknown"
+
+
+class _Pool:
+    """Top items of one dietary type with cumulative weights for bisect sampling"""
+
+    def __init__(self, entries: List[Dict[str, Any]], capacity: int):
+        self.entries = entries
+        self.capacity = capacity
+        self.positions = {entry["key"]: position for position, entry in enumerate(entries)}
+        self.loaded_at = time.monotonic()
+        self._reweigh()
+
+    def _reweigh(self) -> None:
+        self.cumulative = []
+        total = 0.0
+        for entry in self.entries:
+            total += entry["weight"]
+            self.cumulative.append(total)
+
+    def bump(self, key: Tuple[str, str], delta: float, ordered: bool = False) -> bool:
+        """Add to an item's weight in place; False when the item is not in the pool"""
+        position = self.positions.get(key)
+        if position is None:
+            return False
+        self.entries[position]["weight"] += delta
+        if ordered:
+            self.entries[position]["suggestion"]["source"] = "Popular Orders"
+        self._reweigh()
+        return True
+
+    def offer(self, entry: Dict[str, Any]) -> bool:
+        """
+        Add an item that is not in the pool yet. Below capacity every item of
+        the type is already pooled, so the entry's weight is its full score
+        and it always fits. A full pool only takes it (evicting the lightest
+        entry) when the increment alone outweighs that entry; the item's
+        older score is not known here, so borderline items wait for the TTL
+        reload.
+        """
+        if len(self.entries) < self.capacity:
+            self.positions[entry["key"]] = len(self.entries)
+            self.entries.append(entry)
+        else:
+            if not self.entries:
+                return False
+            position = min(range(len(self.entries)), key=lambda i: self.entries[i]["weight"])
+            if entry["weight"] <= self.entries[position]["weight"]:
+                return False
+            del self.positions[self.entries[position]["key"]]
+            self.entries[position] = entry
+            self.positions[entry["key"]] = position
+        self._reweigh()
+        return True
+
+    def sample(self, k: int, rng: random.Random) -> List[Dict[str, Any]]:
+        """Up to k distinct item names, each drawn with probability proportional to its weight"""
+        if not self.entries or k <= 0:
+            return []
+        total = self.cumulative[-1]
+        chosen: List[Dict[str, Any]] = []
+        names = set()
+        # Rejection sampling: O(k log n); bounded retries when a few items dominate the weight
+        attempts = 0
+        while len(chosen) < k and attempts < k * 8:
+            attempts += 1
+            position = bisect.bisect_right(self.cumulative, rng.random() * total)
+            entry = self.entries[min(position, len(self.entries) - 1)]
+            name = entry["suggestion"]["item_name"].lower()
+            if name not in names:
+                names.add(name)
+                chosen.append(entry)
+        # Top up in popularity order if retries ran out
+        for entry in self.entries:
+            if len(chosen) >= k:
+                break
+            name = entry["suggestion"]["item_name"].lower()
+            if name not in names:
+                names.add(name)
+                chosen.append(entry)
+        return chosen
+
+
+class ItemPopularityService:
+    """
+    Order/cart counts per Clover item, bucketed by dietary type.
+
+    record_cart_add() and record_order() add to the item_popularity counters
+    with one upsert inside the caller's transaction, so the counters commit
+    (or roll back) with the cart write itself; after that commit the caller
+    hands the returned rows to apply() to update the in-memory pools. Each
+    pool holds the ITEM_POPULARITY_POOL_SIZE most popular items of a
+    dietary type, loaded with one indexed query; suggest() samples from it
+    by weight without touching the database, so its cost does not grow with
+    order history. Pools of other workers catch up on their TTL reload.
+    """
+
+    def __init__(self, pool_size: int = ITEM_POPULARITY_POOL_SIZE, ttl: float = ITEM_POPULARITY_TTL,
+                 order_weight: float = ITEM_POPULARITY_ORDER_WEIGHT):
+        self.pool_size = pool_size
+        self.ttl = ttl
+        self.order_weight = order_weight
+        self._pools: Dict[str, _Pool] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        self.pool_loads = 0
+        self.samples = 0
+        self.writes = 0
+
+    @staticmethod
+    def _suggestion(row) -> Dict[str, str]:
+        return {
+            "item_name": row.item_name or "Unknown Item",
+            "description": row.description or "Delicious food item",
+            "price": f"${row.price:.2f}" if row.price else "Price on request",
+            "category": row.category or "Food",
+            "source": "Popular Orders" if row.order_count else "Cart Items"
+        }
+
+    def _load_pool(self, db: Session, dietary_type: str) -> _Pool:
+        rows = ItemPopularityHelper.top_by_dietary_type(db, dietary_type, self.pool_size)
+        pool = _Pool([
+            {
+                "key": (row.clover_merchant_id, row.clover_item_id),
+                "weight": row.score,
+                "suggestion": self._suggestion(row),
+            }
+            for row in rows
+        ], self.pool_size)
+        with self._lock:
+            self._pools[dietary_type] = pool
+            self.pool_loads += 1
+        return pool
+
+    def _get_pool(self, db: Session, dietary_type: str) -> _Pool:
+        with self._lock:
+            pool = self._pools.get(dietary_type)
+        if pool is None or (self.ttl > 0 and time.monotonic() - pool.loaded_at >= self.ttl):
+            pool = self._load_pool(db, dietary_type)
+        return pool
+
+    def suggest(self, db: Session, dietary_type: str, k: int = 5) -> List[Dict[str, str]]:
+        """Up to k popular items of a dietary type, sampled by popularity"""
+        pool = self._get_pool(db, dietary_type)
+        with self._lock:
+            entries = pool.sample(k, self._rng)
+            self.samples += 1
+        return [dict(entry["suggestion"]) for entry in entries]
+
+    def _build_rows(self, db: Session, merchant_id: str, counts: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        counts: {clover_item_id: {"name", "price", "order_count", "cart_count"}}.
+        Dietary type, category and description come from the synced catalog when available.
+        """
+        catalog = ItemPopularityHelper.catalog_details(db, merchant_id, counts.keys())
+        rows = []
+        for clover_item_id, item in counts.items():
+            element = catalog.get(clover_item_id, {})
+            category_names = [
+                category.get("name") for category in _elements(element.get("categories"))
+                if isinstance(category, dict)
+            ]
+            tag_names = [tag.get("name") for tag in _elements(element.get("tags")) if isinstance(tag, dict)]
+            name = item.get("name") or element.get("name")
+            description = element.get("description") or element.get("alternateName")
+            rows.append({
+                "clover_merchant_id": merchant_id,
+                "clover_item_id": clover_item_id,
+                "dietary_type": classify_dietary_type(name, description, *category_names, labels=tag_names),
+                "item_name": name[:255] if name else None,
+                "description": description[:255] if description else None,
+                "category": category_names[0][:255] if category_names and category_names[0] else None,
+                "price": item.get("price"),
+                "order_count": item.get("order_count", 0),
+                "cart_count": item.get("cart_count", 0),
+                "score": item.get("order_count", 0) * self.order_weight + item.get("cart_count", 0),
+            })
+        return rows
+
+    def _stage(self, db: Session, merchant_id: str, counts: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Upsert the increments in a savepoint of the caller's transaction; a failure only drops them"""
+        if not counts:
+            return []
+        try:
+            with db.begin_nested():
+                rows = self._build_rows(db, merchant_id, counts)
+                ItemPopularityHelper.increment_many(db, rows)
+            return rows
+        except Exception as e:
+            logger.warning(f"Could not record popularity for merchant {merchant_id}: {str(e)}")
+            return []
+
+    def record_cart_add(self, db: Session, merchant_id: str, clover_item_id: str,
+                        name: str, price: float, quantity: int = 1) -> List[Dict[str, Any]]:
+        """
+        Count an item added to a cart. Call before the cart commit and pass the
+        result to apply() once it succeeded; never raises.
+        """
+        return self._stage(db, merchant_id, {
+            clover_item_id: {"name": name, "price": price, "cart_count": max(quantity or 0, 0)}
+        })
+
+    def record_order(self, db: Session, cart: Cart) -> List[Dict[str, Any]]:
+        """
+        Count every item of a cart that becomes an order. Call before the order
+        commit and pass the result to apply() once it succeeded; never raises.
+        """
+        counts: Dict[str, Dict[str, Any]] = {}
+        for cart_item in cart.items:
+            item = counts.setdefault(cart_item.clover_item_id, {
+                "name": cart_item.name, "price": cart_item.price, "order_count": 0
+            })
+            item["order_count"] += cart_item.quantity or 0
+        return self._stage(db, cart.clover_merchant_id, counts)
+
+    def apply(self, rows: List[Dict[str, Any]]) -> None:
+        """Add committed increments to this process's pools, without reloading them"""
+        if not rows:
+            return
+        with self._lock:
+            self.writes += 1
+            for row in rows:
+                pool = self._pools.get(row["dietary_type"])
+                if pool is None:
+                    continue
+                key = (row["clover_merchant_id"], row["clover_item_id"])
+                if not pool.bump(key, row["score"], ordered=row["order_count"] > 0):
+                    pool.offer({"key": key, "weight": row["score"], "suggestion": self._suggestion(SimpleNamespace(**row))})
+
+    def rebuild(self, db: Session) -> int:
+        """
+        Recompute every counter from carts and cart_items (one-off backfill) in a
+        single transaction, so readers never see a half-built table; returns items written
+        """
+        try:
+            rows = db.query(
+                Cart.clover_merchant_id,
+                CartItem.clover_item_id,
+                func.max(CartItem.name),
+                func.max(CartItem.price),
+                func.sum(CartItem.quantity),
+                # Carts pushed to Clover are orders
+                func.sum(case((Cart.clover_order_id.isnot(None), CartItem.quantity), else_=0)),
+            ).join(CartItem, CartItem.cart_id == Cart.id).group_by(
+                Cart.clover_merchant_id, CartItem.clover_item_id
+            ).all()
+
+            by_merchant: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            for merchant_id, clover_item_id, name, price, quantity, ordered in rows:
+                by_merchant.setdefault(merchant_id, {})[clover_item_id] = {
+                    "name": name, "price": price,
+                    "cart_count": int(quantity or 0), "order_count": int(ordered or 0),
+                }
+
+            popularity_rows = []
+            for merchant_id, counts in by_merchant.items():
+                popularity_rows.extend(self._build_rows(db, merchant_id, counts))
+
+            ItemPopularityHelper.clear(db)
+            for start in range(0, len(popularity_rows), ITEM_POPULARITY_REBUILD_CHUNK_SIZE):
+                ItemPopularityHelper.increment_many(
+                    db, popularity_rows[start:start + ITEM_POPULARITY_REBUILD_CHUNK_SIZE]
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self.invalidate()
+        return len(popularity_rows)
+
+    def ensure_seeded(self, db: Session) -> int:
+        """Backfill from cart history the first time the table is used"""
+        if not ItemPopularityHelper.is_empty(db):
+            return 0
+        return self.rebuild(db)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._pools.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pools": {dietary_type: len(pool.entries) for dietary_type, pool in self._pools.items()},
+                "pool_loads": self.pool_loads,
+                "samples": self.samples,
+                "writes": self.writes,
+            }
+
+
+# Create a singleton instance
+item_popularity_service = ItemPopularityService()
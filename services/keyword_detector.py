@@ -0,0 +1,135 @@
+"""
+Deterministic keyword detection with a result cache, used before the LLM for language and service selection
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from services.classification_cache import normalize_text
+
+load_dotenv()
+
+DETECTION_CACHE_TTL = float(os.getenv("DETECTION_CACHE_TTL", "86400"))
+DETECTION_CACHE_MAX_ENTRIES = int(os.getenv("DETECTION_CACHE_MAX_ENTRIES", "5000"))
+
+TIERS = ("keyword", "cache", "llm")
+
+# An input containing one of these may be excluding a label rather than choosing it
+# ("I don't speak Hindi", "no delivery"), so the sentence goes to the LLM.
+# normalize_text splits "don't" / "can't" into "don t" / "can t", hence the bare "t".
+NEGATION_WORDS = {
+    "not", "no", "t", "dont", "cant", "cannot", "never", "neither", "nor",
+    "without", "except", "instead", "nahi", "nahin", "na",
+}
+
+
+class KeywordDetector:
+    """
+    Maps a short utterance to canonical labels ("Spanish", "Pickup") when the
+    answer is clear from the words alone, and remembers what the LLM said for
+    everything else.
+
+    - detect(): labels from whole-word alias matches, or None when the input
+      has no known keyword, contains a negation, or (unless allow_multiple)
+      names more than one label
+    - get_cached() / remember(): bounded LRU of LLM results keyed by normalized text
+    """
+
+    def __init__(
+        self,
+        name: str,
+        aliases: Dict[str, Iterable[str]],
+        allow_multiple: bool = True,
+        ttl: float = DETECTION_CACHE_TTL,
+        max_entries: int = DETECTION_CACHE_MAX_ENTRIES,
+    ):
+        self.name = name
+        self.allow_multiple = allow_multiple
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.phrases: Dict[str, str] = {}
+        for label, label_aliases in aliases.items():
+            for alias in [label, *label_aliases]:
+                phrase = normalize_text(alias)
+                if phrase:
+                    self.phrases[phrase] = label
+        self.max_phrase_words = max((len(p.split()) for p in self.phrases), default=0)
+        self._entries: "OrderedDict[str, Tuple[List[str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = {tier: 0 for tier in TIERS}
+
+    def detect(self, text: str) -> Optional[List[str]]:
+        """Labels in order of mention, or None when the LLM should decide"""
+        words = normalize_text(text).split()
+        if not words or any(word in NEGATION_WORDS for word in words):
+            return None
+        covered = [False] * len(words)
+        found: Dict[int, str] = {}
+        for size in range(min(self.max_phrase_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                if any(covered[start:start + size]):
+                    continue
+                label = self.phrases.get(" ".join(words[start:start + size]))
+                if label is None:
+                    continue
+                for i in range(start, start + size):
+                    covered[i] = True
+                found[start] = label
+
+        labels = list(dict.fromkeys(found[start] for start in sorted(found)))
+        if not labels or (len(labels) > 1 and not self.allow_multiple):
+            return None
+        self.record("keyword")
+        return labels
+
+    def get_cached(self, text: str) -> Optional[List[str]]:
+        key = normalize_text(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            labels, stored_at = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self._hits["cache"] += 1
+            return list(labels)
+
+    def remember(self, text: str, labels: List[str]) -> None:
+        """Store an LLM result; callers skip this for error fallbacks"""
+        key = normalize_text(text)
+        if not key:
+            return
+        with self._lock:
+            self._entries[key] = (list(labels), time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record(self, tier: str) -> None:
+        with self._lock:
+            self._hits[tier] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self._hits.values())
+            return {
+                "detector": self.name,
+                "lookups": total,
+                "cached_entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "tiers": {
+                    tier: {
+                        "hits": self._hits[tier],
+                        "hit_rate": round(self._hits[tier] / total, 4) if total else 0.0,
+                    }
+                    for tier in TIERS
+                },
+                "llm_avoided_rate": round((total - self._hits["llm"]) / total, 4) if total else 0.0,
+            }
@@ -1,17 +1,95 @@
 # language_service.py
 from typing import Optional, List, Dict
-import google.generativeai as genai
 import os
 from sqlalchemy.orm import Session
 import json
 from models.language import Language
 from models.conversation import Session as SessionModel
+from services.ai_providers import ai_providers
+from services.keyword_detector import KeywordDetector
 from dotenv import load_dotenv
 import re
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+COMMON_LANGUAGES = [
+    'English', 'Spanish', 'French', 'German', 'Italian', 'Portuguese',
+    'Chinese', 'Japanese', 'Korean', 'Arabic', 'Hindi', 'Russian',
+    'Dutch', 'Swedish', 'Norwegian', 'Danish', 'Finnish', 'Polish',
+    'Czech', 'Hungarian', 'Greek', 'Turkish', 'Hebrew', 'Thai',
+    'Vietnamese', 'Indonesian', 'Malay', 'Filipino', 'Tagalog'
+]
+
+# ISO 639-1 codes
+LANGUAGE_CODES = {
+    'English': 'en',
+    'Spanish': 'es',
+    'French': 'fr',
+    'German': 'de',
+    'Italian': 'it',
+    'Portuguese': 'pt',
+    'Chinese': 'zh',
+    'Japanese': 'ja',
+    'Korean': 'ko',
+    'Arabic': 'ar',
+    'Hindi': 'hi',
+    'Russian': 'ru',
+    'Dutch': 'nl',
+    'Swedish': 'sv',
+    'Norwegian': 'no',
+    'Danish': 'da',
+    'Finnish': 'fi',
+    'Polish': 'pl',
+    'Czech': 'cs',
+    'Hungarian': 'hu',
+    'Greek': 'el',
+    'Turkish': 'tr',
+    'Hebrew': 'he',
+    'Thai': 'th',
+    'Vietnamese': 'vi',
+    'Indonesian': 'id',
+    'Malay': 'ms',
+    'Filipino': 'fil',
+    'Tagalog': 'tl'
+}
+
+# Native names and common spellings recognised without the LLM, besides the English name
+LANGUAGE_ALIASES = {
+    'English': ['inglés', 'ingles', 'anglais', 'englisch', 'angrezi'],
+    'Spanish': ['español', 'espanol', 'castellano'],
+    'French': ['français', 'francais'],
+    'German': ['deutsch'],
+    'Italian': ['italiano'],
+    'Portuguese': ['português', 'portugues'],
+    'Chinese': ['mandarin', '中文', '汉语', '普通话'],
+    'Japanese': ['日本語', 'nihongo'],
+    'Korean': ['한국어'],
+    'Arabic': ['العربية', 'عربي'],
+    'Hindi': ['हिंदी', 'हिन्दी'],
+    'Russian': ['русский'],
+    'Dutch': ['nederlands'],
+    'Swedish': ['svenska'],
+    'Norwegian': ['norsk'],
+    'Danish': ['dansk'],
+    'Finnish': ['suomi'],
+    'Polish': ['polski'],
+    'Czech': ['čeština', 'cestina'],
+    'Hungarian': ['magyar'],
+    'Greek': ['ελληνικά'],
+    'Turkish': ['türkçe', 'turkce'],
+    'Hebrew': ['עברית'],
+    'Thai': ['ภาษาไทย'],
+    'Vietnamese': ['tiếng việt', 'tieng viet'],
+    'Indonesian': ['bahasa indonesia'],
+    'Malay': ['bahasa melayu'],
+}
+
+# Shared across requests (routes create a LanguageService per request)
+language_detector = KeywordDetector(
+    "language", {lang: LANGUAGE_ALIASES.get(lang, []) for lang in COMMON_LANGUAGES}
+)
+
 class LanguageService:
     """Service for processing language selection with AI support"""
 
@@ -20,15 +98,20 @@ class LanguageService:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
 
-        # Configure Gemini
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-pro')
+        # Clients and the model come from the shared registry (see AI_MODEL_* settings)
 
-    def detect_languages_from_text(self, text: str) -> List[str]:
+    async def detect_languages_from_text(self, text: str) -> List[str]:
         """
         Detect languages from user text using AI
         Returns a list of detected languages
+
+        Clear mentions ("English", "I speak Spanish") are resolved by keyword and
+        earlier AI answers come from the cache; only the rest reach Gemini.
         """
+        languages = language_detector.detect(text) or language_detector.get_cached(text)
+        if languages:
+            return languages
+
         prompt = f"""You are a language detection assistant. Analyze the following text and extract all mentioned languages.
 
 User text: "{text}"
@@ -51,8 +134,9 @@ Examples:
 Response:"""
 
         try:
-            response = self.model.generate_content(prompt)
-            languages_text = response.text.strip()
+            # Off the event loop, on the bounded Gemini pool, with a timeout
+            response_text = await ai_providers.acomplete("language_detection", prompt)
+            languages_text = response_text
 
             # Parse the response and clean up
             languages = [lang.strip() for lang in languages_text.split(',')]
@@ -62,6 +146,8 @@ Response:"""
             if not languages:
                 languages = ['English']
 
+            language_detector.record("llm")
+            language_detector.remember(text, languages)
             return languages
 
         except Exception as e:
@@ -91,17 +177,8 @@ Response:"""
         if len(language_name) < 2 or len(language_name) > 50:
             return False
 
-        # Check for common language patterns
-        common_languages = [
-            'English', 'Spanish', 'French', 'German', 'Italian', 'Portuguese',
-            'Chinese', 'Japanese', 'Korean', 'Arabic', 'Hindi', 'Russian',
-            'Dutch', 'Swedish', 'Norwegian', 'Danish', 'Finnish', 'Polish',
-            'Czech', 'Hungarian', 'Greek', 'Turkish', 'Hebrew', 'Thai',
-            'Vietnamese', 'Indonesian', 'Malay', 'Filipino', 'Tagalog'
-        ]
-
         # Check if it matches any common language (case insensitive)
-        for lang in common_languages:
+        for lang in COMMON_LANGUAGES:
             if language_name.lower() == lang.lower():
                 return True
 
@@ -112,39 +189,7 @@ Response:"""
         """
         Get ISO 639-1 language code for a language name
         """
-        language_codes = {
-            'English': 'en',
-            'Spanish': 'es',
-            'French': 'fr',
-            'German': 'de',
-            'Italian': 'it',
-            'Portuguese': 'pt',
-            'Chinese': 'zh',
-            'Japanese': 'ja',
-            'Korean': 'ko',
-            'Arabic': 'ar',
-            'Hindi': 'hi',
-            'Russian': 'ru',
-            'Dutch': 'nl',
-            'Swedish': 'sv',
-            'Norwegian': 'no',
-            'Danish': 'da',
-            'Finnish': 'fi',
-            'Polish': 'pl',
-            'Czech': 'cs',
-            'Hungarian': 'hu',
-            'Greek': 'el',
-            'Turkish': 'tr',
-            'Hebrew': 'he',
-            'Thai': 'th',
-            'Vietnamese': 'vi',
-            'Indonesian': 'id',
-            'Malay': 'ms',
-            'Filipino': 'fil',
-            'Tagalog': 'tl'
-        }
-
-        return language_codes.get(language_name, 'en')  # Default to English
+        return LANGUAGE_CODES.get(language_name, 'en')  # Default to English
 
     def save_language_to_session(self, db: Session, session_id: str, user_id: Optional[int], language_name: str, input_type: str = None) -> bool:
         """
@@ -0,0 +1,315 @@
+"""
+In-process spatial index over merchant_detail coordinates for "merchants near me" lookups
+"""
+import heapq
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from models.merchant_detail import MerchantDetail
+
+load_dotenv()
+
+# Seconds before the index is reloaded from the database (picks up writes from
+# other workers / scripts); 0 keeps it until invalidated
+MERCHANT_GEO_INDEX_TTL = float(os.getenv("MERCHANT_GEO_INDEX_TTL", "300"))
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Points per KD-tree leaf; leaves are scanned linearly
+LEAF_SIZE = 16
+
+# Fields returned with each nearby merchant, so lookups never touch the database
+SUMMARY_FIELDS = (
+    "id", "clover_merchant_id", "name", "address", "city", "state",
+    "country", "postal_code", "latitude", "longitude",
+)
+
+Point = Tuple[float, float, float]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2 +
+        math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def valid_coordinates(latitude: Optional[float], longitude: Optional[float]) -> bool:
+    return (
+        latitude is not None and longitude is not None and
+        -90 <= latitude <= 90 and -180 <= longitude <= 180
+    )
+
+
+def to_unit_vector(latitude: float, longitude: float) -> Point:
+    phi, lam = math.radians(latitude), math.radians(longitude)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)
+
+
+class _KDTree:
+    """
+    Static 3-d tree over points on the unit sphere. Straight-line (chord)
+    distance between unit vectors grows with great-circle distance, so the
+    k nearest by chord are the k nearest on the globe, and pruning is exact
+    with no special cases at the poles or the antimeridian.
+    """
+
+    def __init__(self, items: List[Tuple[int, Point]]):
+        ids = [merchant_id for merchant_id, _ in items]
+        points = [point for _, point in items]
+        self._coords = [[point[axis] for point in points] for axis in range(3)]
+        order = list(range(len(items)))
+        self.root = self._build(order, 0, len(order)) if order else None
+        # Leaves reference positions in the reordered arrays
+        self.ids = [ids[i] for i in order]
+        self.points = [points[i] for i in order]
+        del self._coords
+
+    def _build(self, order: List[int], lo: int, hi: int):
+        if hi - lo <= LEAF_SIZE:
+            return (lo, hi)
+        subset = order[lo:hi]
+        # Split at the median of the axis with the widest spread
+        best_spread, axis = -1.0, 0
+        for candidate, coord in enumerate(self._coords):
+            values = list(map(coord.__getitem__, subset))
+            spread = max(values) - min(values)
+            if spread > best_spread:
+                best_spread, axis = spread, candidate
+        coord = self._coords[axis]
+        subset.sort(key=coord.__getitem__)
+        order[lo:hi] = subset
+        mid = (lo + hi) // 2
+        return (axis, coord[order[mid]], self._build(order, lo, mid), self._build(order, mid, hi))
+
+    def search(self, query: Point, limit: int, max_chord: float, skip) -> List[Tuple[float, int]]:
+        """Up to `limit` (-chord, id) pairs within max_chord, as a max-heap"""
+        best: List[Tuple[float, int]] = []
+        qx, qy, qz = query
+        ids, points = self.ids, self.points
+
+        def visit(node) -> None:
+            if len(node) == 2:
+                lo, hi = node
+                for position in range(lo, hi):
+                    merchant_id = ids[position]
+                    if merchant_id in skip:
+                        continue
+                    px, py, pz = points[position]
+                    chord = math.sqrt((px - qx) ** 2 + (py - qy) ** 2 + (pz - qz) ** 2)
+                    if chord > max_chord:
+                        continue
+                    if len(best) < limit:
+                        heapq.heappush(best, (-chord, merchant_id))
+                    elif chord < -best[0][0]:
+                        heapq.heapreplace(best, (-chord, merchant_id))
+                return
+            axis, split, left, right = node
+            gap = query[axis] - split
+            near, far = (left, right) if gap < 0 else (right, left)
+            visit(near)
+            worst = -best[0][0] if len(best) >= limit else max_chord
+            if abs(gap) <= worst:
+                visit(far)
+
+        if self.root is not None:
+            visit(self.root)
+        return best
+
+
+class MerchantGeoIndex:
+    """
+    KD-tree of merchants with coordinates, for k-nearest / radius lookups.
+
+    The index is loaded from merchant_detail on first use (and again after
+    MERCHANT_GEO_INDEX_TTL) and kept current by upsert()/remove(), which the
+    merchant write paths call after committing coordinates. Writes do not
+    rebuild the tree: a moved or removed merchant is masked in it and its new
+    position goes to a small pending set that lookups scan linearly. Once
+    sqrt(n) writes have piled up the tree is rebuilt in a background thread,
+    off the lock, so neither the writer (often an async route or the
+    geocoding worker) nor lookups wait for it.
+
+    load() queries the database and builds the whole tree; call it (and
+    ensure_loaded()) from a sync route or through run_in_threadpool.
+    """
+
+    def __init__(self, ttl: float = MERCHANT_GEO_INDEX_TTL):
+        self.ttl = ttl
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._vectors: Dict[int, Point] = {}
+        self._tree = _KDTree([])
+        # Ids written since the tree was built: masked in the tree, current position (if any) in _pending
+        self._writes: List[int] = []
+        self._masked: set = set()
+        self._pending: Dict[int, Point] = {}
+        self._lock = threading.RLock()
+        # Serializes (re)builds; held while a tree is built outside _lock
+        self._build_lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self.loads = 0
+        self.rebuilds = 0
+        self.lookups = 0
+        self.total_lookup_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ensure_loaded(self, db: Session) -> None:
+        with self._lock:
+            if self._loaded_at is not None and (self.ttl <= 0 or time.monotonic() - self._loaded_at < self.ttl):
+                return
+        self.load(db)
+
+    def load(self, db: Session) -> int:
+        """(Re)build the index from every merchant_detail row with coordinates"""
+        with self._build_lock:
+            with self._lock:
+                mark = len(self._writes)
+            rows = db.query(*(getattr(MerchantDetail, field) for field in SUMMARY_FIELDS)).filter(
+                MerchantDetail.latitude.isnot(None),
+                MerchantDetail.longitude.isnot(None)
+            ).all()
+            entries = {}
+            for row in rows:
+                entry = dict(zip(SUMMARY_FIELDS, row))
+                if valid_coordinates(entry["latitude"], entry["longitude"]):
+                    entries[entry["id"]] = entry
+            vectors = {merchant_id: to_unit_vector(e["latitude"], e["longitude"]) for merchant_id, e in entries.items()}
+            tree = _KDTree(list(vectors.items()))
+            with self._lock:
+                self._install(entries, vectors, tree, mark)
+                self._loaded_at = time.monotonic()
+                self.loads += 1
+                return len(self._entries)
+
+    def _schedule_rebuild(self) -> None:
+        """Rebuild the tree in a worker thread; the caller returns immediately"""
+        if self._build_lock.locked():
+            return  # a load/rebuild is already running; pending writes carry over
+        threading.Thread(target=self._rebuild, name="merchant-geo-index-rebuild", daemon=True).start()
+
+    def _rebuild(self) -> None:
+        if not self._build_lock.acquire(blocking=False):
+            return  # a load/rebuild is already running; pending writes carry over
+        try:
+            with self._lock:
+                mark = len(self._writes)
+                entries, vectors = dict(self._entries), dict(self._vectors)
+            tree = _KDTree(list(vectors.items()))
+            with self._lock:
+                self._install(entries, vectors, tree, mark)
+                self.rebuilds += 1
+        finally:
+            self._build_lock.release()
+
+    def _install(self, entries: Dict[int, Dict[str, Any]], vectors: Dict[int, Point], tree: _KDTree, mark: int) -> None:
+        """Swap in a freshly built tree, re-applying writes made while it was built (caller holds _lock)"""
+        recent = self._writes[mark:]
+        for merchant_id in recent:
+            if merchant_id in self._entries:
+                entries[merchant_id] = self._entries[merchant_id]
+                vectors[merchant_id] = self._vectors[merchant_id]
+            else:
+                entries.pop(merchant_id, None)
+                vectors.pop(merchant_id, None)
+        self._entries, self._vectors, self._tree = entries, vectors, tree
+        self._writes = recent
+        self._masked = set(recent)
+        self._pending = {merchant_id: vectors[merchant_id] for merchant_id in self._masked if merchant_id in vectors}
+
+    def _write(self, merchant_id: int, entry: Optional[Dict[str, Any]]) -> bool:
+        """Record one merchant's new state (None = no coordinates); True when a rebuild is due"""
+        with self._lock:
+            self._writes.append(merchant_id)
+            self._masked.add(merchant_id)
+            if entry is None:
+                self._entries.pop(merchant_id, None)
+                self._vectors.pop(merchant_id, None)
+                self._pending.pop(merchant_id, None)
+            else:
+                vector = to_unit_vector(entry["latitude"], entry["longitude"])
+                self._entries[merchant_id] = entry
+                self._vectors[merchant_id] = vector
+                self._pending[merchant_id] = vector
+            return len(self._masked) > max(LEAF_SIZE, math.isqrt(len(self._entries)))
+
+    def upsert(self, merchant: MerchantDetail) -> None:
+        """Add, move or (when its coordinates were cleared) drop one merchant; call after commit"""
+        if merchant is None or merchant.id is None:
+            return
+        entry = {field: getattr(merchant, field) for field in SUMMARY_FIELDS}
+        valid = valid_coordinates(entry["latitude"], entry["longitude"])
+        if self._write(entry["id"], entry if valid else None):
+            self._schedule_rebuild()
+
+    def remove(self, merchant_id: int) -> None:
+        if self._write(merchant_id, None):
+            self._schedule_rebuild()
+
+    def invalidate(self) -> None:
+        """Force a reload from the database on the next lookup"""
+        with self._lock:
+            self._loaded_at = None
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        limit: int = 10,
+        radius_km: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Up to `limit` merchants ordered by distance, optionally within `radius_km`"""
+        started = time.perf_counter()
+        query = to_unit_vector(latitude, longitude)
+        max_chord = km_to_chord(radius_km) if radius_km is not None else 2.0
+        with self._lock:
+            best = self._tree.search(query, limit, max_chord, self._masked) if limit > 0 else []
+            for merchant_id, (px, py, pz) in (self._pending.items() if limit > 0 else ()):
+                chord = math.sqrt((px - query[0]) ** 2 + (py - query[1]) ** 2 + (pz - query[2]) ** 2)
+                if chord > max_chord:
+                    continue
+                if len(best) < limit:
+                    heapq.heappush(best, (-chord, merchant_id))
+                elif chord < -best[0][0]:
+                    heapq.heapreplace(best, (-chord, merchant_id))
+
+            results = [
+                {**self._entries[merchant_id], "distance_km": round(chord_to_km(-negated_chord), 3)}
+                for negated_chord, merchant_id in sorted(best, key=lambda item: (-item[0], item[1]))
+            ]
+            self.lookups += 1
+            self.total_lookup_ms += (time.perf_counter() - started) * 1000
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "merchants": len(self._entries),
+                "pending": len(self._pending),
+                "masked": len(self._masked),
+                "loads": self.loads,
+                "rebuilds": self.rebuilds,
+                "lookups": self.lookups,
+                "avg_lookup_ms": round(self.total_lookup_ms / self.lookups, 4) if self.lookups else 0.0,
+            }
+
+
+# Create a singleton instance
+merchant_geo_index = MerchantGeoIndex()
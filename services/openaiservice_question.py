@@ -1,10 +1,11 @@
 # openai_service.py
 from typing import Optional, List, Dict
-import openai
 from sqlalchemy.orm import Session
 import json
 import os
 from models.conversation import AnswerMaster
+from services.classification_cache import classification_cache, MISS
+from services.ai_providers import ai_providers
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -38,6 +39,11 @@ class OpenAIAnalyzer:
         if not available_answers:
             return None
 
+        cache_key = classification_cache.make_key("openai", question_key, user_text, available_answers)
+        cached = classification_cache.get(cache_key)
+        if cached is not MISS:
+            return cached
+
         # Prepare the answer options for the prompt
         answer_options = "\n".join([
             f"- {ans['answer_key']}: {ans['answer_text']}"
@@ -62,29 +68,38 @@ Instructions:
 Response:"""
 
         try:
-            client = openai.OpenAI(api_key=self.api_key)
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",  # or "gpt-4" for better accuracy
-                messages=[
-                    {"role": "system", "content": "You are a classification assistant. Return only the category key."},
-                    {"role": "user", "content": prompt}
-                ],
+            # Model comes from AI_MODEL_TEXT_ANALYSIS (default gpt-4o-mini)
+            answer = ai_providers.complete(
+                "text_analysis",
+                prompt,
+                system="You are a classification assistant. Return only the category key.",
                 temperature=0.1,  # Low temperature for consistent classification
                 max_tokens=50
             )
-
-            answer = response.choices[0].message.content.strip()
-
-            # Validate that the returned answer_key exists in our options
-            valid_keys = [ans['answer_key'] for ans in available_answers]
-            if answer in valid_keys:
-                return answer
-            elif answer == "NONE":
-                return None
-            else:
-                # If OpenAI returns something unexpected, return None
-                return None
-
         except Exception as e:
             print(f"OpenAI API error: {str(e)}")
             return None
+
+        # Validate that the returned answer_key exists in our options
+        valid_keys = [ans['answer_key'] for ans in available_answers]
+        if answer in valid_keys:
+            result = answer
+        elif answer == "NONE":
+            result = None
+        else:
+            # If OpenAI returns something unexpected, return None (not cached)
+            return None
+
+        classification_cache.set(cache_key, result)
+        return result
+
+
+_openai_analyzer: Optional[OpenAIAnalyzer] = None
+
+
+def get_openai_analyzer() -> OpenAIAnalyzer:
+    """Shared analyzer instance"""
+    global _openai_analyzer
+    if _openai_analyzer is None:
+        _openai_analyzer = OpenAIAnalyzer()
+    return _openai_analyzer
@@ -0,0 +1,301 @@
+"""
+Versioned in-process snapshot of the question wizard (questions, answers, translations)
+"""
+import bisect
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from helpers.metadata_version_helper import MetadataVersionHelper
+from models.conversation import AnswerMaster, AnswerTranslation, QuestionMaster, QuestionTranslation
+from utils.json_response import dumps
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+QUESTION_FLOW_VERSION_NAME = "question_flow"
+# Seconds between version-stamp reads; requests in between touch no metadata tables
+QUESTION_FLOW_VERSION_CHECK_SECONDS = float(os.getenv("QUESTION_FLOW_VERSION_CHECK_SECONDS", "5"))
+# Seconds before a snapshot is reloaded regardless of the stamp (picks up rows seeded
+# directly in the database); 0 keeps it until the version changes
+QUESTION_FLOW_TTL = float(os.getenv("QUESTION_FLOW_TTL", "600"))
+# Rendered localized bundles kept per snapshot (one per language/type requested)
+QUESTION_BUNDLE_CACHE_SIZE = int(os.getenv("QUESTION_BUNDLE_CACHE_SIZE", "64"))
+
+DEFAULT_LANGUAGE = "en"
+
+
+class FlowTranslation(NamedTuple):
+    translated_text: str
+    variant: Optional[str]
+
+
+class QuestionBundle(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def _localized(text: str, translations: Dict[str, FlowTranslation], language: str) -> Dict[str, Any]:
+    """Text in `language`, falling back to the English master text"""
+    translation = translations.get(language) if language != DEFAULT_LANGUAGE else None
+    if translation is None:
+        return {"text": text, "language": DEFAULT_LANGUAGE, "variant": None}
+    return {"text": translation.translated_text, "language": language, "variant": translation.variant}
+
+
+class FlowAnswer:
+    """Active answer; attribute-compatible with AnswerMaster for AnswerResponse.from_orm"""
+    __slots__ = ("answer_key", "question_key", "answer_text", "answer_order", "translations")
+
+    def __init__(self, row: AnswerMaster, translations: Dict[str, FlowTranslation]):
+        self.answer_key = row.answer_key
+        self.question_key = row.question_key
+        self.answer_text = row.answer_text
+        self.answer_order = row.answer_order
+        self.translations = translations
+
+
+class FlowQuestion:
+    """Question with its active answers; attribute-compatible with QuestionMaster for QuestionResponse.from_orm"""
+    __slots__ = ("question_key", "question_text", "question_order", "type", "is_active", "answers", "translations")
+
+    def __init__(self, row: QuestionMaster, answers: Tuple[FlowAnswer, ...], translations: Dict[str, FlowTranslation]):
+        self.question_key = row.question_key
+        self.question_text = row.question_text
+        self.question_order = row.question_order
+        self.type = row.type
+        self.is_active = bool(row.is_active)
+        self.answers = answers
+        self.translations = translations
+
+
+class QuestionFlowSnapshot:
+    """
+    Immutable view of the whole wizard, built with four queries. Active questions
+    are kept in (question_order, id) order and answers in (answer_order, id) order,
+    so every lookup below is a dict access or a bisect.
+    """
+
+    def __init__(self, db: Session, version: Optional[int]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.bundles: Dict[Tuple[str, Optional[str]], QuestionBundle] = {}
+
+        question_translations: Dict[str, Dict[str, FlowTranslation]] = {}
+        for row in db.query(QuestionTranslation).all():
+            question_translations.setdefault(row.question_key, {})[row.language] = FlowTranslation(
+                row.translated_text, row.variant
+            )
+
+        answer_translations: Dict[str, Dict[str, FlowTranslation]] = {}
+        for row in db.query(AnswerTranslation).all():
+            answer_translations.setdefault(row.answer_key, {})[row.language] = FlowTranslation(
+                row.translated_text, row.variant
+            )
+
+        answers: Dict[str, List[FlowAnswer]] = {}
+        for row in db.query(AnswerMaster).filter(
+            AnswerMaster.is_active == True
+        ).order_by(AnswerMaster.answer_order, AnswerMaster.id).all():
+            answers.setdefault(row.question_key, []).append(
+                FlowAnswer(row, answer_translations.get(row.answer_key, {}))
+            )
+
+        self.questions: Dict[str, FlowQuestion] = {}
+        self.active_questions: List[FlowQuestion] = []
+        for row in db.query(QuestionMaster).order_by(QuestionMaster.question_order, QuestionMaster.id).all():
+            question = FlowQuestion(
+                row,
+                tuple(answers.get(row.question_key, ())),
+                question_translations.get(row.question_key, {})
+            )
+            self.questions[question.question_key] = question
+            if question.is_active:
+                self.active_questions.append(question)
+        self._active_orders = [question.question_order for question in self.active_questions]
+        # Answers are validated against their own question even when that question is inactive
+        self._answers = {
+            question_key: {answer.answer_key: answer for answer in question_answers}
+            for question_key, question_answers in answers.items()
+        }
+
+    def question(self, question_key: str) -> Optional[FlowQuestion]:
+        """Active question by key"""
+        question = self.questions.get(question_key)
+        return question if question is not None and question.is_active else None
+
+    def next_question(self, current_question_key: Optional[str] = None) -> Optional[FlowQuestion]:
+        """First active question, or the first active one ordered after current_question_key"""
+        if not current_question_key:
+            return self.active_questions[0] if self.active_questions else None
+        current = self.questions.get(current_question_key)
+        if current is None:
+            return None
+        position = bisect.bisect_right(self._active_orders, current.question_order)
+        return self.active_questions[position] if position < len(self.active_questions) else None
+
+    def is_valid_answer(self, question_key: str, answer_key: str) -> bool:
+        return answer_key in self._answers.get(question_key, {})
+
+    def active_answers(self, question_key: str) -> List[FlowAnswer]:
+        return list(self._answers.get(question_key, {}).values())
+
+    def answers_with_translations(self, question_key: str) -> List[Dict[str, Any]]:
+        """[{"answer_key", "answer_text", "translations": [text, ...]}], the AnswerIndex input"""
+        return [
+            {
+                "answer_key": answer.answer_key,
+                "answer_text": answer.answer_text,
+                "translations": [t.translated_text for t in answer.translations.values() if t.translated_text]
+            }
+            for answer in self.active_answers(question_key)
+        ]
+
+    def localized_questions(self, language: str, question_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Active questions with their active answers in `language` (English where a translation is missing)"""
+        questions = []
+        for question in self.active_questions:
+            if question_type and question.type != question_type:
+                continue
+            text = _localized(question.question_text, question.translations, language)
+            answers = []
+            for answer in question.answers:
+                answer_text = _localized(answer.answer_text, answer.translations, language)
+                answers.append({
+                    "answer_key": answer.answer_key,
+                    "answer_text": answer_text["text"],
+                    "answer_order": answer.answer_order,
+                    "language": answer_text["language"],
+                    "variant": answer_text["variant"]
+                })
+            questions.append({
+                "question_key": question.question_key,
+                "question_text": text["text"],
+                "question_order": question.question_order,
+                "type": question.type,
+                "language": text["language"],
+                "variant": text["variant"],
+                "answers": answers
+            })
+        return questions
+
+
+class QuestionFlow:
+    """
+    Holds the current QuestionFlowSnapshot for this process.
+
+    The question set only changes through the admin routes in
+    app/routes/question_master.py, which call publish() after committing: it
+    bumps the "question_flow" row of metadata_versions and rebuilds the local
+    snapshot. Other workers read that stamp at most every
+    QUESTION_FLOW_VERSION_CHECK_SECONDS (one primary-key read) and rebuild
+    only when it moved, so answer submissions normally read no metadata at all.
+    """
+
+    def __init__(self, check_interval: float = QUESTION_FLOW_VERSION_CHECK_SECONDS, ttl: float = QUESTION_FLOW_TTL):
+        self.check_interval = check_interval
+        self.ttl = ttl
+        self._snapshot: Optional[QuestionFlowSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.version_checks = 0
+
+    def _read_version(self, db: Session) -> Optional[int]:
+        try:
+            return MetadataVersionHelper.get_version(db, QUESTION_FLOW_VERSION_NAME)
+        except Exception as e:
+            # metadata_versions not migrated yet: rely on the TTL
+            db.rollback()
+            logger.warning(f"Could not read question flow version: {str(e)}")
+            return None
+
+    def _build(self, db: Session) -> QuestionFlowSnapshot:
+        # Stamp first: a publish() racing with the load shows up as a newer version next check
+        snapshot = QuestionFlowSnapshot(db, self._read_version(db))
+        with self._lock:
+            self._snapshot = snapshot
+            self._checked_at = snapshot.loaded_at
+            self.builds += 1
+        return snapshot
+
+    def get(self, db: Session) -> QuestionFlowSnapshot:
+        """Current snapshot; reads the database only to build it or to check its version"""
+        with self._lock:
+            snapshot = self._snapshot
+            checked_at = self._checked_at
+        if snapshot is None:
+            return self._build(db)
+
+        now = time.monotonic()
+        if self.ttl > 0 and now - snapshot.loaded_at >= self.ttl:
+            return self._build(db)
+        if now - checked_at < self.check_interval:
+            return snapshot
+
+        version = self._read_version(db)
+        with self._lock:
+            self._checked_at = now
+            self.version_checks += 1
+        if version != snapshot.version:
+            return self._build(db)
+        return snapshot
+
+    def publish(self, db: Session) -> QuestionFlowSnapshot:
+        """Call after committing a question/answer/translation change: bumps the version and rebuilds"""
+        try:
+            MetadataVersionHelper.bump(db, QUESTION_FLOW_VERSION_NAME)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not bump question flow version: {str(e)}")
+        return self._build(db)
+
+    def bundle(self, db: Session, language: str, question_type: Optional[str] = None) -> QuestionBundle:
+        """
+        The localized wizard rendered to JSON once per snapshot, with an ETag
+        derived from its content: every worker holding the same questions
+        returns the same tag, so clients can revalidate against any of them.
+        """
+        snapshot = self.get(db)
+        key = (language, question_type)
+        bundle = snapshot.bundles.get(key)
+        if bundle is not None:
+            return bundle
+
+        questions = snapshot.localized_questions(language, question_type)
+        digest = hashlib.sha256(dumps(questions)).hexdigest()[:32]
+        body = dumps({"language": language, "version": digest, "questions": questions})
+        bundle = QuestionBundle(body, f'"{digest}"')
+        if len(snapshot.bundles) < QUESTION_BUNDLE_CACHE_SIZE:
+            snapshot.bundles[key] = bundle
+        return bundle
+
+    def invalidate(self) -> None:
+        """Drop this process's snapshot; the next get() rebuilds it"""
+        with self._lock:
+            self._snapshot = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                "version": snapshot.version if snapshot else None,
+                "questions": len(snapshot.questions) if snapshot else 0,
+                "active_questions": len(snapshot.active_questions) if snapshot else 0,
+                "age_seconds": round(time.monotonic() - snapshot.loaded_at, 1) if snapshot else None,
+                "bundles": len(snapshot.bundles) if snapshot else 0,
+                "builds": self.builds,
+                "version_checks": self.version_checks,
+            }
+
+
+# Create a singleton instance
+question_flow = QuestionFlow()
@@ -1,17 +1,35 @@
 # service_selection_service.py
 from typing import Optional, List, Dict
-import google.generativeai as genai
 import os
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 import json
 from models.service import Service, UserService
+from services.ai_providers import ai_providers
+from services.keyword_detector import KeywordDetector
 from dotenv import load_dotenv
 import re
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Valid service types and the phrases that name them without the LLM
+SERVICE_ALIASES = {
+    'Delivery': ['deliver', 'deliveries', 'home delivery', 'door delivery', 'doorstep'],
+    'Pickup': ['pick up', 'pick-up', 'pick it up', 'takeaway', 'take away', 'takeout', 'take out', 'carryout', 'carry out', 'collect', 'collection'],
+    'Reservation': ['reservations', 'reserve', 'book a table', 'table booking', 'dine in', 'dine-in', 'dining in'],
+    'Catering': ['cater', 'caterer', 'bulk order'],
+    'Events': ['event', 'event planning'],
+}
+VALID_SERVICES = list(SERVICE_ALIASES)
+
+# Shared across requests; a sentence naming two services ("catering for my
+# event") usually means one of them, so it is left to the LLM
+service_detector = KeywordDetector("service", SERVICE_ALIASES, allow_multiple=False)
+
+# Set once the default services are known to exist, so /service/select stops re-checking them
+_default_services_ready = False
+
 class ServiceSelectionService:
     """Service for processing service selection with AI support"""
 
@@ -20,15 +38,20 @@ class ServiceSelectionService:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
 
-        # Configure Gemini
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-pro')
+        # Clients and the model come from the shared registry (see AI_MODEL_* settings)
 
-    def detect_services_from_text(self, text: str) -> List[str]:
+    async def detect_services_from_text(self, text: str) -> List[str]:
         """
         Detect services from user text using AI
         Returns a list of detected services
+
+        A single clearly named service ("delivery", "I'll pick it up") is resolved
+        by keyword and earlier AI answers come from the cache; only the rest reach Gemini.
         """
+        services = service_detector.detect(text) or service_detector.get_cached(text)
+        if services:
+            return services
+
         prompt = f"""You are a service detection assistant. Analyze the following text and identify which food service the user is requesting.
 
 User text: "{text}"
@@ -57,8 +80,9 @@ Examples:
 Response:"""
 
         try:
-            response = self.model.generate_content(prompt)
-            services_text = response.text.strip()
+            # Off the event loop, on the bounded Gemini pool, with a timeout
+            response_text = await ai_providers.acomplete("service_detection", prompt)
+            services_text = response_text
 
             # Parse the response and clean up
             services = [service.strip() for service in services_text.split(',')]
@@ -68,6 +92,8 @@ Response:"""
             if not services:
                 services = ['Delivery']
 
+            service_detector.record("llm")
+            service_detector.remember(text, services)
             return services
 
         except Exception as e:
@@ -97,13 +123,8 @@ Response:"""
         if len(service_name) < 2 or len(service_name) > 50:
             return False
 
-        # Check for valid service types
-        valid_services = [
-            'Delivery', 'Pickup', 'Reservation', 'Catering', 'Events'
-        ]
-
         # Check if it matches any valid service (case insensitive)
-        for service in valid_services:
+        for service in VALID_SERVICES:
             if service_name.lower() == service.lower():
                 return True
 
@@ -214,6 +235,10 @@ Response:"""
         """
         Create default services if they don't exist
         """
+        global _default_services_ready
+        if _default_services_ready:
+            return True
+
         try:
             default_services = [
                 {
@@ -252,6 +277,7 @@ Response:"""
                     db.add(service)
 
             db.commit()
+            _default_services_ready = True
             return True
 
         except Exception as e:
@@ -0,0 +1,43 @@
+"""
+Shared pytest setup. database.database builds its engines from the DB_* settings
+at import time (no connection is opened), so placeholder values let the
+services import without a .env file.
+"""
+import os
+
+for name, value in {
+    "DB_CONNECTION": "mysql",
+    "DB_HOST": "localhost",
+    "DB_PORT": "3306",
+    "DB_DATABASE": "test",
+    "DB_USERNAME": "test",
+    "DB_PASSWORD": "test",
+    "OPENAI_API_KEY": "test",
+    "GEMINI_API_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+
+@pytest.fixture
+def sqlite_db():
+    """Session on a fresh in-memory sqlite database holding every model's table"""
+    from database.database import Base
+    from models import (  # noqa: F401  (registers the tables and mappers)
+        cart, catalog, conversation, geocode_cache, item_popularity, merchant, merchant_detail, merchant_token,
+        metadata_version, otp, user
+    )
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
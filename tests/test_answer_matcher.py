@@ -0,0 +1,103 @@
+import pytest
+
+from services.answer_matcher import AnswerIndex
+
+DIET_ANSWERS = [
+    {"answer_key": "veg", "answer_text": "Vegetarian"},
+    {"answer_key": "nonveg", "answer_text": "Non-Vegetarian"},
+    {"answer_key": "vegan", "answer_text": "Vegan"},
+]
+
+
+@pytest.fixture
+def diet_index():
+    return AnswerIndex(DIET_ANSWERS)
+
+
+@pytest.mark.parametrize("text", [
+    "non vegetarian",
+    "Non Vegetarian",
+    "I am non vegetarian",
+    "Non Vegetarian food",
+    "non-vegetarian",
+    "Non–Vegetarian",
+    "non veg",
+    "nonveg",
+    "nonvegetarian",
+    "meat",
+])
+def test_non_vegetarian_phrasings_match_non_vegetarian(diet_index, text):
+    match = diet_index.match(text)
+    assert match is not None
+    assert match.answer_key == "nonveg"
+
+
+@pytest.mark.parametrize("text", ["vegetarian", "Veg", "I am vegetarian", "pure veg"])
+def test_vegetarian_phrasings_match_vegetarian(diet_index, text):
+    match = diet_index.match(text)
+    assert match is not None
+    assert match.answer_key == "veg"
+
+
+@pytest.mark.parametrize("text", ["non vegetarian", "nonvegetarian", "I eat non veg", "non-vegetarian food"])
+def test_non_prefix_is_never_dropped(text):
+    # Without a Non-Vegetarian answer, "non vegetarian" must go to the LLM, not to Vegetarian
+    index = AnswerIndex([answer for answer in DIET_ANSWERS if answer["answer_key"] != "nonveg"])
+    assert index.match(text) is None
+
+
+def test_exact_and_alias_tiers(diet_index):
+    assert diet_index.match("Vegan").tier == "exact"
+    assert diet_index.match("vegan please").tier == "alias"
+
+
+@pytest.mark.parametrize("text", ["not vegetarian", "suggest something veg", "what is vegan"])
+def test_defer_words_go_to_llm(diet_index, text):
+    assert diet_index.match(text) is None
+
+
+def test_two_answers_named_go_to_llm(diet_index):
+    assert diet_index.match("veg or vegan") is None
+
+
+def test_translations_are_indexed():
+    index = AnswerIndex([
+        {"answer_key": "veg", "answer_text": "Vegetarian", "translations": ["शाकाहारी"]},
+        {"answer_key": "nonveg", "answer_text": "Non-Vegetarian", "translations": ["मांसाहारी"]},
+    ])
+    assert index.match("शाकाहारी").answer_key == "veg"
+    assert index.match("मांसाहारी").answer_key == "nonveg"
+
+
+def test_phrase_shared_by_two_answers_is_ambiguous():
+    index = AnswerIndex([
+        {"answer_key": "hungry", "answer_text": "Hungry"},
+        {"answer_key": "super_hungry", "answer_text": "Super Hungry"},
+    ])
+    # "very hungry" is a variation of both answers
+    assert index.match("very hungry") is None
+    assert index.match("hungry").answer_key == "hungry"
+    assert index.match("super hungry").answer_key == "super_hungry"
+
+
+def test_fuzzy_requires_threshold_and_margin(diet_index):
+    match = diet_index.match("vegeterian", threshold=0.7)
+    assert match is not None and match.tier == "fuzzy" and match.answer_key == "veg"
+    assert diet_index.match("vegeterian", threshold=0.99) is None
+    assert diet_index.match("vegeterian", threshold=0.7, margin=0.5) is None
+
+
+def test_empty_input(diet_index):
+    assert diet_index.match("") is None
+    assert diet_index.match("!!!") is None
+
+
+def test_voice_matcher_uses_the_chat_threshold_and_margin(diet_index, monkeypatch):
+    from helpers.voice_matcher import match_voice_to_answer
+    from services.answer_matcher import answer_matcher
+
+    monkeypatch.setattr(answer_matcher, "get_index", lambda db, question_key: diet_index)
+    # "vegas" scores ~0.67 against "vegan" (accepted by the old 0.6 default) and barely leads "veg"
+    assert match_voice_to_answer(None, "vegas", "diet") is None
+    assert match_voice_to_answer(None, "vegitarian", "diet", threshold=0.7) == "veg"
+    assert match_voice_to_answer(None, "non vegetarian", "diet") == "nonveg"
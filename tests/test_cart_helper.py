@@ -0,0 +1,64 @@
+import pytest
+
+from helpers.cart_helper import CartHelper
+from models.cart import Cart, CartItem, CartItemModifier
+
+
+@pytest.fixture
+def cart(sqlite_db):
+    return CartHelper.create_cart(sqlite_db, "M1", session_id="S1")
+
+
+def totals(db, cart_id):
+    """(subtotal stored by the delta updates, subtotal recomputed from the lines)"""
+    db.expire_all()
+    stored = db.query(Cart).filter(Cart.id == cart_id).one()
+    stored_subtotal, stored_total = stored.subtotal, stored.total_amount
+    assert stored_total == stored_subtotal
+    CartHelper.recalculate_cart_totals(db, cart_id)
+    return stored_subtotal, db.query(Cart.subtotal).filter(Cart.id == cart_id).scalar()
+
+
+def test_delta_totals_match_a_full_recalculation(sqlite_db, cart):
+    latte = CartHelper.add_item_to_cart(sqlite_db, cart.id, "I1", "Latte", 4.5, quantity=2)
+    assert totals(sqlite_db, cart.id) == (9.0, 9.0)
+
+    CartHelper.add_modifier_to_item(sqlite_db, latte.id, "MOD1", "G1", "Oat milk", 0.75)
+    assert totals(sqlite_db, cart.id) == (10.5, 10.5)
+
+    # Adding the same item again grows the existing line, modifiers included
+    CartHelper.add_item_to_cart(sqlite_db, cart.id, "I1", "Latte", 4.5, quantity=1)
+    assert totals(sqlite_db, cart.id) == (15.75, 15.75)
+    assert sqlite_db.query(CartItem).count() == 1
+
+    tea = CartHelper.add_item_to_cart(sqlite_db, cart.id, "I2", "Tea", 3.0)
+    CartHelper.update_item_quantity(sqlite_db, latte.id, 1)
+    assert totals(sqlite_db, cart.id) == (8.25, 8.25)
+
+    assert CartHelper.remove_item_from_cart(sqlite_db, tea.id)
+    assert totals(sqlite_db, cart.id) == (5.25, 5.25)
+
+    assert CartHelper.update_item_quantity(sqlite_db, latte.id, 0) is None
+    assert totals(sqlite_db, cart.id) == (0.0, 0.0)
+    assert sqlite_db.query(CartItemModifier).count() == 0
+
+
+def test_clear_cart_removes_lines_and_modifiers(sqlite_db, cart):
+    latte = CartHelper.add_item_to_cart(sqlite_db, cart.id, "I1", "Latte", 4.5)
+    CartHelper.add_modifier_to_item(sqlite_db, latte.id, "MOD1", "G1", "Extra shot", 1.0)
+    CartHelper.add_item_to_cart(sqlite_db, cart.id, "I2", "Tea", 3.0)
+
+    assert CartHelper.clear_cart(sqlite_db, cart.id)
+    assert sqlite_db.query(CartItem).count() == 0
+    assert sqlite_db.query(CartItemModifier).count() == 0
+    assert totals(sqlite_db, cart.id) == (0.0, 0.0)
+
+    # The cart stays usable after clearing
+    CartHelper.add_item_to_cart(sqlite_db, cart.id, "I1", "Latte", 4.5)
+    assert totals(sqlite_db, cart.id) == (4.5, 4.5)
+
+
+def test_missing_rows(sqlite_db):
+    assert CartHelper.clear_cart(sqlite_db, 999) is False
+    assert CartHelper.remove_item_from_cart(sqlite_db, 999) is False
+    assert CartHelper.add_item_to_cart(sqlite_db, 999, "I1", "Latte", 4.5) is None
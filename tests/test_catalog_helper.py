@@ -0,0 +1,82 @@
+import json
+
+from helpers.catalog_helper import CatalogHelper
+from models.catalog import CatalogItem
+
+
+ITEMS = [
+    {
+        "id": "I1", "name": "Latte", "price": 450, "modifiedTime": 10,
+        "variants": {"elements": [{"id": "V1", "name": "Large", "price": 550}]},
+        "categories": {"elements": [{"id": "C1", "name": "Stale name"}]},
+    },
+    {"id": "I2", "name": "Tea", "price": 300, "modifiedTime": 11},
+]
+
+
+def seed(db):
+    CatalogHelper.upsert_categories(db, "M1", [{"id": "C1", "name": "Drinks", "sortOrder": 1}])
+    CatalogHelper.upsert_items(db, "M1", ITEMS)
+    db.commit()
+
+
+def test_items_page_without_expand_omits_children(sqlite_db):
+    seed(sqlite_db)
+    page = CatalogHelper.get_items_page(sqlite_db, "M1")
+    assert [item["id"] for item in page["elements"]] == ["I1", "I2"]
+    assert all("variants" not in item and "categories" not in item for item in page["elements"])
+
+
+def test_items_page_expands_from_normalized_tables(sqlite_db):
+    seed(sqlite_db)
+    # The stored JSON goes stale; expansions must come from the child tables
+    row = sqlite_db.query(CatalogItem).filter(CatalogItem.clover_item_id == "I1").one()
+    row.raw_json = json.dumps({"id": "I1", "name": "Latte", "variants": {"elements": []}})
+    sqlite_db.commit()
+
+    page = CatalogHelper.get_items_page(sqlite_db, "M1", expand="variants,categories")
+    latte, tea = page["elements"]
+    assert latte["variants"] == {"elements": [{"id": "V1", "name": "Large", "price": 550}]}
+    assert [category["name"] for category in latte["categories"]["elements"]] == ["Drinks"]
+    assert tea["variants"] == {"elements": []}
+    assert tea["categories"] == {"elements": []}
+
+    only_variants = CatalogHelper.get_items_page(sqlite_db, "M1", expand="variants")
+    assert "categories" not in only_variants["elements"][0]
+
+
+def test_sync_runs_database_work_off_the_event_loop(sqlite_db, monkeypatch):
+    import asyncio
+    import threading
+
+    from services import catalog_sync_service as sync_module
+
+    elements = {"categories": [{"id": "C1", "name": "Drinks"}], "modifier_groups": [], "items": ITEMS}
+
+    async def iter_elements(self, resource, expand=None, filter=None):
+        for element in elements[resource]:
+            yield element
+
+    upsert_threads = []
+    real_upsert = CatalogHelper.upsert_items
+
+    def upsert_items(db, merchant_id, items):
+        upsert_threads.append(threading.get_ident())
+        real_upsert(db, merchant_id, items)
+
+    monkeypatch.setattr(sync_module.CloverAPI, "iter_elements", iter_elements)
+    monkeypatch.setattr(sync_module, "SYNC_RESOURCES", [
+        ("categories", None, CatalogHelper.upsert_categories),
+        ("modifier_groups", None, CatalogHelper.upsert_modifier_groups),
+        ("items", "variants,categories", upsert_items),
+    ])
+
+    async def run():
+        loop_thread = threading.get_ident()
+        results = await sync_module.CatalogSyncService().sync_merchant(sqlite_db, "M1", "token", full=True)
+        return loop_thread, results
+
+    loop_thread, results = asyncio.run(run())
+    assert results["items"]["synced"] == 2
+    assert upsert_threads and loop_thread not in upsert_threads
+    assert CatalogHelper.has_synced(sqlite_db, "M1", "items")
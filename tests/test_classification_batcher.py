@@ -0,0 +1,121 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.classification_batcher import BatchParseError, ClassificationBatcher
+
+
+def classify_concurrently(batcher, texts, run_single, run_batch, group_key="diet"):
+    """Classify every text from its own thread, like concurrent requests in the threadpool"""
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        futures = [
+            pool.submit(batcher.classify, group_key, text, run_single, run_batch)
+            for text in texts
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=10))
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+def labeler(calls):
+    def run_single(text):
+        calls.append([text])
+        return f"label:{text.lower()}"
+
+    def run_batch(texts):
+        calls.append(list(texts))
+        return [f"label:{text.lower()}" for text in texts]
+
+    return run_single, run_batch
+
+
+def test_identical_inputs_share_one_call():
+    batcher = ClassificationBatcher(window_ms=200, max_batch_size=3)
+    calls = []
+    results = classify_concurrently(batcher, ["Veg", "veg", "VEG!", "meat", "vegan"], *labeler(calls))
+
+    assert results[:3] == ["label:veg"] * 3
+    assert results[3:] == ["label:meat", "label:vegan"]
+    # One model call carrying one copy of each distinct input
+    assert len(calls) == 1
+    assert sorted(text.lower().strip("!") for text in calls[0]) == ["meat", "veg", "vegan"]
+    assert batcher.stats()["deduplicated"] == 2
+
+
+def test_model_error_reaches_every_caller():
+    batcher = ClassificationBatcher(window_ms=200, max_batch_size=3)
+
+    def run_batch(texts):
+        raise RuntimeError("gateway timeout")
+
+    results = classify_concurrently(batcher, ["veg", "meat", "vegan"], lambda text: "unused", run_batch)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_unparseable_batch_reply_falls_back_to_single_calls():
+    batcher = ClassificationBatcher(window_ms=200, max_batch_size=3)
+    singles = []
+
+    def run_single(text):
+        singles.append(text)
+        if text == "meat":
+            raise RuntimeError("model error")
+        return f"label:{text}"
+
+    def run_batch(texts):
+        raise BatchParseError("no JSON object")
+
+    results = classify_concurrently(batcher, ["veg", "meat", "vegan"], run_single, run_batch)
+    assert results[0] == "label:veg"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == "label:vegan"
+    assert sorted(singles) == ["meat", "veg", "vegan"]
+    assert batcher.stats()["fallbacks"] == 1
+
+
+def test_short_batch_reply_falls_back_to_single_calls():
+    batcher = ClassificationBatcher(window_ms=200, max_batch_size=2)
+    results = classify_concurrently(batcher, ["veg", "meat"], lambda text: f"label:{text}", lambda texts: ["veg"])
+    assert results == ["label:veg", "label:meat"]
+
+
+def test_callers_beyond_max_waiters_skip_the_batch():
+    batcher = ClassificationBatcher(window_ms=5000, max_batch_size=10, max_waiters=2)
+    release = threading.Event()
+    calls = []
+
+    def run_batch(texts):
+        calls.append(list(texts))
+        release.wait(10)
+        return [f"label:{text}" for text in texts]
+
+    def run_single(text):
+        calls.append([text])
+        return f"label:{text}"
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        waiting = [pool.submit(batcher.classify, "diet", text, run_single, run_batch) for text in ("veg", "meat")]
+        while batcher.stats()["requests"] < 2:
+            time.sleep(0.005)
+        # Both waiter slots are taken: this caller classifies on its own without waiting
+        assert batcher.classify("diet", "vegan", run_single, run_batch) == "label:vegan"
+        batcher._open["diet"].full.set()
+        release.set()
+        assert [future.result(timeout=10) for future in waiting] == ["label:veg", "label:meat"]
+
+    assert batcher.stats()["bypassed"] == 1
+    assert batcher._waiters == {}
+
+
+@pytest.mark.parametrize("reply", ["Sorry, I can't help", '["veg"]', None])
+def test_gemini_batch_parser_raises_batch_parse_error(reply):
+    from services.gemini_service import GeminiAnalyzer
+
+    with pytest.raises(BatchParseError):
+        GeminiAnalyzer._parse_batch_response(reply, 2)
@@ -0,0 +1,163 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.routes import clover_cart
+from services.fanout_executor import FanOutExecutor, TokenBucket
+
+
+def make_cart(*items):
+    return SimpleNamespace(
+        id=7, clover_merchant_id="M1", clover_order_id="O1", clover_idempotency_key="key",
+        items=list(items)
+    )
+
+
+def make_item(item_id, clover_item_id, notes=None):
+    return SimpleNamespace(
+        id=item_id, clover_item_id=clover_item_id, quantity=1, notes=notes,
+        clover_line_item_id=None, modifiers=[]
+    )
+
+
+@pytest.fixture
+def clover(monkeypatch):
+    """Mock Clover API: set state.post to a callable(request) and state.line_items to the order's lines"""
+    state = SimpleNamespace(posts=0, gets=0, post=None, line_items=[])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            state.posts += 1
+            return state.post(request)
+        state.gets += 1
+        return httpx.Response(200, json={"elements": state.line_items})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(clover_cart, "get_clover_client", lambda: client)
+    monkeypatch.setattr(clover_cart, "cart_push_executor", FanOutExecutor(
+        max_retries=3, backoff_base=0.001, backoff_max=0.01,
+        rate_limiter=TokenBucket(rate=10000, capacity=10000)
+    ))
+    return state
+
+
+def line(line_id, clover_item_id, note=None):
+    return {"id": line_id, "item": {"id": clover_item_id}, "note": note}
+
+
+def test_bulk_push_maps_lines(clover):
+    items = [make_item(1, "A"), make_item(2, "B")]
+    clover.post = lambda request: httpx.Response(200, json={"elements": [line("L1", "A"), line("L2", "B")]})
+    created, errors = asyncio.run(clover_cart._push_line_items(make_cart(*items), "token", items))
+    assert created == {1: "L1", 2: "L2"} and errors == []
+    assert clover.posts == 1 and clover.gets == 0
+
+
+def test_timed_out_bulk_post_is_read_back_not_resent(clover):
+    items = [make_item(1, "A"), make_item(2, "A", notes="no onion")]
+
+    def post(request):
+        raise httpx.ReadTimeout("slow", request=request)
+
+    clover.post = post
+    clover.line_items = [line("L2", "A", "no onion"), line("L1", "A")]
+    created, errors = asyncio.run(clover_cart._push_line_items(make_cart(*items), "token", items))
+    assert created == {1: "L1", 2: "L2"} and errors == []
+    assert clover.posts == 1
+
+
+def test_bulk_5xx_with_no_lines_reports_error_without_retry(clover):
+    items = [make_item(1, "A")]
+    clover.post = lambda request: httpx.Response(503)
+    created, errors = asyncio.run(clover_cart._push_line_items(make_cart(*items), "token", items))
+    assert created == {} and len(errors) == 1
+    assert clover.posts == 1 and clover.gets == 1
+
+
+def test_short_bulk_reply_is_reconciled_against_order(clover):
+    items = [make_item(1, "A"), make_item(2, "B")]
+    clover.post = lambda request: httpx.Response(200, json={"elements": [line("L1", "A")]})
+    clover.line_items = [line("L1", "A"), line("L2", "B")]
+    created, errors = asyncio.run(clover_cart._push_line_items(make_cart(*items), "token", items))
+    assert created == {1: "L1", 2: "L2"} and errors == []
+
+
+def test_lines_already_recorded_are_not_matched_twice():
+    recorded = make_item(1, "A")
+    recorded.clover_line_item_id = "L1"
+    pending = make_item(2, "A")
+    cart = make_cart(recorded, pending)
+    matched = clover_cart._match_line_items(cart, [pending], [line("L1", "A"), line("L2", "A")])
+    assert matched == {2: "L2"}
+
+
+def test_bulk_payload_carries_idempotency_key(clover):
+    items = [make_item(1, "A")]
+    seen = {}
+
+    def post(request):
+        seen["key"] = request.headers.get("Idempotency-Key")
+        seen["body"] = json.loads(request.content)
+        return httpx.Response(200, json={"elements": [line("L1", "A")]})
+
+    clover.post = post
+    asyncio.run(clover_cart._push_line_items(make_cart(*items), "token", items))
+    assert seen["key"].startswith("key:line_items:")
+    assert seen["body"]["items"][0]["item"]["id"] == "A"
+
+
+@pytest.fixture
+def synced_cart(sqlite_db, monkeypatch):
+    from models.cart import Cart, CartItem
+
+    monkeypatch.setattr(clover_cart.MerchantHelper, "get_merchant_token", staticmethod(lambda db, merchant_id: "token"))
+    cart = Cart(clover_merchant_id="M1", clover_order_id="O1", clover_idempotency_key="key", status="synced")
+    cart.items = [
+        CartItem(clover_item_id="A", name="Tea", price=2.0, quantity=1, line_total=2.0),
+        CartItem(clover_item_id="B", name="Cake", price=4.0, quantity=1, line_total=4.0),
+    ]
+    sqlite_db.add(cart)
+    sqlite_db.commit()
+    return cart
+
+
+def sync_items(db, cart):
+    return asyncio.run(clover_cart.sync_cart_items_to_clover(clover_cart.SyncCartRequest(cart_id=cart.id), db))
+
+
+def test_first_item_sync_pushes_without_reading_the_order(clover, sqlite_db, synced_cart):
+    clover.post = lambda request: httpx.Response(200, json={"elements": [line("L1", "A"), line("L2", "B")]})
+
+    result = sync_items(sqlite_db, synced_cart)
+
+    assert [item["clover_line_item_id"] for item in result["synced_items"]] == ["L1", "L2"]
+    assert clover.gets == 0 and clover.posts == 1
+    assert synced_cart.clover_items_push_started_at is None
+
+
+def test_item_sync_after_an_unconfirmed_push_adopts_existing_lines(clover, sqlite_db, synced_cart):
+    from datetime import datetime
+
+    synced_cart.clover_items_push_started_at = datetime.now()
+    sqlite_db.commit()
+    clover.line_items = [line("L1", "A")]
+    clover.post = lambda request: httpx.Response(200, json={"elements": [line("L2", "B")]})
+
+    result = sync_items(sqlite_db, synced_cart)
+
+    assert [item["clover_line_item_id"] for item in result["synced_items"]] == ["L1", "L2"]
+    assert clover.gets == 1 and clover.posts == 1
+    assert synced_cart.clover_items_push_started_at is None
+
+
+def test_unconfirmed_item_push_is_remembered_for_the_retry(clover, sqlite_db, synced_cart):
+    clover.post = lambda request: httpx.Response(503)
+
+    with pytest.raises(clover_cart.HTTPException):
+        sync_items(sqlite_db, synced_cart)
+
+    sqlite_db.expire_all()
+    assert synced_cart.clover_items_push_started_at is not None
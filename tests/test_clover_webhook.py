@@ -0,0 +1,45 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from app.routes import clover_data
+from services.catalog_cache import CatalogCache
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    cache = CatalogCache()
+    for resource, expand in [("items", "categories"), ("items", "variants"), ("items/I9", "variants,categories"),
+                             ("categories", None)]:
+        cache._store(cache.make_key("M1", resource, expand), {"elements": []})
+    monkeypatch.setattr(clover_data, "catalog_cache", cache)
+    monkeypatch.setattr(clover_data, "CLOVER_WEBHOOK_AUTH_CODE", "secret")
+    app = FastAPI()
+    app.include_router(clover_data.router)
+    return TestClient(app), cache
+
+
+EVENT = {"merchants": {"M1": [{"objectId": "IC:C1", "type": "UPDATE"}]}}
+
+
+def test_webhook_rejects_events_without_the_auth_code(webhook):
+    client, cache = webhook
+    assert client.post("/clover/catalog/cache/webhook", json=EVENT).status_code == 401
+    assert client.post(
+        "/clover/catalog/cache/webhook", json=EVENT, headers={"X-Clover-Auth": "wrong"}
+    ).status_code == 401
+    assert cache.stats()["entries"] == 4
+
+
+def test_webhook_verification_needs_no_auth(webhook):
+    client, _ = webhook
+    response = client.post("/clover/catalog/cache/webhook", json={"verificationCode": "abc"})
+    assert response.status_code == 200
+
+
+def test_category_event_evicts_items_expanded_with_categories(webhook):
+    client, cache = webhook
+    response = client.post("/clover/catalog/cache/webhook", json=EVENT, headers={"X-Clover-Auth": "secret"})
+    assert response.status_code == 200
+    assert response.json()["data"]["removed_entries"] == 3
+    assert list(cache._entries) == [cache.make_key("M1", "items", "variants")]
@@ -0,0 +1,105 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.fanout_executor import FanOutExecutor, RetryableError, TokenBucket, raise_for_retryable
+
+
+def make_executor(**options) -> FanOutExecutor:
+    options.setdefault("max_retries", 3)
+    options.setdefault("backoff_base", 0.001)
+    options.setdefault("backoff_max", 0.01)
+    return FanOutExecutor(rate_limiter=TokenBucket(rate=10000, capacity=10000), **options)
+
+
+def flaky(failures, value="ok"):
+    """Worker raising each of `failures` in turn, then returning `value`"""
+    calls = []
+
+    async def worker():
+        calls.append(1)
+        if len(calls) <= len(failures):
+            raise failures[len(calls) - 1]
+        return value
+
+    return worker, calls
+
+
+def test_retries_retryable_errors_then_succeeds():
+    worker, calls = flaky([RetryableError("503", status_code=503), httpx.ReadTimeout("slow")])
+    result = asyncio.run(make_executor().call("m1", worker))
+    assert result.success and result.value == "ok"
+    assert result.attempts == 3 and len(calls) == 3
+
+
+def test_gives_up_after_max_retries():
+    worker, calls = flaky([RetryableError("500", status_code=500)] * 10)
+    result = asyncio.run(make_executor(max_retries=2).call("m1", worker))
+    assert not result.success
+    assert result.attempts == 3 and len(calls) == 3
+    assert not result.ambiguous
+
+
+def test_other_exceptions_fail_without_retry():
+    worker, calls = flaky([ValueError("bad payload")])
+    result = asyncio.run(make_executor().call("m1", worker))
+    assert not result.success and result.error == "bad payload"
+    assert len(calls) == 1
+
+
+def test_backoff_is_capped_and_honours_retry_after():
+    executor = make_executor(backoff_base=1, backoff_max=4)
+    assert executor._backoff(0, retry_after=2.5) == 2.5
+    assert executor._backoff(0, retry_after=60) == 4
+    for attempt in range(6):
+        assert 0 <= executor._backoff(attempt, None) <= min(4, 2 ** attempt)
+
+
+def test_raise_for_retryable_reads_retry_after():
+    response = httpx.Response(429, headers={"Retry-After": "3"})
+    with pytest.raises(RetryableError) as error:
+        raise_for_retryable(response)
+    assert error.value.retry_after == 3.0 and error.value.status_code == 429
+    raise_for_retryable(httpx.Response(404))
+
+
+@pytest.mark.parametrize("failure", [
+    httpx.ReadTimeout("slow"),
+    httpx.RemoteProtocolError("reset"),
+    RetryableError("Clover API returned 502", status_code=502),
+])
+def test_non_idempotent_calls_are_not_retried_after_ambiguous_failures(failure):
+    worker, calls = flaky([failure])
+    result = asyncio.run(make_executor().call("order", worker, idempotent=False))
+    assert not result.success and result.ambiguous
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("failure", [
+    httpx.ConnectError("refused"),
+    httpx.ConnectTimeout("no route"),
+    RetryableError("Clover API returned 429", status_code=429),
+])
+def test_non_idempotent_calls_retry_when_request_never_took_effect(failure):
+    worker, calls = flaky([failure])
+    result = asyncio.run(make_executor().call("order", worker, idempotent=False))
+    assert result.success and not result.ambiguous
+    assert len(calls) == 2
+
+
+def test_run_keeps_input_order_and_caps_concurrency():
+    running = 0
+    peak = 0
+
+    async def worker(target):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001 * (10 - target))
+        running -= 1
+        return target * 2
+
+    results = asyncio.run(make_executor(max_concurrency=3).run(range(10), worker))
+    assert [result.value for result in results] == [target * 2 for target in range(10)]
+    assert peak <= 3
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from models.merchant_detail import MerchantDetail
+from services import geocoding_queue as queue_module
+from services.geocoding_queue import GeocodingQueue
+from services.geocoding_service import geocoding_service
+
+
+def add_merchants(db, count):
+    for index in range(count):
+        db.add(MerchantDetail(clover_merchant_id=f"M{index}", address=f"{index} Main St", city="Springfield"))
+    db.commit()
+
+
+def use_database(monkeypatch, db):
+    """Point the queue at the test database and record the threads that run SQL"""
+    bind = db.get_bind()
+    monkeypatch.setattr(queue_module, "SessionLocal", sessionmaker(bind=bind, autoflush=False))
+    monkeypatch.setattr(queue_module.merchant_geo_index, "upsert", lambda detail: None)
+    sql_threads = set()
+    event.listen(bind, "before_cursor_execute", lambda *args: sql_threads.add(threading.get_ident()))
+    return sql_threads
+
+
+def test_process_batch_keeps_database_work_off_the_event_loop(sqlite_db, monkeypatch):
+    add_merchants(sqlite_db, 3)
+    sql_threads = use_database(monkeypatch, sqlite_db)
+    searches = []
+
+    async def search(full_address):
+        searches.append(full_address)
+        return 40.0, -89.0
+
+    monkeypatch.setattr(geocoding_service, "_search", search)
+    queue = GeocodingQueue()
+
+    async def run():
+        return threading.get_ident(), await queue.process_batch([1, 2, 3])
+
+    loop_thread, geocoded = asyncio.run(run())
+
+    assert geocoded == 3
+    assert len(searches) == 3
+    assert sql_threads and loop_thread not in sql_threads
+    sqlite_db.expire_all()
+    assert all(detail.latitude == 40.0 for detail in sqlite_db.query(MerchantDetail))
+
+
+def test_only_the_lock_holder_queues_and_geocodes(sqlite_db, monkeypatch):
+    add_merchants(sqlite_db, 2)
+    use_database(monkeypatch, sqlite_db)
+    queue = GeocodingQueue(batch_wait=0)
+    monkeypatch.setattr(queue, "_hold_worker_role", lambda: False)
+
+    async def process_batch(ids):
+        raise AssertionError(f"geocoded {ids} without the worker lock")
+
+    monkeypatch.setattr(queue, "process_batch", process_batch)
+
+    async def run():
+        await queue.start(interval_seconds=0)
+        await queue._backfill_task
+        queue.enqueue(1)
+        stats = queue.stats()
+        await queue.stop()
+        return stats
+
+    stats = asyncio.run(run())
+
+    assert stats["worker"] is False
+    assert stats["enqueued"] == 0 and stats["queued"] == 0 and not stats["running"]
+
+
+def test_backfill_pages_through_merchants_missing_coordinates(sqlite_db, monkeypatch):
+    add_merchants(sqlite_db, 5)
+    use_database(monkeypatch, sqlite_db)
+    monkeypatch.setattr(queue_module, "GEOCODING_BACKFILL_LIMIT", 2)
+    queue = GeocodingQueue()
+    monkeypatch.setattr(queue, "_hold_worker_role", lambda: True)
+
+    scans = [queue._missing_ids() for _ in range(4)]
+
+    assert scans == [[1, 2], [3, 4], [5], [1, 2]]
+    assert queue.is_worker
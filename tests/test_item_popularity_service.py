@@ -0,0 +1,145 @@
+import random
+from collections import Counter
+
+import pytest
+
+from helpers.cart_helper import CartHelper
+from helpers.catalog_helper import CatalogHelper
+from models.cart import Cart
+from models.item_popularity import ItemPopularity
+from services import item_popularity_service as popularity_module
+from services.item_popularity_service import ItemPopularityService, _Pool, classify_dietary_type
+
+
+@pytest.mark.parametrize("texts, labels, expected", [
+    (["Vegetable Pizza"], [], "vegetarian"),
+    (["Caesar Salad"], [], "vegetarian"),
+    (["Cheese Burst"], [], "vegetarian"),
+    (["Mushrooms on Toast"], [], "vegetarian"),
+    (["Chickens"], [], "non-vegetarian"),
+    (["Chicken Caesar Salad"], [], "non-vegetarian"),
+    (["Salad", None, "Chicken"], [], "non-vegetarian"),
+    (["Non-Veg Thali"], [], "non-vegetarian"),
+    (["Plant-based Burger"], [], "vegan"),
+    (["Garlic Bread"], [], "unknown"),
+    (["House Special"], ["Vegetarian"], "vegetarian"),
+    (["Beyond Chicken Wrap"], ["Vegan"], "vegan"),
+    # A tag that does not name a diet leaves the decision to the item text
+    (["Paneer Tikka"], ["Spicy"], "vegetarian"),
+])
+def test_classify_dietary_type(texts, labels, expected):
+    assert classify_dietary_type(*texts, labels=labels) == expected
+
+
+def entry(name, weight, merchant="M1"):
+    return {"key": (merchant, name), "weight": weight, "suggestion": {"item_name": name}}
+
+
+def test_pool_sample_is_distinct_and_weighted():
+    pool = _Pool([entry("heavy", 90.0), entry("light", 10.0)], capacity=10)
+    rng = random.Random(7)
+    firsts = Counter(pool.sample(1, rng)[0]["suggestion"]["item_name"] for _ in range(2000))
+    assert 0.85 < firsts["heavy"] / 2000 < 0.95
+
+    both = pool.sample(5, rng)
+    assert sorted(e["suggestion"]["item_name"] for e in both) == ["heavy", "light"]
+    assert _Pool([], capacity=10).sample(3, rng) == []
+
+
+def test_pool_sample_tops_up_when_one_item_dominates():
+    pool = _Pool([entry("dominant", 1e9), entry("a", 1.0), entry("b", 1.0)], capacity=10)
+    names = [e["suggestion"]["item_name"] for e in pool.sample(3, random.Random(1))]
+    assert sorted(names) == ["a", "b", "dominant"]
+
+
+def test_pool_offer_fills_then_evicts_only_heavier_items():
+    pool = _Pool([entry("a", 5.0), entry("b", 2.0)], capacity=3)
+    assert pool.offer(entry("c", 1.0))
+    assert not pool.offer(entry("d", 1.0))
+    assert pool.offer(entry("e", 4.0))
+    assert sorted(e["suggestion"]["item_name"] for e in pool.entries) == ["a", "b", "e"]
+    assert pool.cumulative[-1] == 11.0
+    assert pool.bump(("M1", "e"), 1.0)
+    assert not pool.bump(("M1", "c"), 1.0)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = ItemPopularityService(pool_size=2, ttl=0)
+    monkeypatch.setattr("helpers.cart_helper.item_popularity_service", service)
+    return service
+
+
+def test_cart_add_counts_in_the_cart_transaction_and_updates_pools_in_memory(sqlite_db, service):
+    CatalogHelper.upsert_items(sqlite_db, "M1", [
+        {"id": "I1", "name": "Margherita", "tags": {"elements": [{"name": "Vegetarian"}]}},
+    ])
+    sqlite_db.commit()
+    cart = CartHelper.create_cart(sqlite_db, "M1", session_id="S1")
+    assert service.suggest(sqlite_db, "vegetarian") == []
+
+    CartHelper.add_item_to_cart(sqlite_db, cart.id, "I1", "Margherita", 9.0, quantity=2)
+    CartHelper.add_item_to_cart(sqlite_db, cart.id, "I2", "Veg Burger", 7.0)
+    CartHelper.add_item_to_cart(sqlite_db, cart.id, "I1", "Margherita", 9.0)
+
+    row = sqlite_db.query(ItemPopularity).filter(ItemPopularity.clover_item_id == "I1").one()
+    assert (row.cart_count, row.score, row.dietary_type) == (3, 3.0, "vegetarian")
+    # Both writes reached the pool without reloading it from the database
+    assert service.stats()["pool_loads"] == 1
+    weights = {e["key"][1]: e["weight"] for e in service._pools["vegetarian"].entries}
+    assert weights == {"I1": 3.0, "I2": 1.0}
+
+
+def test_counter_rolls_back_with_the_cart(sqlite_db, service, monkeypatch):
+    cart = CartHelper.create_cart(sqlite_db, "M1", session_id="S1")
+
+    def failing_commit():
+        raise RuntimeError("commit failed")
+
+    monkeypatch.setattr(sqlite_db, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        CartHelper.add_item_to_cart(sqlite_db, cart.id, "I1", "Veg Burger", 7.0)
+    monkeypatch.undo()
+
+    assert sqlite_db.query(ItemPopularity).count() == 0
+
+
+def test_rebuild_is_all_or_nothing(sqlite_db, service, monkeypatch):
+    for merchant in ("M1", "M2"):
+        cart = CartHelper.create_cart(sqlite_db, merchant, session_id=f"S-{merchant}")
+        CartHelper.add_item_to_cart(sqlite_db, cart.id, "I1", "Veg Burger", 7.0, quantity=2)
+    sqlite_db.query(Cart).filter(Cart.clover_merchant_id == "M2").update({"clover_order_id": "O1"})
+    sqlite_db.commit()
+
+    assert service.rebuild(sqlite_db) == 2
+    scores = dict(sqlite_db.query(ItemPopularity.clover_merchant_id, ItemPopularity.score).all())
+    assert scores == {"M1": 2.0, "M2": 2 * service.order_weight + 2}
+
+    real_build_rows = service._build_rows
+
+    def build_rows(db, merchant_id, counts):
+        if merchant_id == "M2":
+            raise RuntimeError("catalog lookup failed")
+        return real_build_rows(db, merchant_id, counts)
+
+    monkeypatch.setattr(service, "_build_rows", build_rows)
+    with pytest.raises(RuntimeError):
+        service.rebuild(sqlite_db)
+    assert dict(sqlite_db.query(ItemPopularity.clover_merchant_id, ItemPopularity.score).all()) == scores
+    monkeypatch.undo()
+
+    # A failure after the table was cleared and partly rewritten rolls all of it back
+    real_increment_many = popularity_module.ItemPopularityHelper.increment_many
+    calls = []
+
+    def increment_many(db, rows):
+        calls.append(rows)
+        if len(calls) == 2:
+            raise RuntimeError("write failed")
+        real_increment_many(db, rows)
+
+    monkeypatch.setattr(popularity_module, "ITEM_POPULARITY_REBUILD_CHUNK_SIZE", 1)
+    monkeypatch.setattr(popularity_module.ItemPopularityHelper, "increment_many", staticmethod(increment_many))
+    with pytest.raises(RuntimeError):
+        service.rebuild(sqlite_db)
+    assert dict(sqlite_db.query(ItemPopularity.clover_merchant_id, ItemPopularity.score).all()) == scores
@@ -0,0 +1,58 @@
+import pytest
+
+from services.keyword_detector import KeywordDetector
+
+LANGUAGES = {
+    "English": ["english", "eng"],
+    "Hindi": ["hindi", "हिंदी"],
+    "Spanish": ["spanish", "español", "espanol"],
+}
+
+
+@pytest.fixture
+def languages():
+    return KeywordDetector("language", LANGUAGES)
+
+
+@pytest.fixture
+def services():
+    return KeywordDetector("service", {"Pickup": ["pick up", "takeaway"], "Delivery": ["deliver", "home delivery"]},
+                           allow_multiple=False)
+
+
+@pytest.mark.parametrize("text", [
+    "I don't speak Hindi",
+    "not spanish",
+    "no english please",
+    "anything except Hindi",
+    "Hindi nahi",
+    "I can't read English",
+    "never spanish",
+])
+def test_negated_mentions_go_to_the_llm(languages, text):
+    assert languages.detect(text) is None
+
+
+def test_clear_mentions_resolve_locally(languages):
+    assert languages.detect("Hindi") == ["Hindi"]
+    assert languages.detect("I speak Español and English") == ["Spanish", "English"]
+    assert languages.detect("hindi, HINDI!") == ["Hindi"]
+    assert languages.detect("french") is None
+
+
+def test_whole_words_only(languages):
+    # "eng" is an alias, but not inside another word
+    assert languages.detect("engineering") is None
+
+
+def test_longest_phrase_wins_and_single_label_detectors_defer(services):
+    assert services.detect("home delivery") == ["Delivery"]
+    assert services.detect("pick up") == ["Pickup"]
+    assert services.detect("pick up or deliver") is None
+    assert services.detect("no delivery") is None
+
+
+def test_llm_results_are_cached_by_normalized_text(languages):
+    languages.remember("I don't speak Hindi", ["English"])
+    assert languages.get_cached("i DON'T speak hindi!") == ["English"]
+    assert languages.get_cached("something else") is None
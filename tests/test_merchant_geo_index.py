@@ -0,0 +1,79 @@
+import heapq
+import random
+
+import pytest
+
+from services.merchant_geo_index import (
+    LEAF_SIZE, _KDTree, chord_to_km, haversine_km, km_to_chord, to_unit_vector
+)
+
+
+def random_points(rng, count):
+    points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(count)]
+    # Clusters near a pole and across the antimeridian, where lat/lon indexes go wrong
+    points += [(89.9 - rng.random(), rng.uniform(-180, 180)) for _ in range(count // 10)]
+    points += [(rng.uniform(-1, 1), rng.choice([-1, 1]) * (180 - rng.random())) for _ in range(count // 10)]
+    return points
+
+
+def brute_force(points, query, limit, radius_km, skip):
+    distances = [
+        (haversine_km(query[0], query[1], lat, lon), merchant_id)
+        for merchant_id, (lat, lon) in enumerate(points)
+        if merchant_id not in skip
+    ]
+    return heapq.nsmallest(limit, [d for d in distances if d[0] <= radius_km])
+
+
+@pytest.mark.parametrize("count", [0, 1, LEAF_SIZE, 500])
+def test_kd_tree_matches_brute_force(count):
+    rng = random.Random(count)
+    points = random_points(rng, count)
+    tree = _KDTree([(merchant_id, to_unit_vector(lat, lon)) for merchant_id, (lat, lon) in enumerate(points)])
+
+    for _ in range(50):
+        query = (rng.uniform(-90, 90), rng.choice([rng.uniform(-180, 180), 179.9, -179.9]))
+        limit = rng.choice([1, 5, 20])
+        radius_km = rng.choice([50.0, 2000.0, 25000.0])
+        skip = set(rng.sample(range(len(points)), min(3, len(points))))
+
+        found = tree.search(to_unit_vector(*query), limit, km_to_chord(radius_km), skip)
+        found = sorted((chord_to_km(-negative_chord), merchant_id) for negative_chord, merchant_id in found)
+        expected = brute_force(points, query, limit, radius_km, skip)
+
+        assert [merchant_id for _, merchant_id in found] == [merchant_id for _, merchant_id in expected]
+        for (tree_km, _), (exact_km, _) in zip(found, expected):
+            assert tree_km == pytest.approx(exact_km, abs=1e-6)
+
+
+def test_write_triggered_rebuild_runs_off_the_calling_thread(monkeypatch):
+    import threading
+    import time
+    from types import SimpleNamespace
+
+    from services import merchant_geo_index as geo_module
+
+    build_threads = []
+    real_tree = geo_module._KDTree
+
+    def tree(items):
+        build_threads.append(threading.get_ident())
+        return real_tree(items)
+
+    monkeypatch.setattr(geo_module, "_KDTree", tree)
+    index = geo_module.MerchantGeoIndex(ttl=0)
+    build_threads.clear()
+    rng = random.Random(3)
+    for merchant_id in range(1, LEAF_SIZE + 3):
+        index.upsert(SimpleNamespace(
+            id=merchant_id, clover_merchant_id=f"M{merchant_id}", name=None, address=None, city=None,
+            state=None, country=None, postal_code=None,
+            latitude=rng.uniform(-60, 60), longitude=rng.uniform(-180, 180)
+        ))
+
+    deadline = time.monotonic() + 5
+    while index.stats()["rebuilds"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index.stats()["rebuilds"] >= 1
+    assert threading.get_ident() not in build_threads
+    assert len(index.nearest(0.0, 0.0, limit=100)) == LEAF_SIZE + 2
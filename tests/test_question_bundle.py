@@ -0,0 +1,79 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.routes import question_master
+from database.database import get_db
+from models import conversation
+from models.conversation import AnswerMaster, AnswerTranslation, QuestionMaster
+from services.question_flow import QuestionFlow
+
+URL = "/api/v1/questions/bundle/hi"
+
+
+@pytest.fixture
+def bundle_client(sqlite_db, monkeypatch):
+    conversation.Base.metadata.create_all(sqlite_db.get_bind())
+    sqlite_db.add_all([
+        QuestionMaster(question_key="diet", question_text="Diet?", question_order=1, type="choice", is_active=True),
+        AnswerMaster(answer_key="veg", question_key="diet", answer_text="Vegetarian", answer_order=1, is_active=True),
+        AnswerTranslation(answer_key="veg", language="hi", translated_text="शाकाहारी"),
+    ])
+    sqlite_db.commit()
+
+    flow = QuestionFlow(check_interval=3600, ttl=0)
+    monkeypatch.setattr(question_master, "question_flow", flow)
+    app = FastAPI()
+    app.include_router(question_master.router)
+    app.dependency_overrides[get_db] = lambda: sqlite_db
+
+    queries = []
+    event.listen(sqlite_db.get_bind(), "before_cursor_execute", lambda *args: queries.append(args[2]))
+    return TestClient(app), flow, queries
+
+
+def test_bundle_is_localized_with_an_etag(bundle_client):
+    client, _, _ = bundle_client
+    response = client.get(URL)
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["cache-control"] == "no-cache"
+    question = response.json()["questions"][0]
+    assert question["language"] == "en"
+    assert question["answers"][0]["answer_text"] == "शाकाहारी"
+
+
+@pytest.mark.parametrize("if_none_match", ["{etag}", "W/{etag}", '"stale", {etag}', "*"])
+def test_matching_if_none_match_returns_304_without_queries(bundle_client, if_none_match):
+    client, _, queries = bundle_client
+    etag = client.get(URL).headers["etag"]
+    queries.clear()
+
+    response = client.get(URL, headers={"If-None-Match": if_none_match.format(etag=etag)})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert queries == []
+
+
+def test_publish_changes_the_etag(bundle_client, sqlite_db):
+    client, flow, _ = bundle_client
+    etag = client.get(URL).headers["etag"]
+
+    # The Hindi answer is translated, so only the untranslated question text changes its bundle
+    sqlite_db.query(AnswerMaster).filter(AnswerMaster.answer_key == "veg").update({"answer_text": "Veg"})
+    sqlite_db.commit()
+    flow.publish(sqlite_db)
+    assert client.get(URL, headers={"If-None-Match": etag}).status_code == 304
+
+    sqlite_db.query(QuestionMaster).filter(QuestionMaster.question_key == "diet").update(
+        {"question_text": "Any diet?"}
+    )
+    sqlite_db.commit()
+    flow.publish(sqlite_db)
+
+    response = client.get(URL, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["questions"][0]["question_text"] == "Any diet?"
@@ -0,0 +1,69 @@
+import pytest
+
+from helpers.item_popularity_helper import ItemPopularityHelper
+from helpers.metadata_version_helper import MetadataVersionHelper
+from helpers.upsert_helper import UpsertHelper
+from models.item_popularity import ItemPopularity
+from models.metadata_version import MetadataVersion
+
+
+def popularity_row(score, name="Latte"):
+    return {
+        "clover_merchant_id": "M1", "clover_item_id": "I1", "dietary_type": "Vegetarian",
+        "item_name": name, "description": None, "category": None, "price": 450,
+        "order_count": 1, "cart_count": 0, "score": score,
+    }
+
+
+@pytest.fixture(params=["native", "portable"])
+def upsert_path(request, monkeypatch, sqlite_db):
+    """Runs each test through the sqlite ON CONFLICT statement and through the dialect-neutral fallback"""
+    portable_calls = []
+    if request.param == "portable":
+        monkeypatch.setattr("helpers.upsert_helper._ON_CONFLICT_DIALECTS", ())
+        real_portable = UpsertHelper._portable_upsert
+
+        def spy(*args):
+            portable_calls.append(args[1])
+            real_portable(*args)
+
+        monkeypatch.setattr(UpsertHelper, "_portable_upsert", staticmethod(spy))
+    yield request.param
+    assert bool(portable_calls) == (request.param == "portable")
+
+
+def test_increment_many_adds_counters_and_refreshes_details(sqlite_db, upsert_path):
+    ItemPopularityHelper.increment_many(sqlite_db, [popularity_row(2.0)])
+    ItemPopularityHelper.increment_many(sqlite_db, [popularity_row(3.0, name="Oat Latte")])
+    sqlite_db.commit()
+
+    row = sqlite_db.query(ItemPopularity).one()
+    assert (row.order_count, row.score, row.item_name) == (2, 5.0, "Oat Latte")
+
+
+def test_metadata_bump_creates_then_increments(sqlite_db, upsert_path):
+    assert MetadataVersionHelper.get_version(sqlite_db, "question_flow") is None
+    MetadataVersionHelper.bump(sqlite_db, "question_flow")
+    MetadataVersionHelper.bump(sqlite_db, "question_flow")
+    sqlite_db.commit()
+    assert MetadataVersionHelper.get_version(sqlite_db, "question_flow") == 2
+
+
+def test_portable_upsert_recovers_from_a_concurrent_insert(sqlite_db, monkeypatch):
+    calls = []
+    real_execute = sqlite_db.execute
+
+    def execute(stmt, *args, **kwargs):
+        # The first UPDATE misses; another writer inserts the row before our INSERT
+        if not calls and stmt.is_dml and stmt.is_update:
+            calls.append(stmt)
+            real_execute(MetadataVersion.__table__.insert().values(name="flow", version=5))
+            return type("Result", (), {"rowcount": 0})()
+        return real_execute(stmt, *args, **kwargs)
+
+    monkeypatch.setattr(sqlite_db, "execute", execute)
+    UpsertHelper._portable_upsert(
+        sqlite_db, MetadataVersion, [{"name": "flow", "version": 1}], ["name"], [], ["version"], {}
+    )
+    sqlite_db.commit()
+    assert MetadataVersionHelper.get_version(sqlite_db, "flow") == 6
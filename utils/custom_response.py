@@ -2,10 +2,10 @@
 Custom Response Classes for automatic formatting
 """
 from typing import Any, Dict, Optional, Union
-from fastapi.responses import JSONResponse
+from .json_response import FastJSONResponse
 from .response_formatter import ResponseFormatter
 
-class StandardJSONResponse(JSONResponse):
+class StandardJSONResponse(FastJSONResponse):
     """Custom JSONResponse that automatically formats responses"""
 
     def __init__(
@@ -26,7 +26,7 @@ class StandardJSONResponse(JSONResponse):
             success: Whether the operation was successful
             message: Response message
             data: Response data
-            **kwargs: Additional arguments for JSONResponse
+            **kwargs: Additional arguments for FastJSONResponse
         """
         # If content is provided but data is not, treat content as data
         if data is None and content is not None:
@@ -0,0 +1,77 @@
+"""
+JSON response class backed by orjson, with a stdlib json fallback
+"""
+import datetime
+import decimal
+import json
+import logging
+import os
+import uuid
+from typing import Any
+from fastapi.responses import JSONResponse
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:  # optional accelerator
+    orjson = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "orjson" (default, when installed) or "stdlib"
+JSON_RESPONSE_BACKEND = os.getenv("JSON_RESPONSE_BACKEND", "orjson").lower()
+
+USE_ORJSON = orjson is not None and JSON_RESPONSE_BACKEND == "orjson"
+
+# Non-string dict keys (e.g. int ids) are stringified like json.dumps does
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles natively (datetime/UUID only matter for the json module)"""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, as rendered by FastJSONResponse"""
+    if USE_ORJSON:
+        try:
+            return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+        except TypeError as e:
+            # e.g. integers beyond 64 bits; stdlib handles those
+            logger.debug(f"orjson could not encode response, using stdlib json: {str(e)}")
+    # Same settings as starlette's JSONResponse.render
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Drop-in JSONResponse that encodes with orjson when it is installed.
+
+    Output matches JSONResponse (compact separators, non-ASCII kept as UTF-8),
+    except that datetime/date/UUID/Decimal/set values are encoded instead of
+    failing, and in orjson mode NaN/Infinity become null instead of raising.
+    Set JSON_RESPONSE_BACKEND=stdlib to force the json module.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
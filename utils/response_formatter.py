@@ -4,6 +4,7 @@ Global Response Formatter for consistent API responses
 from typing import Any, Dict, List, Optional, Union
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
+from utils.json_response import FastJSONResponse
 from pydantic import BaseModel
 import logging
 
@@ -41,7 +42,7 @@ class ResponseFormatter:
             "data": data
         }
 
-        return JSONResponse(
+        return FastJSONResponse(
             content=response_data,
             status_code=status_code
         )
@@ -69,7 +70,7 @@ class ResponseFormatter:
             "data": data
         }
 
-        return JSONResponse(
+        return FastJSONResponse(
             content=response_data,
             status_code=status_code
         )